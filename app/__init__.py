@@ -4,9 +4,13 @@ import click
 from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
+from sqlalchemy import event
 
-from .config import Config
-from .models import db
+from .config import Config, engine_options, sqlite_pragmas
+from .metrics import metrics
+from .models import REPLICA_BIND, db, route_reads_to_replica
+from .responses import responses
+from .snapshot import snapshots
 
 
 def create_app(config_class=None):
@@ -20,9 +24,23 @@ def create_app(config_class=None):
         app.config.from_object(Config)
 
     # Initialize extensions
+    app.config.setdefault("SQLALCHEMY_ENGINE_OPTIONS", engine_options(app.config))
+    replica_uri = app.config.get("SQLALCHEMY_REPLICA_URI")
+    if replica_uri:
+        binds = dict(app.config.get("SQLALCHEMY_BINDS") or {})
+        binds.setdefault(
+            REPLICA_BIND,
+            {"url": replica_uri, **engine_options(app.config, replica_uri)},
+        )
+        app.config["SQLALCHEMY_BINDS"] = binds
+        app.before_request(route_reads_to_replica)
     db.init_app(app)
+    configure_engine(app)
     CORS(app)
     Migrate(app, db)
+    snapshots.init_app(app)
+    responses.init_app(app)
+    metrics.init_app(app)
 
     # Setup Flask-RESTful API
     from .api import setup_api
@@ -48,6 +66,14 @@ def create_app(config_class=None):
         return make_response({"error": "Internal server error"}, 500)
 
     # CLI commands
+    source_option = click.option(
+        "--source",
+        default="github",
+        show_default=True,
+        help='Read recipes via the GitHub API ("github"), one downloaded '
+        'tarball ("archive"), or a local archive or checkout path',
+    )
+
     @app.cli.command()
     def init_db():
         """Initialize the database."""
@@ -55,13 +81,20 @@ def create_app(config_class=None):
         print("Database tables created.")
 
     @app.cli.command()
-    def load_recipes():
+    @source_option
+    def load_recipes(source):
         """Load recipe data from GitHub."""
         from .github_loader import load_tacofancy_data
+        from .pipeline import PipelineOptions
 
-        print("Loading recipe data from GitHub...")
+        print(f"Loading recipe data from {source}...")
         try:
-            load_tacofancy_data(app.config["GITHUB_TOKEN"], include_contributors=False)
+            load_tacofancy_data(
+                app.config["GITHUB_TOKEN"],
+                include_contributors=False,
+                source=source,
+                options=PipelineOptions.from_config(app.config),
+            )
             print("Successfully loaded recipe data!")
         except Exception as e:
             print(f"Error loading recipes: {e}")
@@ -72,11 +105,15 @@ def create_app(config_class=None):
     def load_contributors(full):
         """Load contributor data from GitHub."""
         from .github_loader import TacoFancyLoader
+        from .pipeline import PipelineOptions
 
         sync_type = "full" if full else "incremental"
         print(f"Loading contributor data from GitHub ({sync_type} sync)...")
         try:
-            loader = TacoFancyLoader(app.config["GITHUB_TOKEN"])
+            loader = TacoFancyLoader(
+                app.config["GITHUB_TOKEN"],
+                options=PipelineOptions.from_config(app.config),
+            )
             loader.load_contributors(incremental=not full)
             print("Successfully loaded contributor data!")
         except Exception as e:
@@ -85,9 +122,16 @@ def create_app(config_class=None):
 
     @app.cli.command()
     @click.option("--full", is_flag=True, help="Do a full sync instead of incremental")
-    def load_all(full):
+    @click.option(
+        "--snapshot",
+        type=click.Path(dir_okay=False),
+        help="Also write a snapshot file for snapshot mode",
+    )
+    @source_option
+    def load_all(full, snapshot, source):
         """Load all data (recipes and contributors) from GitHub."""
         from .github_loader import load_tacofancy_data
+        from .pipeline import PipelineOptions
 
         sync_type = "full" if full else "incremental"
         print(f"Loading all data from GitHub ({sync_type} sync)...")
@@ -96,12 +140,51 @@ def create_app(config_class=None):
                 app.config["GITHUB_TOKEN"],
                 include_contributors=True,
                 incremental=not full,
+                source=source,
+                options=PipelineOptions.from_config(app.config),
             )
             print("Successfully loaded all data!")
         except Exception as e:
             print(f"Error loading data: {e}")
             raise
 
+        if snapshot:
+            from .snapshot_file import write_snapshot_file
+
+            write_snapshot_file(db.session, snapshot)
+            print(f"Snapshot written to {snapshot}")
+
+    @app.cli.command()
+    def reindex_search():
+        """Rebuild the full-text search index from the recipe tables."""
+        from .search import rebuild_index
+
+        rebuild_index(db.session)
+        print("Search index rebuilt.")
+
+    @app.cli.command()
+    @click.option(
+        "--output",
+        type=click.File("w"),
+        default="-",
+        help="File to write to (defaults to stdout)",
+    )
+    def export(output):
+        """Export all data as newline-delimited JSON."""
+        from .export import export_lines
+
+        for line in export_lines(db.session):
+            output.write(line)
+
+    @app.cli.command()
+    @click.argument("path", type=click.Path(dir_okay=False))
+    def write_snapshot(path):
+        """Write all data to a snapshot file for snapshot mode."""
+        from .snapshot_file import write_snapshot_file
+
+        generation = write_snapshot_file(db.session, path)
+        print(f"Snapshot of generation {generation.token} written to {path}")
+
     @app.cli.command()
     def test():
         """Run the test suite."""
@@ -119,6 +202,30 @@ def create_app(config_class=None):
     return app
 
 
+def configure_engine(app):
+    """Apply the configured pragmas to every new SQLite connection.
+
+    A SQLite replica is always opened read-only.
+    """
+
+    def pragma_listener(pragmas):
+        def set_pragmas(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            for pragma in pragmas:
+                cursor.execute(pragma)
+            cursor.close()
+
+        return set_pragmas
+
+    with app.app_context():
+        for bind_key, engine in db.engines.items():
+            if engine.dialect.name != "sqlite":
+                continue
+            read_only = True if bind_key == REPLICA_BIND else None
+            pragmas = sqlite_pragmas(app.config, read_only=read_only)
+            event.listen(engine, "connect", pragma_listener(pragmas))
+
+
 def configure_logging(app):
     """Configure application logging."""
     if app.debug:
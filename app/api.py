@@ -1,76 +1,313 @@
-from flask import request
+import base64
+import binascii
+import hashlib
+import json
+from bisect import bisect_right
+from functools import partial
+from urllib.parse import urlencode
+
+from flask import Response, request, stream_with_context
 from flask_restful import Api, Resource
 
-from .models import MAPPER, Contributor, FullTaco, db
-from .utils import fetch_random, fetch_random_ingredients
+from .changes import changes_since, sync_run_id
+from .export import export_lines
+from .models import INTERNAL_COLUMNS, MAPPER, Contributor, db
+from .responses import (
+    ENCODERS,
+    JSON_MIMETYPE,
+    WithHeaders,
+    cached_response,
+    negotiated_response,
+    representation,
+)
+from .search import search_recipes
+from .snapshot import (
+    SNAPSHOT_TYPES,
+    current_generation,
+    get_snapshot,
+    get_snapshot_file,
+)
+from .utils import (
+    FULL_TACO_COMPONENTS,
+    INGREDIENTS,
+    fetch_contributions,
+    fetch_full_tacos,
+    pick_random,
+    random_ingredients,
+)
+
+# Upper bound on tacos returned by one /random/?count=N request
+MAX_RANDOM_COUNT = 100
+
+# Upper bound on (type, slug) pairs resolved by one /bulk/ request
+MAX_BULK_ITEMS = 100
+
+# Default and maximum number of results per page
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def int_arg(name, default, minimum, maximum=None):
+    """Read an integer query argument, raising ValueError if it is invalid."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}")
+    if value < minimum or (maximum is not None and value > maximum):
+        bounds = f"between {minimum} and {maximum}" if maximum else f">= {minimum}"
+        raise ValueError(f"{name} must be {bounds}")
+    return value
+
+
+def bool_arg(name):
+    """Read a boolean query argument; only ``1``, ``true`` and ``yes`` are true."""
+    return request.args.get(name, "").strip().lower() in ("1", "true", "yes")
+
+
+def encode_cursor(key):
+    """Turn a row key into an opaque ``?after=`` cursor."""
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Recover the row key from a cursor, raising ValueError if it is invalid."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.b64decode(padded, altchars=b"-_", validate=True)
+        return raw.decode("utf-8")
+    except (binascii.Error, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+class ListQuery:
+    """Keyset pagination and field projection arguments for list endpoints.
+
+    ``?limit=`` caps the page size and ``?after=`` takes the cursor of the
+    last row already seen; rows are ordered by ``key``. ``?fields=`` is a
+    comma-separated subset of ``allowed_fields`` to return for each row, in
+    alphabetical order; without any field names every field is returned.
+    Invalid arguments raise ValueError.
+    """
+
+    def __init__(self, key, allowed_fields):
+        self.key = key
+        self.limit = int_arg("limit", None, 1, MAX_PAGE_SIZE)
+
+        after = request.args.get("after")
+        self.after = decode_cursor(after) if after else None
+
+        # Sorted and deduplicated, so equivalent requests share a cache key.
+        # A list with no field names in it, like "?fields=,", projects nothing.
+        fields = request.args.get("fields", "").split(",")
+        self.fields = tuple(sorted({f.strip() for f in fields if f.strip()})) or None
+        unknown = sorted(set(self.fields or ()) - set(allowed_fields))
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+
+    @property
+    def cache_key(self):
+        if self.limit is None and self.after is None and self.fields is None:
+            return ""
+        fields = ",".join(self.fields or ())
+        return f"?limit={self.limit}&after={self.after}&fields={fields}"
+
+    def page(self, rows):
+        """Slice the rows after the cursor, returning (page, next cursor)."""
+        start = 0
+        if self.after is not None:
+            start = bisect_right(rows, self.after, key=lambda row: row[self.key])
+        end = len(rows) if self.limit is None else start + self.limit
+
+        next_cursor = None
+        if end < len(rows):
+            next_cursor = encode_cursor(rows[end - 1][self.key])
+        return rows[start:end], next_cursor
+
+    def project(self, rows):
+        if self.fields is None:
+            return list(rows)
+        return [{field: row[field] for field in self.fields} for row in rows]
+
+    @staticmethod
+    def link_header(next_cursor):
+        """Headers pointing at the next page, if there is one."""
+        if next_cursor is None:
+            return {}
+        args = request.args.to_dict()
+        args["after"] = next_cursor
+        return {"Link": f'<{request.base_url}?{urlencode(args)}>; rel="next"'}
+
+
+def recipe_fields(model, html=False):
+    """Fields of a recipe model that can be requested with ``?fields=``."""
+    fields = [c.name for c in model.__table__.columns if c.name not in INTERNAL_COLUMNS]
+    return fields + ["recipe_html"] if html else fields
+
+
+def with_html(table, item):
+    """Add the rendered recipe HTML to a snapshot row."""
+    return {**item, "recipe_html": table.html_by_url.get(item["url"])}
+
+
+def parse_format():
+    """Return whether ``?format=html`` was requested, or None if invalid."""
+    fmt = request.args.get("format", "markdown")
+    if fmt not in ("markdown", "html"):
+        return None
+    return fmt == "html"
+
+
+def get_recipe_list(recipe_type):
+    """Get all items for a recipe type.
+
+    ``?format=html`` adds the recipe rendered to HTML as ``recipe_html``.
+    Results can be paged and projected as described on ``ListQuery``.
+    """
+    html = parse_format()
+    if html is None:
+        return negotiated_response(
+            {"error": f"Invalid format: {request.args['format']}"}, 400
+        )
+
+    try:
+        query = ListQuery("url", recipe_fields(MAPPER[recipe_type], html))
+    except ValueError as e:
+        return negotiated_response({"error": str(e)}, 400)
+
+    snapshot = get_snapshot()
+    table = snapshot.recipes[recipe_type]
+    rows, next_cursor = query.page(table.items)
+    if html:
+        rows = [with_html(table, item) for item in rows]
+
+    key = recipe_type + query.cache_key
+    if html:
+        key += "&format=html" if query.cache_key else "?format=html"
+    return cached_response(
+        key,
+        lambda s: query.project(rows),
+        snapshot=snapshot,
+        headers=query.link_header(next_cursor),
+        precompress=not query.cache_key,
+    )
 
 
-class RecipeListResource(Resource):
-    """Generic resource for recipe collections."""
+def get_recipe(recipe_type, slug):
+    """Get a single item of a recipe type by slug."""
+    html = parse_format()
+    if html is None:
+        return negotiated_response(
+            {"error": f"Invalid format: {request.args['format']}"}, 400
+        )
+
+    snapshot = get_snapshot()
+    table = snapshot.recipes[recipe_type]
+    item = table.by_slug.get(slug)
+    if not item:
+        return negotiated_response(
+            {
+                "status": "error",
+                "message": f'{recipe_type} with the slug "{slug}" not found',
+            },
+            404,
+        )
+
+    if html:
+        return cached_response(
+            f"{recipe_type}/{slug}?format=html",
+            lambda s: with_html(table, item),
+            snapshot=snapshot,
+        )
+    return cached_response(f"{recipe_type}/{slug}", lambda s: item, snapshot=snapshot)
+
+
+def register_recipe_routes(app):
+    """Route the recipe list and detail URLs straight to view functions.
+
+    These are the busiest endpoints and every response is a pre-encoded
+    ``cached_response``, so they skip Flask-RESTful's per-request Resource
+    instantiation and output handling. Endpoint names match the Resource
+    classes they replaced, e.g. ``baselayerslistresource``.
+    """
+    for recipe_type in MAPPER:
+        name = recipe_type.replace("_", "")
+        app.add_url_rule(
+            f"/{recipe_type}/",
+            f"{name}listresource",
+            partial(get_recipe_list, recipe_type),
+            methods=["GET"],
+        )
+        app.add_url_rule(
+            f"/{recipe_type}/<slug>/",
+            f"{name}resource",
+            partial(get_recipe, recipe_type),
+            methods=["GET"],
+        )
 
-    def __init__(self, recipe_type):
-        self.recipe_type = recipe_type
-        self.model = MAPPER[recipe_type]
 
-    def get(self):
-        """Get all items for this recipe type."""
-        items = self.model.query.all()
-        return [item.as_dict() for item in items]
+class RandomTacoResource(Resource):
+    """Resource for random taco generation."""
 
+    def get(self):
+        """Get a random taco or random ingredients.
 
-class RecipeResource(Resource):
-    """Generic resource for individual recipes."""
+        ``?count=N`` returns a list of N tacos instead of a single one, and
+        ``?unique=true`` draws them without replacement.
+        """
+        full_taco = request.args.get("full-taco")
+        count = request.args.get("count")
+        unique = bool_arg("unique")
 
-    def __init__(self, recipe_type):
-        self.recipe_type = recipe_type
-        self.model = MAPPER[recipe_type]
+        if count is None:
+            tacos = self.random_tacos(full_taco, 1, unique=False)
+            if full_taco and not tacos:
+                return {"error": "No full tacos available"}, 404
+            return tacos[0] if tacos else {}
 
-    def get(self, slug):
-        """Get a single item by slug."""
-        item = self.model.query.filter_by(slug=slug).first()
-        if not item:
-            return {
-                "status": "error",
-                "message": f'{self.recipe_type} with the slug "{slug}" not found',
-            }, 404
-        return item.as_dict()
+        try:
+            count = int_arg("count", 1, 1, MAX_RANDOM_COUNT)
+        except ValueError as e:
+            return {"error": str(e)}, 400
 
+        snapshot = get_snapshot()
+        if unique:
+            # Empty ingredient types are left out of the tacos, not a limit
+            recipe_types = ["full_tacos"] if full_taco else INGREDIENTS.values()
+            counts = [len(snapshot.recipes[t].items) for t in recipe_types]
+            available = min((n for n in counts if n), default=0)
+            if count > available:
+                return {"error": f"Only {available} unique tacos available"}, 400
 
-class RandomTacoResource(Resource):
-    """Resource for random taco generation."""
+        return self.random_tacos(full_taco, count, unique)
 
-    def get(self):
-        """Get a random taco or random ingredients."""
-        full_taco = request.args.get("full-taco")
+    def random_tacos(self, full_taco, count, unique):
+        snapshot = get_snapshot()
 
         if full_taco:
-            taco_obj = fetch_random(FullTaco, db.session)
-            if not taco_obj:
-                return {"error": "No full tacos available"}, 404
+            picks = pick_random(snapshot.recipes["full_tacos"].items, count, unique)
+            snapshot_file = get_snapshot_file()
+            if snapshot_file:
+                return [snapshot_file.full_taco(item) for item in picks]
+            tacos = fetch_full_tacos(db.session, [item["url"] for item in picks])
+            return [self.full_taco(taco) for taco in tacos]
 
-            taco = taco_obj.as_dict()
-
-            # Include related objects
-            if taco.get("condiment_url") and taco_obj.condiment:
-                taco["condiment"] = taco_obj.condiment.as_dict()
-            if taco.get("seasoning_url") and taco_obj.seasoning:
-                taco["seasoning"] = taco_obj.seasoning.as_dict()
-            if taco.get("base_layer_url") and taco_obj.base_layer:
-                taco["base_layer"] = taco_obj.base_layer.as_dict()
-            if taco.get("mixin_url") and taco_obj.mixin:
-                taco["mixin"] = taco_obj.mixin.as_dict()
-            if taco.get("shell_url") and taco_obj.shell:
-                taco["shell"] = taco_obj.shell.as_dict()
-
-            return taco
-        else:
-            # Random ingredients
-            data = fetch_random_ingredients(db.session)
-            taco = {}
-            for k, v in data.items():
-                if v:
-                    taco[k] = v.as_dict()
-            return taco
+        # Random ingredients
+        return random_ingredients(snapshot, count, unique)
+
+    @staticmethod
+    def full_taco(taco_obj):
+        taco = taco_obj.as_dict()
+
+        # Include related objects
+        for name in FULL_TACO_COMPONENTS:
+            component = getattr(taco_obj, name)
+            if taco.get(f"{name}_url") and component:
+                taco[name] = component.as_dict()
+
+        return taco
 
 
 class ContributorListResource(Resource):
@@ -78,8 +315,20 @@ class ContributorListResource(Resource):
 
     def get(self):
         """Get all contributors."""
-        contributors = Contributor.query.all()
-        return [c.as_dict() for c in contributors]
+        try:
+            query = ListQuery("username", [c.name for c in Contributor.__table__.c])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        snapshot = get_snapshot()
+        rows, next_cursor = query.page(snapshot.contributors)
+        return cached_response(
+            "contributions" + query.cache_key,
+            lambda s: query.project(rows),
+            snapshot=snapshot,
+            headers=query.link_header(next_cursor),
+            precompress=not query.cache_key,
+        )
 
 
 class ContributorResource(Resource):
@@ -87,20 +336,25 @@ class ContributorResource(Resource):
 
     def get(self, username):
         """Get contributions for a specific user."""
-        contributor = Contributor.query.filter_by(username=username).first()
-        if not contributor:
+        snapshot = get_snapshot()
+        if username not in snapshot.contributors_by_username:
             return {
                 "error": f'Contributor with github username "{username}" not found'
             }, 404
 
-        data = contributor.as_dict()
-        data["base_layers"] = [b.name for b in contributor.base_layers]
-        data["condiments"] = [c.name for c in contributor.condiments]
-        data["mixins"] = [m.name for m in contributor.mixins]
-        data["shells"] = [s.name for s in contributor.shells]
-        data["seasonings"] = [s.name for s in contributor.seasonings]
-
-        return data
+        snapshot_file = get_snapshot_file()
+        return cached_response(
+            f"contributions/{username}",
+            lambda s: {
+                **s.contributors_by_username[username],
+                **(
+                    snapshot_file.contributions(username)
+                    if snapshot_file
+                    else fetch_contributions(db.session, username)
+                ),
+            },
+            snapshot=snapshot,
+        )
 
 
 class RecipeSlugsResource(Resource):
@@ -111,9 +365,23 @@ class RecipeSlugsResource(Resource):
         if layer_type not in MAPPER:
             return {"error": f"Invalid layer type: {layer_type}"}, 404
 
-        model = MAPPER[layer_type]
-        slugs = [{"name": item.name, "slug": item.slug} for item in model.query.all()]
-        return slugs
+        try:
+            query = ListQuery("url", ["name", "slug"])
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        key = f"contributors/{layer_type}" + query.cache_key
+        precompress = not query.cache_key
+        query.fields = query.fields or ("name", "slug")
+
+        snapshot = get_snapshot()
+        rows, next_cursor = query.page(snapshot.recipes[layer_type].items)
+        return cached_response(
+            key,
+            lambda s: query.project(rows),
+            snapshot=snapshot,
+            headers=query.link_header(next_cursor),
+            precompress=precompress,
+        )
 
 
 class RecipeContributorsResource(Resource):
@@ -124,87 +392,241 @@ class RecipeContributorsResource(Resource):
         if recipe_type not in MAPPER:
             return {"error": f"Invalid recipe type: {recipe_type}"}, 404
 
-        model = MAPPER[recipe_type]
-        recipe = model.query.filter_by(slug=recipe_slug).first()
+        snapshot = get_snapshot()
+        recipe = snapshot.recipes[recipe_type].by_slug.get(recipe_slug)
         if not recipe:
             return {"error": f"Recipe not found: {recipe_type}/{recipe_slug}"}, 404
 
-        return [c.as_dict() for c in recipe.contributors]
-
-
-# Create specific resource classes for each recipe type
-class BaseLayersListResource(RecipeListResource):
-    def __init__(self):
-        super().__init__("base_layers")
-
-
-class BaseLayersResource(RecipeResource):
-    def __init__(self):
-        super().__init__("base_layers")
-
-
-class CondimentsListResource(RecipeListResource):
-    def __init__(self):
-        super().__init__("condiments")
+        return cached_response(
+            f"contributors/{recipe_type}/{recipe_slug}",
+            lambda s: self.contributors(recipe_type, recipe["url"]),
+            snapshot=snapshot,
+        )
 
+    @staticmethod
+    def contributors(recipe_type, url):
+        """The recipe's contributors, ordered by username."""
+        snapshot_file = get_snapshot_file()
+        if snapshot_file:
+            return snapshot_file.recipe_contributors({recipe_type: [url]}).get(url, [])
+        recipe = db.session.get(MAPPER[recipe_type], url)
+        return [
+            c.as_dict() for c in sorted(recipe.contributors, key=lambda c: c.username)
+        ]
 
-class CondimentsResource(RecipeResource):
-    def __init__(self):
-        super().__init__("condiments")
 
+class BulkRecipeResource(Resource):
+    """Resource resolving many recipes of any type in one request."""
 
-class MixinsListResource(RecipeListResource):
-    def __init__(self):
-        super().__init__("mixins")
-
+    def get(self):
+        """Resolve ``?items=type:slug,type:slug`` pairs."""
+        pairs = []
+        for item in request.args.get("items", "").split(","):
+            if item.strip():
+                recipe_type, _, slug = item.strip().partition(":")
+                pairs.append((recipe_type, slug))
+        return self.resolve(pairs)
+
+    def post(self):
+        """Resolve a ``{"items": [{"type": ..., "slug": ...}]}`` body."""
+        body = request.get_json(silent=True)
+        items = body.get("items") if isinstance(body, dict) else None
+        if not isinstance(items, list) or not all(
+            isinstance(item, dict) for item in items
+        ):
+            return {"error": 'Expected a JSON body like {"items": [...]}'}, 400
+
+        pairs = []
+        for index, item in enumerate(items):
+            recipe_type, slug = item.get("type"), item.get("slug")
+            if not isinstance(recipe_type, str) or not isinstance(slug, str):
+                return {
+                    "error": f"Item {index} needs a string type and slug",
+                    "index": index,
+                }, 400
+            pairs.append((recipe_type, slug))
+        return self.resolve(pairs)
+
+    @staticmethod
+    def resolve(pairs):
+        """Look every pair up in the snapshot.
+
+        The result maps each type to its slugs, with ``null`` for recipes that
+        were not found.
+        """
+        if not pairs:
+            return {"error": "No items requested"}, 400
+        if len(pairs) > MAX_BULK_ITEMS:
+            return {"error": f"At most {MAX_BULK_ITEMS} items per request"}, 400
+
+        invalid = sorted({str(t) for t, _ in pairs if t not in MAPPER})
+        if invalid:
+            return {"error": f"Invalid recipe type: {', '.join(invalid)}"}, 400
+
+        # GET and POST requests for the same pairs share a cached payload
+        digest = hashlib.sha1(json.dumps(pairs).encode("utf-8")).hexdigest()
+        return cached_response(
+            f"bulk?{digest}",
+            lambda s: BulkRecipeResource.lookup(s, pairs),
+            precompress=False,
+        )
+
+    @staticmethod
+    def lookup(snapshot, pairs):
+        results = {}
+        for recipe_type, slug in pairs:
+            item = snapshot.recipes[recipe_type].by_slug.get(slug)
+            results.setdefault(recipe_type, {})[slug] = item
+        return results
+
+
+class SearchResource(Resource):
+    """Resource for full-text recipe search."""
 
-class MixinsResource(RecipeResource):
-    def __init__(self):
-        super().__init__("mixins")
+    def get(self):
+        """Search recipes of every type, best matches first.
+
+        ``?type=`` limits results to one recipe type; ``?limit=`` and
+        ``?offset=`` page through them.
+        """
+        query = request.args.get("q", "").strip()
+        if not query:
+            return {"error": "Missing search query: q"}, 400
+
+        recipe_type = request.args.get("type")
+        if recipe_type and recipe_type not in SNAPSHOT_TYPES:
+            return {"error": f"Invalid recipe type: {recipe_type}"}, 400
+
+        try:
+            limit = int_arg("limit", PAGE_SIZE, 1, MAX_PAGE_SIZE)
+            offset = int_arg("offset", 0, 0)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+
+        return cached_response(
+            f"search?{urlencode([('q', query), ('type', recipe_type or '')])}"
+            f"&limit={limit}&offset={offset}",
+            lambda s: self.search(query, recipe_type, limit, offset),
+            precompress=False,
+        )
+
+    @staticmethod
+    def search(query, recipe_type, limit, offset):
+        # Fetch one extra row to learn whether there is another page
+        snapshot_file = get_snapshot_file()
+        if snapshot_file:
+            results = snapshot_file.search(query, recipe_type, limit + 1, offset)
+        else:
+            results = search_recipes(db.session, query, recipe_type, limit + 1, offset)
+        return {
+            "query": query,
+            "results": results[:limit],
+            "next_offset": offset + limit if len(results) > limit else None,
+        }
 
 
-class SeasoningsListResource(RecipeListResource):
-    def __init__(self):
-        super().__init__("seasonings")
+class ExportResource(Resource):
+    """Resource streaming the whole dataset as newline-delimited JSON."""
 
+    def get(self):
+        """Stream every recipe, contributor and contribution.
+
+        The ETag tracks the sync generation, so mirrors can send
+        If-None-Match and skip exports of unchanged data.
+        """
+        snapshot_file = get_snapshot_file()
+        if snapshot_file:
+            generation = snapshot_file.generation
+            lines = snapshot_file.export_lines()
+        else:
+            generation = current_generation(db.session)
+            lines = export_lines(db.session, generation)
 
-class SeasoningsResource(RecipeResource):
-    def __init__(self):
-        super().__init__("seasonings")
+        etag = f"export-{generation.token}"
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
 
+        response = Response(
+            stream_with_context(lines),
+            mimetype="application/x-ndjson",
+        )
+        response.set_etag(etag)
+        if generation.last_modified:
+            response.last_modified = generation.last_modified
+        return response
 
-class ShellsListResource(RecipeListResource):
-    def __init__(self):
-        super().__init__("shells")
 
+class ChangesResource(Resource):
+    """Resource listing recipe changes made by syncs."""
 
-class ShellsResource(RecipeResource):
-    def __init__(self):
-        super().__init__("shells")
+    def get(self):
+        """Return the net changes since the sync of commit ``?since=``.
+
+        Responses carry ``latest``, the commit to pass as ``since`` next
+        time. An unknown commit gets a 404, and the client should fall back
+        to a full ``/export/``. Changes are paged with ``?limit=`` and
+        ``?after=`` like the list endpoints, ``MAX_PAGE_SIZE`` at a time
+        unless a smaller limit is given.
+        """
+        if get_snapshot_file():
+            return {"error": "The change feed is not available in snapshot mode"}, 404
+
+        try:
+            query = ListQuery("id", ())
+            after = None
+            if query.after is not None:
+                if not query.after.isdigit():
+                    raise ValueError(f"Invalid cursor: {request.args['after']}")
+                after = int(query.after)
+        except ValueError as e:
+            return {"error": str(e)}, 400
+        limit = query.limit or MAX_PAGE_SIZE
+
+        since = request.args.get("since") or None
+        if since and sync_run_id(db.session, since) is None:
+            return {"error": f"Unknown sync commit: {since}"}, 404
+
+        def build(snapshot):
+            changes, next_after = changes_since(db.session, since, limit, after)
+            cursor = None if next_after is None else encode_cursor(str(next_after))
+            return WithHeaders(changes, query.link_header(cursor))
+
+        return cached_response(
+            f"changes?{urlencode([('since', since or '')])}"
+            f"&limit={limit}&after={after}",
+            build,
+            precompress=False,
+        )
 
 
 def setup_api(app):
     """Setup Flask-RESTful API with all routes."""
     api = Api(app)
 
+    # MessagePack/CBOR for uncached responses; JSON stays the default
+    for mimetype in ENCODERS:
+        if mimetype != JSON_MIMETYPE:
+            api.representation(mimetype)(representation(mimetype))
+
     # Random taco endpoint
     api.add_resource(RandomTacoResource, "/random/")
 
     # Recipe endpoints
-    api.add_resource(BaseLayersListResource, "/base_layers/")
-    api.add_resource(BaseLayersResource, "/base_layers/<slug>/")
+    register_recipe_routes(app)
 
-    api.add_resource(CondimentsListResource, "/condiments/")
-    api.add_resource(CondimentsResource, "/condiments/<slug>/")
+    # Bulk lookup endpoint
+    api.add_resource(BulkRecipeResource, "/bulk/")
 
-    api.add_resource(MixinsListResource, "/mixins/")
-    api.add_resource(MixinsResource, "/mixins/<slug>/")
+    # Export endpoint
+    api.add_resource(ExportResource, "/export/")
 
-    api.add_resource(SeasoningsListResource, "/seasonings/")
-    api.add_resource(SeasoningsResource, "/seasonings/<slug>/")
+    # Change feed endpoint
+    api.add_resource(ChangesResource, "/changes/")
 
-    api.add_resource(ShellsListResource, "/shells/")
-    api.add_resource(ShellsResource, "/shells/<slug>/")
+    # Search endpoint
+    api.add_resource(SearchResource, "/search/")
 
     # Contributor endpoints
     api.add_resource(ContributorListResource, "/contributions/")
@@ -0,0 +1,170 @@
+"""Batched upserts for the loader.
+
+``BulkWriter`` collects rows per table and writes them with one
+``INSERT ... ON CONFLICT`` statement per table and batch, instead of a
+session lookup and an ORM flush per row. Rows are keyed by the table's
+primary key, or its first unique index for association tables, so a row
+queued twice in a batch is written once.
+
+SQLite and PostgreSQL are supported. With ``copy`` set, PostgreSQL batches
+are streamed with ``COPY`` into a temporary staging table and upserted
+from there, which is faster for the large batches of a full sync.
+"""
+
+import io
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Table, column, select, table
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def conflict_columns(target: Table) -> Tuple[str, ...]:
+    """The columns rows of a table are deduplicated and upserted on."""
+    if target.primary_key.columns:
+        return tuple(c.name for c in target.primary_key.columns)
+    for index in sorted(target.indexes, key=lambda index: index.name):
+        if index.unique:
+            return tuple(c.name for c in index.columns)
+    raise ValueError(f"{target.name} has no primary key or unique index")
+
+
+def copy_text(rows: List[dict], columns: List[str]) -> io.StringIO:
+    """Rows in PostgreSQL's COPY text format."""
+
+    def value(v):
+        if v is None:
+            return "\\N"
+        return (
+            str(v)
+            .replace("\\", "\\\\")
+            .replace("\t", "\\t")
+            .replace("\n", "\\n")
+            .replace("\r", "\\r")
+        )
+
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write("\t".join(value(row.get(c)) for c in columns) + "\n")
+    buffer.seek(0)
+    return buffer
+
+
+class _Pending:
+    """Rows queued for one table, keyed by their conflict columns."""
+
+    def __init__(self, target: Table, update: bool):
+        self.table = target
+        self.update = update
+        self.key = conflict_columns(target)
+        self.rows: Dict[tuple, dict] = {}
+        self.written = 0
+        self.batches = 0
+
+
+class BulkWriter:
+    """Collects rows and writes them in batches of ``batch_size``.
+
+    ``upsert`` replaces the queued columns of an existing row, ``insert``
+    leaves existing rows alone. Every table is written whenever one of
+    them fills a batch, in the order the tables were first queued, so
+    queue rows before the rows that reference them.
+    """
+
+    def __init__(self, session: Session, batch_size: int = 100, copy: bool = False):
+        self.session = session
+        self.batch_size = max(1, batch_size)
+        self.dialect = session.get_bind().dialect.name
+        if self.dialect not in INSERTS:
+            raise ValueError(f"Bulk upserts are not supported on {self.dialect}")
+        self.copy = copy and self.dialect == "postgresql"
+        self._pending: Dict[Tuple[str, bool], _Pending] = {}
+
+    def upsert(self, target: Table, row: dict):
+        self._queue(target, row, update=True)
+
+    def insert(self, target: Table, row: dict):
+        self._queue(target, row, update=False)
+
+    def _queue(self, target: Table, row: dict, update: bool):
+        pending = self._pending.get((target.name, update))
+        if pending is None:
+            pending = self._pending[(target.name, update)] = _Pending(target, update)
+        key = tuple(row[c] for c in pending.key)
+        if update or key not in pending.rows:
+            pending.rows[key] = {**pending.rows.get(key, {}), **row}
+        if len(pending.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write every queued row."""
+        for pending in self._pending.values():
+            if not pending.rows:
+                continue
+            rows = list(pending.rows.values())
+            pending.rows.clear()
+            # Rows with different columns need their own statement
+            by_columns: Dict[tuple, List[dict]] = {}
+            for row in rows:
+                by_columns.setdefault(tuple(sorted(row)), []).append(row)
+            for columns, group in by_columns.items():
+                if self.copy:
+                    self._copy(pending, list(columns), group)
+                else:
+                    self._execute(pending, list(columns), group)
+            pending.written += len(rows)
+            pending.batches += 1
+
+    def _statement(self, pending: _Pending, columns: List[str], stmt=None):
+        stmt = stmt if stmt is not None else INSERTS[self.dialect](pending.table)
+        updates = [c for c in columns if c not in pending.key]
+        if pending.update and updates:
+            return stmt.on_conflict_do_update(
+                index_elements=list(pending.key),
+                set_={c: stmt.excluded[c] for c in updates},
+            )
+        return stmt.on_conflict_do_nothing(index_elements=list(pending.key))
+
+    def _execute(self, pending: _Pending, columns: List[str], rows: List[dict]):
+        self.session.execute(self._statement(pending, columns), rows)
+
+    def _copy(self, pending: _Pending, columns: List[str], rows: List[dict]):
+        staging = f"staging_{pending.table.name}"
+        quote = self.session.get_bind().dialect.identifier_preparer.quote
+        names = ", ".join(quote(c) for c in columns)
+
+        cursor = self.session.connection().connection.driver_connection.cursor()
+        try:
+            cursor.execute(
+                f"CREATE TEMP TABLE IF NOT EXISTS {quote(staging)} "
+                f"(LIKE {quote(pending.table.name)} INCLUDING DEFAULTS) "
+                "ON COMMIT DROP"
+            )
+            cursor.execute(f"TRUNCATE {quote(staging)}")
+            cursor.copy_expert(
+                f"COPY {quote(staging)} ({names}) FROM STDIN",
+                copy_text(rows, columns),
+            )
+        finally:
+            cursor.close()
+
+        source = table(staging, *[column(c) for c in columns])
+        stmt = postgresql.insert(pending.table).from_select(columns, select(source))
+        self.session.execute(self._statement(pending, columns, stmt))
+
+    def log_summary(self, label: Optional[str] = None):
+        """Log the rows and batches written per table."""
+        for pending in self._pending.values():
+            if pending.written:
+                batches = "batch" if pending.batches == 1 else "batches"
+                logger.info(
+                    f"{label + ': ' if label else ''}wrote {pending.written} "
+                    f"{pending.table.name} rows in {pending.batches} {batches} "
+                    f"(batch size {self.batch_size}"
+                    f"{', COPY' if self.copy else ''})"
+                )
@@ -0,0 +1,111 @@
+"""Change feed of recipes created, updated and deleted by each sync.
+
+Every run of the loader is recorded as a ``SyncRun`` for the upstream
+commit it synced, with a ``ChangeEvent`` per recipe it touched. Clients
+that remember the commit SHA of their last fetch ask for the events since
+then instead of downloading the whole dataset again.
+"""
+
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .models import ChangeEvent, SyncRun
+from .snapshot import SNAPSHOT_TYPES
+
+
+def latest_sync(session: Session) -> Optional[SyncRun]:
+    """The most recent sync run, if any."""
+    return session.scalars(select(SyncRun).order_by(SyncRun.id.desc()).limit(1)).first()
+
+
+def sync_run_id(session: Session, commit_sha: str) -> Optional[int]:
+    """The id of the latest sync run for a commit, or None if there was none."""
+    return session.scalar(
+        select(SyncRun.id)
+        .where(SyncRun.commit_sha == commit_sha)
+        .order_by(SyncRun.id.desc())
+        .limit(1)
+    )
+
+
+def _collapse(events: List[ChangeEvent]) -> Dict[Tuple[str, str], ChangeEvent]:
+    """Reduce events to the net change per recipe, in order of last change.
+
+    A recipe created and later updated is still new to the client; one
+    created and deleted within the window is dropped altogether.
+    """
+    net: Dict[Tuple[str, str], Tuple[str, ChangeEvent]] = {}
+    for event in events:
+        key = (event.recipe_type, event.url)
+        previous = net.pop(key, None)
+        action = event.action
+        if previous and previous[0] == "created":
+            if action == "deleted":
+                continue
+            action = "created"
+        net[key] = (action, event)
+    return net
+
+
+def changes_since(
+    session: Session,
+    since: Optional[str] = None,
+    limit: Optional[int] = None,
+    after: Optional[int] = None,
+) -> Optional[Tuple[dict, Optional[int]]]:
+    """Return a page of the net recipe changes after the sync of commit ``since``.
+
+    Without ``since`` every recorded change is included. Changes are ordered
+    by their last event; ``limit`` caps the page and ``after`` is the cursor
+    of the previous page. Returns the page and the cursor of the next one,
+    or None when there are no more, or None altogether when ``since`` is not
+    a commit any sync was run for.
+    """
+    stmt = select(ChangeEvent).join(ChangeEvent.sync_run).order_by(ChangeEvent.id)
+    if since:
+        run_id = sync_run_id(session, since)
+        if run_id is None:
+            return None
+        stmt = stmt.where(ChangeEvent.sync_run_id > run_id)
+
+    net = list(_collapse(session.scalars(stmt).all()).items())
+    if after is not None:
+        net = [
+            (key, (action, event)) for key, (action, event) in net if event.id > after
+        ]
+    next_after = None
+    if limit is not None and len(net) > limit:
+        net = net[:limit]
+        _, (_, last_event) = net[-1]
+        next_after = last_event.id
+
+    # Load the current rows of everything that still exists, one query per type
+    urls_by_type: Dict[str, List[str]] = {}
+    for (recipe_type, url), (action, _) in net:
+        if action != "deleted":
+            urls_by_type.setdefault(recipe_type, []).append(url)
+    current = {}
+    for recipe_type, urls in urls_by_type.items():
+        model = SNAPSHOT_TYPES[recipe_type]
+        for row in session.scalars(select(model).where(model.url.in_(urls))):
+            current[(recipe_type, row.url)] = row.as_dict()
+
+    latest = latest_sync(session)
+    page = {
+        "since": since,
+        "latest": latest.commit_sha if latest else None,
+        "changes": [
+            {
+                "action": action,
+                "recipe_type": event.recipe_type,
+                "url": event.url,
+                "slug": event.slug,
+                "commit_sha": event.sync_run.commit_sha,
+                "recipe": current.get(key) if action != "deleted" else None,
+            }
+            for key, (action, event) in net
+        ],
+    }
+    return page, next_after
@@ -1,4 +1,14 @@
 import os
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+
+def env_flag(name: str, default: bool) -> bool:
+    """Read a boolean environment variable such as ``true``/``0``."""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
 
 
 class Config:
@@ -6,11 +16,63 @@ class Config:
 
     SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///tacos.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Optional read replica that GET requests read from; syncs use the primary
+    SQLALCHEMY_REPLICA_URI = os.environ.get("DATABASE_REPLICA_URL")
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
 
+    # Connection pool and timeouts for server databases such as PostgreSQL
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 5))
+    DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", 10))
+    DB_POOL_TIMEOUT = int(os.environ.get("DB_POOL_TIMEOUT", 30))
+    DB_POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", 1800))
+    DB_POOL_PRE_PING = env_flag("DB_POOL_PRE_PING", True)
+    # Milliseconds before PostgreSQL cancels a statement; 0 disables it
+    DB_STATEMENT_TIMEOUT = int(os.environ.get("DB_STATEMENT_TIMEOUT", 30000))
+
+    # Pragmas set on every SQLite connection
+    SQLITE_JOURNAL_MODE = os.environ.get("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS = os.environ.get("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    # Pages, or KiB when negative, as in SQLite's cache_size pragma
+    SQLITE_CACHE_SIZE = int(os.environ.get("SQLITE_CACHE_SIZE", -64000))
+    SQLITE_BUSY_TIMEOUT = int(os.environ.get("SQLITE_BUSY_TIMEOUT", 5000))
+    # Refuse writes, for app servers reading a database synced elsewhere
+    SQLITE_READ_ONLY = env_flag("SQLITE_READ_ONLY", False)
+
     # GitHub API
     GITHUB_TOKEN = os.environ.get("GITHUB_TOKEN")
 
+    # Recipe sync pipeline: concurrent file fetches, throttled to a request
+    # rate, optional parser processes (0 parses in the fetch threads), files
+    # in flight at once, and rows per bulk upsert during syncs
+    SYNC_FETCH_WORKERS = int(os.environ.get("SYNC_FETCH_WORKERS", 8))
+    SYNC_REQUESTS_PER_SECOND = float(os.environ.get("SYNC_REQUESTS_PER_SECOND", 10))
+    SYNC_PARSE_WORKERS = int(os.environ.get("SYNC_PARSE_WORKERS", 0))
+    SYNC_QUEUE_SIZE = int(os.environ.get("SYNC_QUEUE_SIZE", 64))
+    SYNC_BATCH_SIZE = int(os.environ.get("SYNC_BATCH_SIZE", 100))
+
+    # Seconds between checks for a newer sync before reusing the recipe snapshot
+    SNAPSHOT_CHECK_INTERVAL = int(os.environ.get("SNAPSHOT_CHECK_INTERVAL", 30))
+    # Build the snapshot when the app starts, and rebuild it after a sync in a
+    # background thread while requests keep reading the previous one
+    SNAPSHOT_PRELOAD = env_flag("SNAPSHOT_PRELOAD", True)
+    SNAPSHOT_BACKGROUND_REBUILD = env_flag("SNAPSHOT_BACKGROUND_REBUILD", True)
+
+    # Serve from this snapshot file instead of the database (snapshot mode)
+    SNAPSHOT_FILE = os.environ.get("SNAPSHOT_FILE")
+
+    # Number of encoded API responses kept in memory per sync generation
+    RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 4096))
+
+    # Request metrics at /metrics, only for scrapers sending METRICS_TOKEN as a
+    # bearer token when it is set, and per-response Server-Timing headers
+    METRICS_ENABLED = env_flag("METRICS_ENABLED", False)
+    METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+    SERVER_TIMING = env_flag("SERVER_TIMING", False)
+
+    # Number of rendered permalink pages kept in memory
+    PERMALINK_CACHE_SIZE = int(os.environ.get("PERMALINK_CACHE_SIZE", 1024))
+
 
 class TestingConfig(Config):
     """Testing configuration."""
@@ -18,3 +80,58 @@ class TestingConfig(Config):
     TESTING = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
     GITHUB_TOKEN = None
+    SNAPSHOT_CHECK_INTERVAL = 0
+    SNAPSHOT_PRELOAD = False
+    SNAPSHOT_BACKGROUND_REBUILD = False
+    SNAPSHOT_FILE = None
+    METRICS_ENABLED = True
+    METRICS_TOKEN = None
+
+
+def is_sqlite(uri: str) -> bool:
+    return urlparse(uri).scheme.split("+")[0] == "sqlite"
+
+
+def engine_options(config, uri: Optional[str] = None) -> Dict[str, Any]:
+    """SQLAlchemy engine options for a database, the primary by default.
+
+    SQLite is tuned with connection pragmas instead (see ``sqlite_pragmas``),
+    so it only gets the options SQLAlchemy's SQLite pools accept.
+    """
+    uri = uri or config["SQLALCHEMY_DATABASE_URI"]
+    if is_sqlite(uri):
+        return {}
+
+    options: Dict[str, Any] = {
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+    scheme = urlparse(uri).scheme.split("+")[0]
+    if scheme in ("postgresql", "postgres") and config["DB_STATEMENT_TIMEOUT"]:
+        timeout = config["DB_STATEMENT_TIMEOUT"]
+        options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def sqlite_pragmas(config, read_only: Optional[bool] = None) -> List[str]:
+    """PRAGMA statements to run on each new SQLite connection.
+
+    ``read_only`` overrides ``SQLITE_READ_ONLY``, e.g. for a replica.
+    """
+    if read_only is None:
+        read_only = config["SQLITE_READ_ONLY"]
+    pragmas = [
+        f"PRAGMA busy_timeout = {config['SQLITE_BUSY_TIMEOUT']}",
+        f"PRAGMA cache_size = {config['SQLITE_CACHE_SIZE']}",
+        f"PRAGMA mmap_size = {config['SQLITE_MMAP_SIZE']}",
+    ]
+    if read_only:
+        # Changing the journal mode is a write, so leave it to the writer
+        pragmas.append("PRAGMA query_only = ON")
+    else:
+        pragmas.append(f"PRAGMA journal_mode = {config['SQLITE_JOURNAL_MODE']}")
+        pragmas.append(f"PRAGMA synchronous = {config['SQLITE_SYNCHRONOUS']}")
+    return pragmas
@@ -0,0 +1,92 @@
+"""Newline-delimited JSON export of the whole dataset.
+
+Rows are read with ``yield_per`` (a server-side cursor on PostgreSQL) as
+plain column tuples, so memory use stays flat however large the tables
+are.
+"""
+
+import json
+from typing import Iterable, Iterator, Optional
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .changes import latest_sync
+from .models import INTERNAL_COLUMNS, Contributor, SyncMetadata
+from .snapshot import SNAPSHOT_TYPES, Generation, current_generation
+from .utils import CONTRIBUTION_TABLES
+
+# Rows fetched from the database per round trip
+EXPORT_BATCH_SIZE = 1000
+
+
+def _stream(session: Session, stmt):
+    result = session.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+    for row in result:
+        yield row._asdict()
+
+
+def export_header(session: Session, generation: Generation) -> dict:
+    """The first export record, identifying the synced data it contains."""
+    syncs = session.execute(
+        select(
+            SyncMetadata.sync_type,
+            SyncMetadata.last_commit_sha,
+            SyncMetadata.last_sync_time,
+        ).order_by(SyncMetadata.sync_type)
+    ).all()
+    latest = latest_sync(session)
+    return {
+        "kind": "export",
+        "generation": generation.token,
+        # Pass as /changes/?since= to follow updates after this export
+        "changes_since": latest.commit_sha if latest else None,
+        "syncs": {
+            sync_type: {
+                "commit_sha": commit_sha,
+                "synced_at": sync_time.isoformat() if sync_time else None,
+            }
+            for sync_type, commit_sha, sync_time in syncs
+        },
+    }
+
+
+def export_records(
+    session: Session, generation: Generation, extra_columns: Iterable[str] = ()
+) -> Iterator[dict]:
+    """Yield every recipe, contributor and contribution edge.
+
+    Recipes have the fields the API returns; ``extra_columns`` adds
+    internal columns such as ``recipe_html``.
+    """
+    yield export_header(session, generation)
+
+    for recipe_type, model in SNAPSHOT_TYPES.items():
+        columns = [
+            c
+            for c in model.__table__.c
+            if c.name not in INTERNAL_COLUMNS or c.name in extra_columns
+        ]
+        stmt = select(*columns).order_by(model.url)
+        for row in _stream(session, stmt):
+            yield {"kind": "recipe", "recipe_type": recipe_type, **row}
+
+    stmt = select(*Contributor.__table__.c).order_by(Contributor.username)
+    for row in _stream(session, stmt):
+        yield {"kind": "contributor", **row}
+
+    for category, (table, _, url_column) in CONTRIBUTION_TABLES.items():
+        stmt = select(
+            table.c.contrib_username.label("username"), url_column.label("url")
+        ).order_by(table.c.contrib_username, url_column)
+        for row in _stream(session, stmt):
+            yield {"kind": "contribution", "category": category, **row}
+
+
+def export_lines(
+    session: Session, generation: Optional[Generation] = None
+) -> Iterator[str]:
+    """Yield the export as newline-terminated JSON lines."""
+    generation = generation or current_generation(session)
+    for record in export_records(session, generation):
+        yield json.dumps(record) + "\n"
@@ -1,25 +1,28 @@
+import hashlib
 import logging
 import os
-from typing import Dict, List, Optional
+from types import SimpleNamespace
+from typing import Any, Dict, List, NamedTuple, Optional
 from urllib.parse import urlparse
 
 import markdown2 as md
 from bs4 import BeautifulSoup
-from github import Github, GithubException
+from github import Consts, Github, GithubException
 
+from . import search
+from .bulk import BulkWriter
 from .models import (
     MAPPER,
-    BaseLayer,
-    Condiment,
+    ChangeEvent,
     Contributor,
     FullTaco,
-    Mixin,
-    Seasoning,
-    Shell,
     SyncMetadata,
+    SyncRun,
     db,
 )
-from .utils import slugify
+from .pipeline import PipelineOptions, Throttle, run_pipeline
+from .sources import GitHubArchiveSource, GitHubSource, local_source
+from .utils import CONTRIBUTION_TABLES, INGREDIENTS, render_markdown, slugify
 
 logger = logging.getLogger(__name__)
 
@@ -27,16 +30,99 @@ REPO_OWNER = "dansinker"
 REPO_NAME = "tacofancy"
 BRANCH = "master"
 
+# Every recipe category, ingredients first so full tacos can link to them
+RECIPE_MODELS = {**MAPPER, "full_tacos": FullTaco}
+
+
+def recipe_url(file_path: str) -> str:
+    """The raw content URL recipes are keyed by."""
+    return (
+        f"https://raw.githubusercontent.com/{REPO_OWNER}/"
+        f"{REPO_NAME}/{BRANCH}/{file_path}"
+    )
+
+
+def content_hash(content: str) -> str:
+    """Hash of a recipe file's markdown, used to skip unchanged rows."""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def parse_recipe(content: str, file_path: str) -> Dict[str, str]:
+    """Extract recipe data from markdown content."""
+    # Convert markdown to HTML and parse
+    html = md.markdown(content)
+    soup = BeautifulSoup(html, "html.parser")
+
+    # Try to get name from first H1, otherwise derive from filename
+    name_element = soup.find("h1")
+    if name_element:
+        name = name_element.get_text().strip()
+    else:
+        # Derive name from filename
+        filename = os.path.basename(file_path)
+        name = filename.replace(".md", "").replace("_", " ").title()
+
+    return {
+        "name": name,
+        "slug": slugify(name),
+        "recipe": content,
+        "recipe_html": render_markdown(content),
+        "url": recipe_url(file_path),
+    }
+
+
+class RecipeFile(NamedTuple):
+    """A recipe file to fetch, and the content hash of its stored row."""
+
+    category: str
+    path: str
+    blob_sha: str
+    stored_hash: Optional[str]
+
+
+def parse_recipe_file(job: RecipeFile, content: str) -> Dict[str, str]:
+    """Hash a fetched file, and parse it unless it matches the stored row."""
+    data = {"content_hash": content_hash(content), "blob_sha": job.blob_sha}
+    if data["content_hash"] != job.stored_hash:
+        data.update(parse_recipe(content, job.path))
+    return data
+
 
 class TacoFancyLoader:
-    def __init__(self, github_token: Optional[str] = None):
-        """Initialize the loader with optional GitHub token for rate limiting."""
-        if github_token:
-            self.github = Github(github_token)
-        else:
-            self.github = Github()  # Anonymous access (lower rate limits)
+    def __init__(
+        self,
+        github_token: Optional[str] = None,
+        source: Optional[str] = None,
+        options: Optional[PipelineOptions] = None,
+        api_url: str = Consts.DEFAULT_BASE_URL,
+    ):
+        """Initialize the loader with optional GitHub token for rate limiting.
+
+        Recipes are read through the GitHub API by default. A source of
+        "archive" downloads the repository tarball instead, and a local
+        archive or checkout path syncs offline, without contributors.
+        """
+        self.options = options or PipelineOptions()
+        self.repo = None
+        if source in (None, "github", "archive"):
+            self.github = Github(
+                github_token,  # Anonymous access without one (lower rate limits)
+                base_url=api_url,
+                pool_size=self.options.fetch_workers,
+                # The sync pipeline throttles requests across its threads
+                seconds_between_requests=None,
+            )
 
-        self.repo = self.github.get_repo(f"{REPO_OWNER}/{REPO_NAME}")
+            self.repo = self.github.get_repo(f"{REPO_OWNER}/{REPO_NAME}")
+            if source == "archive":
+                self.source = GitHubArchiveSource(self.repo, BRANCH)
+            else:
+                self.source = GitHubSource(self.repo, BRANCH, self.github)
+        else:
+            self.source = local_source(source)
+        self.sync_run: Optional[SyncRun] = None
+        self.tree: Optional[Dict[str, Dict[str, str]]] = None
+        self.failed_files: List[str] = []
 
     def get_last_sync_sha(self, sync_type: str) -> Optional[str]:
         """Get the last processed commit SHA for a given sync type."""
@@ -58,33 +144,33 @@ class TacoFancyLoader:
             db.session.add(sync_record)
         db.session.commit()
 
-    def get_recipe_files_by_category(self) -> Dict[str, List[str]]:
-        """Get all recipe files organized by category."""
+    def get_recipe_tree(self, ref: str = BRANCH) -> Dict[str, Dict[str, str]]:
+        """Get the blob SHA of every recipe file, organized by category."""
         try:
             # Get the repository tree
-            tree = self.repo.get_git_tree(BRANCH, recursive=True)
+            files = self.source.list_files(ref)
 
             categories = {
-                "base_layers": [],
-                "condiments": [],
-                "mixins": [],
-                "seasonings": [],
-                "shells": [],
-                "full_tacos": [],
+                "base_layers": {},
+                "condiments": {},
+                "mixins": {},
+                "seasonings": {},
+                "shells": {},
+                "full_tacos": {},
             }
 
-            for item in tree.tree:
-                if item.type == "blob" and item.path.endswith(".md"):
+            for path, blob_sha in files.items():
+                if path.endswith(".md"):
                     # Skip index and readme files
-                    if item.path.lower() in ["index.md", "readme.md"]:
+                    if path.lower() in ["index.md", "readme.md"]:
                         continue
 
                     # Categorize by directory
-                    path_parts = item.path.split("/")
+                    path_parts = path.split("/")
                     if len(path_parts) >= 2:
                         category = path_parts[0]
                         if category in categories:
-                            categories[category].append(item.path)
+                            categories[category][path] = blob_sha
 
             return categories
 
@@ -92,95 +178,207 @@ class TacoFancyLoader:
             logger.error(f"Error fetching repository tree: {e}")
             raise
 
-    def get_file_content(self, file_path: str) -> Optional[str]:
-        """Get the content of a specific file."""
-        try:
-            file_content = self.repo.get_contents(file_path, ref=BRANCH)
-            return file_content.decoded_content.decode("utf-8")
-        except GithubException as e:
-            logger.warning(f"Could not fetch {file_path}: {e}")
-            return None
+    def recipe_tree(self) -> Dict[str, Dict[str, str]]:
+        """The recipe tree of the current sync run, fetched once per run."""
+        if self.tree is None:
+            ref = self.sync_run.commit_sha if self.sync_run else BRANCH
+            self.tree = self.get_recipe_tree(ref)
+        return self.tree
+
+    def get_file_content(self, file_path: str, blob_sha: str) -> Optional[str]:
+        """Get the content of a specific file from its blob."""
+        return self.source.read(file_path, blob_sha)
 
     def extract_recipe_data(self, content: str, file_path: str) -> Dict[str, str]:
         """Extract recipe data from markdown content."""
-        # Convert markdown to HTML and parse
-        html = md.markdown(content)
-        soup = BeautifulSoup(html, "html.parser")
-
-        # Try to get name from first H1, otherwise derive from filename
-        name_element = soup.find("h1")
-        if name_element:
-            name = name_element.get_text().strip()
-        else:
-            # Derive name from filename
-            filename = os.path.basename(file_path)
-            name = filename.replace(".md", "").replace("_", " ").title()
+        return parse_recipe(content, file_path)
+
+    def get_head_sha(self) -> str:
+        """The commit SHA at the head of the branch."""
+        return self.source.head_sha()
+
+    def start_sync_run(self, head_sha: Optional[str] = None) -> SyncRun:
+        """Record a sync of the branch head that change events are filed under."""
+        self.sync_run = SyncRun(commit_sha=head_sha or self.get_head_sha())
+        self.tree = None
+        db.session.add(self.sync_run)
+        db.session.flush()
+        return self.sync_run
+
+    def record_change(self, category: str, recipe, action: str):
+        """Add a created/updated/deleted event for a recipe to the sync run."""
+        if self.sync_run is None:
+            self.start_sync_run()
+        db.session.add(
+            ChangeEvent(
+                sync_run=self.sync_run,
+                recipe_type=category,
+                url=recipe.url,
+                slug=recipe.slug,
+                action=action,
+            )
+        )
 
-        return {
-            "name": name,
-            "slug": slugify(name),
-            "recipe": content,
-            "url": (
-                f"https://raw.githubusercontent.com/{REPO_OWNER}/"
-                f"{REPO_NAME}/{BRANCH}/{file_path}"
-            ),
+    def load_recipes_for_category(
+        self, category: str, model_class, refetch: bool = False
+    ) -> List:
+        """Load all recipes for a specific category."""
+        return self.load_recipes({category: model_class}, refetch)[category]
+
+    def load_recipes(
+        self, models: Dict[str, type], refetch: bool = False
+    ) -> Dict[str, List]:
+        """Load the recipes of several categories through one fetch pipeline.
+
+        Only files whose blob SHA differs from the stored one are fetched,
+        unless refetch is set, and files whose content hash matches the
+        stored row are left untouched; new, changed and removed recipes are
+        recorded as change events. Returns the current recipes by category.
+        """
+        tree = self.recipe_tree()
+        stored = {
+            category: {
+                row.url: row
+                for row in db.session.execute(
+                    db.select(model.url, model.slug, model.blob_sha, model.content_hash)
+                )
+            }
+            for category, model in models.items()
         }
+        changed_recipes: Dict[str, List] = {category: [] for category in models}
 
-    def load_recipes_for_category(self, category: str, model_class) -> List:
-        """Load all recipes for a specific category."""
-        categories = self.get_recipe_files_by_category()
-        files = categories.get(category, [])
-
-        saved_recipes = []
-
-        for file_path in files:
-            content = self.get_file_content(file_path)
-            if content:
-                recipe_data = self.extract_recipe_data(content, file_path)
-
-                # Check if recipe already exists
-                existing = db.session.get(model_class, recipe_data["url"])
-
-                if existing:
-                    # Update existing recipe
-                    for key, value in recipe_data.items():
-                        setattr(existing, key, value)
-                    saved_recipes.append(existing)
-                else:
-                    # Create new recipe
-                    recipe = model_class(**recipe_data)
-                    db.session.add(recipe)
-                    saved_recipes.append(recipe)
+        jobs = []
+        for category in models:
+            for file_path, blob_sha in tree.get(category, {}).items():
+                existing = stored[category].get(recipe_url(file_path))
+                if existing and existing.blob_sha == blob_sha and not refetch:
+                    continue
+                stored_hash = existing.content_hash if existing else None
+                jobs.append(RecipeFile(category, file_path, blob_sha, stored_hash))
 
-        db.session.commit()
-        return saved_recipes
+        remaining = self.source.remaining_requests()
+        if remaining is not None and remaining < len(jobs):
+            logger.warning(
+                f"Fetching {len(jobs)} files with {remaining} requests left "
+                "before the GitHub rate limit resets; the sync will wait for it"
+            )
 
-    def load_all_recipes(self):
-        """Load all recipes from the TacoFancy repository."""
-        logger.info("Starting to load recipes from GitHub...")
+        # Files that could not be read keep their stored row and blob SHA,
+        # so the next sync fetches them again
+        self.failed_files = []
+
+        def fetch(job):
+            content = self.get_file_content(job.path, job.blob_sha)
+            if content is None:
+                self.failed_files.append(job.path)
+            return content
+
+        throttle = None
+        if self.source.remote:
+            throttle = Throttle(self.options.requests_per_second)
+        results = run_pipeline(
+            jobs,
+            fetch,
+            parse_recipe_file,
+            self.options,
+            throttle,
+        )
 
-        # Load individual ingredients
-        self.load_recipes_for_category("base_layers", BaseLayer)
-        logger.info("Loaded base layers")
+        writer = BulkWriter(db.session, self.options.batch_size, copy=refetch)
+        for job, recipe_data in results:
+            if recipe_data is None:
+                continue
 
-        self.load_recipes_for_category("condiments", Condiment)
-        logger.info("Loaded condiments")
+            category = job.category
+            recipe_table = models[category].__table__
+            existing = stored[category].get(recipe_url(job.path))
+            if existing and existing.content_hash == recipe_data["content_hash"]:
+                writer.upsert(recipe_table, {"url": existing.url, **recipe_data})
+                continue
 
-        self.load_recipes_for_category("seasonings", Seasoning)
-        logger.info("Loaded seasonings")
+            writer.upsert(recipe_table, recipe_data)
+            recipe = SimpleNamespace(**recipe_data)
+            self.record_change(category, recipe, "updated" if existing else "created")
+            changed_recipes[category].append(recipe)
+        writer.flush()
+        writer.log_summary("Recipe sync")
+
+        for category in models:
+            files = tree.get(category, {})
+            if files:
+                present = {recipe_url(path) for path in files}
+                stale = [
+                    recipe
+                    for recipe in stored[category].values()
+                    if recipe.url not in present
+                ]
+                self._remove_missing_recipes(category, stale)
+            else:
+                # An empty listing is more likely an upstream problem than a purge
+                logger.warning(f"No files found for {category}, keeping stored recipes")
+
+            search.index_recipes(db.session, category, changed_recipes[category])
+        db.session.commit()
+        return {
+            category: db.session.scalars(db.select(model)).all()
+            for category, model in models.items()
+        }
 
-        self.load_recipes_for_category("mixins", Mixin)
-        logger.info("Loaded mixins")
+    def _remove_missing_recipes(self, category: str, stale: List):
+        """Delete recipes whose files are no longer in the repository."""
+        if not stale:
+            return
+
+        urls = [recipe.url for recipe in stale]
+        component = {plural: name for name, plural in INGREDIENTS.items()}.get(category)
+        if component:
+            # Unlink full tacos that used a removed ingredient
+            column = getattr(FullTaco, f"{component}_url")
+            db.session.execute(
+                db.update(FullTaco).where(column.in_(urls)).values({column: None})
+            )
 
-        self.load_recipes_for_category("shells", Shell)
-        logger.info("Loaded shells")
+        for recipe in stale:
+            self.record_change(category, recipe, "deleted")
+        contributions, _, url_column = CONTRIBUTION_TABLES[category]
+        db.session.execute(db.delete(contributions).where(url_column.in_(urls)))
+        model = RECIPE_MODELS[category]
+        db.session.execute(db.delete(model).where(model.url.in_(urls)))
+        search.remove_recipes(db.session, urls)
+        logger.info(f"Removed {len(stale)} {category} no longer in the repository")
+
+    def load_all_recipes(self, incremental: bool = True):
+        """Load all recipes from the TacoFancy repository.
+
+        An incremental load stops early when the branch head has already
+        been synced; otherwise the tree is fetched once and only changed
+        files are downloaded. A full load downloads every file again.
+        """
+        logger.info("Starting to load recipes from GitHub...")
+        head_sha = self.get_head_sha()
+        if incremental and head_sha == self.get_last_sync_sha("recipes"):
+            logger.info(f"Recipes are up to date with {head_sha}")
+            return
+        self.start_sync_run(head_sha)
 
-        # Load full tacos and link them to ingredients
-        full_tacos = self.load_recipes_for_category("full_tacos", FullTaco)
-        logger.info(f"Loaded {len(full_tacos)} full tacos")
+        recipes = self.load_recipes(RECIPE_MODELS, refetch=not incremental)
+        for category, loaded in recipes.items():
+            logger.info(f"Loaded {len(loaded)} {category}")
 
         # Link full tacos to their ingredients
-        self._link_full_tacos_to_ingredients(full_tacos)
+        self._link_full_tacos_to_ingredients(recipes["full_tacos"])
+
+        # Record the synced commit so API snapshots know the data changed.
+        # After failed downloads no commit is recorded, so the next
+        # incremental sync doesn't stop early and retries those files.
+        if self.failed_files:
+            logger.warning(
+                f"Could not fetch {len(self.failed_files)} files, "
+                "they will be retried on the next sync"
+            )
+            self.update_sync_metadata("recipes", None)
+        else:
+            self.update_sync_metadata("recipes", self.sync_run.commit_sha)
 
         logger.info("Finished loading all recipes")
 
@@ -207,13 +405,8 @@ class TacoFancyLoader:
 
                         if category in MAPPER:
                             model_class = MAPPER[category]
-                            ingredient_url = (
-                                f"https://raw.githubusercontent.com/{REPO_OWNER}/"
-                                f"{REPO_NAME}/{BRANCH}/{href}"
-                            )
-
                             # Find the ingredient in the database
-                            ingredient = db.session.get(model_class, ingredient_url)
+                            ingredient = db.session.get(model_class, recipe_url(href))
                             if ingredient:
                                 # Link the ingredient to the full taco
                                 column_name = ingredient.__tablename__
@@ -224,6 +417,11 @@ class TacoFancyLoader:
 
     def load_contributors(self, incremental: bool = True):
         """Load contributor data efficiently by analyzing commits with file info."""
+        if self.repo is None:
+            logger.warning(
+                "Local sources have no commit history, skipping contributors"
+            )
+            return
         logger.info("Loading contributors from commit history...")
 
         try:
@@ -238,7 +436,25 @@ class TacoFancyLoader:
             # than getting detailed commit info for each commit separately
             commits = self.repo.get_commits()
 
-            contributors_seen = set()
+            # Preload what the commit history is checked against, so each
+            # commit costs set lookups rather than queries
+            recipe_urls = {
+                category: set(db.session.scalars(db.select(model.url)))
+                for category, model in RECIPE_MODELS.items()
+            }
+            stored_contributors = {
+                row.username: row
+                for row in db.session.execute(
+                    db.select(
+                        Contributor.username,
+                        Contributor.gravatar,
+                        Contributor.full_name,
+                    )
+                )
+            }
+            edges: Dict[str, set] = {category: set() for category in RECIPE_MODELS}
+
+            contributors_seen = {}
             processed_count = 0
             latest_commit_sha = None
 
@@ -260,34 +476,24 @@ class TacoFancyLoader:
                     if not contributor_data:
                         continue
 
+                    # Keep each contributor's details from their latest commit
                     username = contributor_data["username"]
-
-                    # Find or create contributor (only once per username)
-                    if username not in contributors_seen:
-                        contributor = db.session.get(Contributor, username)
-                        if not contributor:
-                            contributor = Contributor(**contributor_data)
-                            db.session.add(contributor)
-                            # Get the object in session without committing
-                            db.session.flush()
-                        contributors_seen.add(username)
-                    else:
-                        contributor = db.session.get(Contributor, username)
+                    contributors_seen.setdefault(username, contributor_data)
 
                     # Process files modified in this commit
-                    self._process_commit_files(contributor, commit)
+                    self._process_commit_files(username, commit, recipe_urls, edges)
                     processed_count += 1
 
-                    # Commit periodically to avoid large transactions
                     if processed_count % 50 == 0:
-                        db.session.commit()
                         logger.info(f"Processed {processed_count} commits...")
 
                 except Exception as e:
                     logger.warning(f"Error processing commit {commit.sha}: {e}")
                     continue
 
-            db.session.commit()
+            self._write_contributions(
+                contributors_seen, stored_contributors, edges, full=not incremental
+            )
 
             # Update sync metadata with the latest commit SHA
             if latest_commit_sha and processed_count > 0:
@@ -326,8 +532,14 @@ class TacoFancyLoader:
 
         return None
 
-    def _process_commit_files(self, contributor: Contributor, commit):
-        """Process files in a commit and link to contributor."""
+    def _process_commit_files(
+        self,
+        username: str,
+        commit,
+        recipe_urls: Dict[str, set],
+        edges: Dict[str, set],
+    ):
+        """Collect the contributor's edges to the recipe files in a commit."""
         try:
             # Access files from the commit - this doesn't require additional API calls
             for file in commit.files:
@@ -344,28 +556,53 @@ class TacoFancyLoader:
                 if len(path_parts) >= 2:
                     category = path_parts[0]
 
-                    if category in MAPPER:
-                        model_class = MAPPER[category]
-                        recipe_url = (
-                            f"https://raw.githubusercontent.com/{REPO_OWNER}/"
-                            f"{REPO_NAME}/{BRANCH}/{file.filename}"
-                        )
-
-                        # Find the recipe in the database
-                        recipe = db.session.get(model_class, recipe_url)
-                        if recipe and recipe not in getattr(contributor, category, []):
-                            # Add recipe to contributor's collection
-                            if hasattr(contributor, category):
-                                getattr(contributor, category).append(recipe)
+                    if category in recipe_urls:
+                        url = recipe_url(file.filename)
+                        # Link only recipes that are in the database
+                        if url in recipe_urls[category]:
+                            edges[category].add((username, url))
 
         except Exception as e:
-            logger.warning(
-                f"Error processing files for contributor {contributor.username}: {e}"
-            )
+            logger.warning(f"Error processing files for contributor {username}: {e}")
+
+    def _write_contributions(
+        self,
+        contributors: Dict[str, dict],
+        stored: Dict[str, Any],
+        edges: Dict[str, set],
+        full: bool,
+    ):
+        """Bulk write new or changed contributors, then their new edges."""
+        writer = BulkWriter(db.session, self.options.batch_size, copy=full)
+        for username, data in contributors.items():
+            row = stored.get(username)
+            if row is None or (row.gravatar, row.full_name) != (
+                data["gravatar"],
+                data["full_name"],
+            ):
+                writer.upsert(Contributor.__table__, data)
+        # Contributors must exist before the edges that reference them
+        writer.flush()
+
+        for category, found in edges.items():
+            table, _, url_column = CONTRIBUTION_TABLES[category]
+            existing = {
+                tuple(row)
+                for row in db.session.execute(
+                    db.select(table.c.contrib_username, url_column)
+                )
+            }
+            for username, url in found - existing:
+                writer.insert(
+                    table, {"contrib_username": username, url_column.key: url}
+                )
+        writer.flush()
+        writer.log_summary("Contributor sync")
+        db.session.commit()
 
     def load_all_data(self, incremental: bool = True):
         """Load all recipes and contributor data."""
-        self.load_all_recipes()
+        self.load_all_recipes(incremental=incremental)
         self.load_contributors(incremental=incremental)
 
 
@@ -373,10 +610,12 @@ def load_tacofancy_data(
     github_token: Optional[str] = None,
     include_contributors: bool = True,
     incremental: bool = True,
+    source: Optional[str] = None,
+    options: Optional[PipelineOptions] = None,
 ):
     """Convenience function to load all TacoFancy data."""
-    loader = TacoFancyLoader(github_token)
+    loader = TacoFancyLoader(github_token, source=source, options=options)
     if include_contributors:
         loader.load_all_data(incremental=incremental)
     else:
-        loader.load_all_recipes()
+        loader.load_all_recipes(incremental=incremental)
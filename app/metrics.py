@@ -0,0 +1,263 @@
+"""Per-request latency, SQL and response size metrics.
+
+Every request is timed, and the SQL statements it runs are counted and
+timed through SQLAlchemy cursor events. The results are aggregated per
+endpoint (the URL rule, so ``/base_layers/<slug>/`` rather than each slug)
+and served in the Prometheus text format at ``/metrics`` when
+``METRICS_ENABLED`` is set. With
+``SERVER_TIMING`` enabled each response also reports its own timings in a
+``Server-Timing`` header.
+
+Metrics are kept in memory per process; with several gunicorn workers,
+each scrape sees the worker that answered it.
+"""
+
+import hmac
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from flask import Response, current_app, g, has_app_context, request
+from sqlalchemy import event
+
+from .models import db
+
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence[str], **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Counter:
+    """A monotonically increasing count per label set."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str]):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(
+                    f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+                )
+        return lines
+
+
+class Histogram:
+    """Observations per label set, counted into cumulative buckets."""
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str],
+        buckets: Sequence[float],
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> ([count per bucket], sum, count)
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        with self._lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labelnames
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    le = _labels(names, labels, le=_number(bound))
+                    lines.append(f"{self.name}_bucket{le} {bucket_count}")
+                lines.append(
+                    f"{self.name}_bucket{_labels(names, labels, le='+Inf')} {count}"
+                )
+                lines.append(
+                    f"{self.name}_sum{_labels(names, labels)} {_number(total)}"
+                )
+                lines.append(f"{self.name}_count{_labels(names, labels)} {count}")
+        return lines
+
+
+class _RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = 0
+        self.sql_seconds = 0.0
+
+
+class _Metrics:
+    def __init__(self):
+        labels = ("endpoint", "method")
+        self.requests = Counter(
+            "tacofancy_requests_total",
+            "Requests handled.",
+            ("endpoint", "method", "status"),
+        )
+        self.duration = Histogram(
+            "tacofancy_request_duration_seconds",
+            "Time spent handling a request.",
+            labels,
+            DURATION_BUCKETS,
+        )
+        self.statements = Histogram(
+            "tacofancy_request_sql_statements",
+            "SQL statements executed per request.",
+            labels,
+            STATEMENT_BUCKETS,
+        )
+        self.sql_duration = Histogram(
+            "tacofancy_request_sql_duration_seconds",
+            "Time spent executing SQL per request.",
+            labels,
+            DURATION_BUCKETS,
+        )
+        self.response_size = Histogram(
+            "tacofancy_response_size_bytes",
+            "Size of response bodies with a known length.",
+            labels,
+            SIZE_BUCKETS,
+        )
+
+    def render(self) -> str:
+        lines = []
+        for metric in (
+            self.requests,
+            self.duration,
+            self.statements,
+            self.sql_duration,
+            self.response_size,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _current_stats() -> Optional[_RequestStats]:
+    return g.get("request_stats") if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None and _current_stats() is not None:
+        context.metrics_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats()
+    start = getattr(context, "metrics_start", None)
+    if stats is not None and start is not None:
+        stats.statements += 1
+        stats.sql_seconds += time.perf_counter() - start
+
+
+class RequestMetrics:
+    """Collects request metrics for an app and serves them at ``/metrics``.
+
+    Off unless ``METRICS_ENABLED`` is set. With ``METRICS_TOKEN`` set,
+    scrapes must send it as ``Authorization: Bearer <token>``.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("METRICS_ENABLED", False)
+        app.config.setdefault("METRICS_TOKEN", None)
+        app.config.setdefault("SERVER_TIMING", False)
+        if not app.config["METRICS_ENABLED"]:
+            return
+
+        app.extensions["metrics"] = _Metrics()
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule("/metrics", "metrics", self.metrics_view, methods=["GET"])
+
+        with app.app_context():
+            for engine in db.engines.values():
+                event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+                event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    @staticmethod
+    def _start_request():
+        g.request_stats = _RequestStats()
+
+    @staticmethod
+    def _finish_request(response):
+        stats = g.pop("request_stats", None)
+        if stats is None:
+            return response
+
+        elapsed = time.perf_counter() - stats.start
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        labels = (endpoint, request.method)
+
+        state = current_app.extensions["metrics"]
+        state.requests.inc(labels + (str(response.status_code),))
+        state.duration.observe(labels, elapsed)
+        state.statements.observe(labels, stats.statements)
+        state.sql_duration.observe(labels, stats.sql_seconds)
+        # Streamed responses have no length until they are sent
+        if response.content_length is not None:
+            state.response_size.observe(labels, response.content_length)
+
+        if current_app.config["SERVER_TIMING"]:
+            response.headers.add(
+                "Server-Timing",
+                f'db;dur={stats.sql_seconds * 1000:.2f};desc="{stats.statements} '
+                f'queries", app;dur={elapsed * 1000:.2f}',
+            )
+        return response
+
+    @staticmethod
+    def metrics_view():
+        token = current_app.config["METRICS_TOKEN"]
+        if token:
+            supplied = request.headers.get("Authorization", "")
+            if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+                return Response(
+                    "Unauthorized\n",
+                    status=401,
+                    headers={"WWW-Authenticate": "Bearer"},
+                    content_type="text/plain",
+                )
+        body = current_app.extensions["metrics"].render()
+        return Response(body, content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+metrics = RequestMetrics()
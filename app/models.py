@@ -1,49 +1,95 @@
 from datetime import datetime
 from typing import List, Optional
 
+from flask import g, has_app_context, request
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from sqlalchemy import DateTime, ForeignKey, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+# Bind key of the optional read replica engine
+REPLICA_BIND = "replica"
+
+
+class RoutingSession(Session):
+    """Session that reads from the replica while handling GET requests.
+
+    Everything else, including flushes and the loader's CLI commands, uses
+    the primary. Without a replica bind, every query uses the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and reads_from_replica():
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def reads_from_replica() -> bool:
+    return has_app_context() and g.get("read_replica", False)
+
+
+def route_reads_to_replica():
+    """Request hook flagging GET requests as safe to serve from the replica."""
+    g.read_replica = request.method in ("GET", "HEAD")
+
+
 # Create the SQLAlchemy instance
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
+# Recipe columns maintained by the loader and left out of as_dict()
+INTERNAL_COLUMNS = {"recipe_html", "content_hash", "blob_sha"}
 
-# Association tables for many-to-many relationships
+
+# Association tables for many-to-many relationships. Each pairing is unique,
+# and the recipe column is indexed separately for recipe -> contributor lookups.
 contrib_fulltaco = db.Table(
     "contrib_fulltaco",
     db.Column("contrib_username", db.String, db.ForeignKey("contributor.username")),
     db.Column("full_taco_url", db.String, db.ForeignKey("full_taco.url")),
+    db.Index("uq_contrib_fulltaco", "contrib_username", "full_taco_url", unique=True),
+    db.Index("ix_contrib_fulltaco_full_taco_url", "full_taco_url"),
 )
 
 contrib_shell = db.Table(
     "contrib_shell",
     db.Column("contrib_username", db.String, db.ForeignKey("contributor.username")),
     db.Column("shell_url", db.String, db.ForeignKey("shell.url")),
+    db.Index("uq_contrib_shell", "contrib_username", "shell_url", unique=True),
+    db.Index("ix_contrib_shell_shell_url", "shell_url"),
 )
 
 contrib_seasoning = db.Table(
     "contrib_seasoning",
     db.Column("contrib_username", db.String, db.ForeignKey("contributor.username")),
     db.Column("seasoning_url", db.String, db.ForeignKey("seasoning.url")),
+    db.Index("uq_contrib_seasoning", "contrib_username", "seasoning_url", unique=True),
+    db.Index("ix_contrib_seasoning_seasoning_url", "seasoning_url"),
 )
 
 contrib_mixin = db.Table(
     "contrib_mixin",
     db.Column("contrib_username", db.String, db.ForeignKey("contributor.username")),
     db.Column("mixin_url", db.String, db.ForeignKey("mixin.url")),
+    db.Index("uq_contrib_mixin", "contrib_username", "mixin_url", unique=True),
+    db.Index("ix_contrib_mixin_mixin_url", "mixin_url"),
 )
 
 contrib_condiment = db.Table(
     "contrib_condiment",
     db.Column("contrib_username", db.String, db.ForeignKey("contributor.username")),
     db.Column("condiment_url", db.String, db.ForeignKey("condiment.url")),
+    db.Index("uq_contrib_condiment", "contrib_username", "condiment_url", unique=True),
+    db.Index("ix_contrib_condiment_condiment_url", "condiment_url"),
 )
 
 contrib_baselayer = db.Table(
     "contrib_baselayer",
     db.Column("contrib_username", db.String, db.ForeignKey("contributor.username")),
     db.Column("baselayer_url", db.String, db.ForeignKey("base_layer.url")),
+    db.Index("uq_contrib_baselayer", "contrib_username", "baselayer_url", unique=True),
+    db.Index("ix_contrib_baselayer_baselayer_url", "baselayer_url"),
 )
 
 
@@ -52,8 +98,11 @@ class BaseLayer(db.Model):
 
     url: Mapped[str] = mapped_column(String, primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String)
-    slug: Mapped[Optional[str]] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String, index=True)
     recipe: Mapped[Optional[str]] = mapped_column(Text)
+    recipe_html: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    blob_sha: Mapped[Optional[str]] = mapped_column(String(40))
 
     # Relationships
     contributors: Mapped[List["Contributor"]] = relationship(
@@ -64,7 +113,11 @@ class BaseLayer(db.Model):
         return f"<BaseLayer {self.name!r}>"
 
     def as_dict(self) -> dict:
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.name not in INTERNAL_COLUMNS
+        }
 
 
 class Condiment(db.Model):
@@ -72,8 +125,11 @@ class Condiment(db.Model):
 
     url: Mapped[str] = mapped_column(String, primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String)
-    slug: Mapped[Optional[str]] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String, index=True)
     recipe: Mapped[Optional[str]] = mapped_column(Text)
+    recipe_html: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    blob_sha: Mapped[Optional[str]] = mapped_column(String(40))
 
     # Relationships
     contributors: Mapped[List["Contributor"]] = relationship(
@@ -84,7 +140,11 @@ class Condiment(db.Model):
         return f"<Condiment {self.name!r}>"
 
     def as_dict(self) -> dict:
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.name not in INTERNAL_COLUMNS
+        }
 
 
 class Mixin(db.Model):
@@ -92,8 +152,11 @@ class Mixin(db.Model):
 
     url: Mapped[str] = mapped_column(String, primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String)
-    slug: Mapped[Optional[str]] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String, index=True)
     recipe: Mapped[Optional[str]] = mapped_column(Text)
+    recipe_html: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    blob_sha: Mapped[Optional[str]] = mapped_column(String(40))
 
     # Relationships
     contributors: Mapped[List["Contributor"]] = relationship(
@@ -104,7 +167,11 @@ class Mixin(db.Model):
         return f"<Mixin {self.name!r}>"
 
     def as_dict(self) -> dict:
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.name not in INTERNAL_COLUMNS
+        }
 
 
 class Seasoning(db.Model):
@@ -112,8 +179,11 @@ class Seasoning(db.Model):
 
     url: Mapped[str] = mapped_column(String, primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String)
-    slug: Mapped[Optional[str]] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String, index=True)
     recipe: Mapped[Optional[str]] = mapped_column(Text)
+    recipe_html: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    blob_sha: Mapped[Optional[str]] = mapped_column(String(40))
 
     # Relationships
     contributors: Mapped[List["Contributor"]] = relationship(
@@ -124,7 +194,11 @@ class Seasoning(db.Model):
         return f"<Seasoning {self.name!r}>"
 
     def as_dict(self) -> dict:
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.name not in INTERNAL_COLUMNS
+        }
 
 
 class Shell(db.Model):
@@ -132,8 +206,11 @@ class Shell(db.Model):
 
     url: Mapped[str] = mapped_column(String, primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String)
-    slug: Mapped[Optional[str]] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String, index=True)
     recipe: Mapped[Optional[str]] = mapped_column(Text)
+    recipe_html: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    blob_sha: Mapped[Optional[str]] = mapped_column(String(40))
 
     # Relationships
     contributors: Mapped[List["Contributor"]] = relationship(
@@ -144,7 +221,11 @@ class Shell(db.Model):
         return f"<Shell {self.name!r}>"
 
     def as_dict(self) -> dict:
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.name not in INTERNAL_COLUMNS
+        }
 
 
 class FullTaco(db.Model):
@@ -152,8 +233,11 @@ class FullTaco(db.Model):
 
     url: Mapped[str] = mapped_column(String, primary_key=True)
     name: Mapped[Optional[str]] = mapped_column(String)
-    slug: Mapped[Optional[str]] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String, index=True)
     recipe: Mapped[Optional[str]] = mapped_column(Text)
+    recipe_html: Mapped[Optional[str]] = mapped_column(Text)
+    content_hash: Mapped[Optional[str]] = mapped_column(String(64))
+    blob_sha: Mapped[Optional[str]] = mapped_column(String(40))
 
     # Foreign keys
     base_layer_url: Mapped[Optional[str]] = mapped_column(ForeignKey("base_layer.url"))
@@ -177,7 +261,11 @@ class FullTaco(db.Model):
         return f"<FullTaco {self.name!r}>"
 
     def as_dict(self) -> dict:
-        return {c.name: getattr(self, c.name) for c in self.__table__.columns}
+        return {
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.name not in INTERNAL_COLUMNS
+        }
 
 
 class Contributor(db.Model):
@@ -228,6 +316,35 @@ class SyncMetadata(db.Model):
         return f"<SyncMetadata {self.sync_type}: {self.last_commit_sha}>"
 
 
+class SyncRun(db.Model):
+    __tablename__ = "sync_run"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    commit_sha: Mapped[str] = mapped_column(String(40), index=True)
+    sync_time: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+
+    changes: Mapped[List["ChangeEvent"]] = relationship(back_populates="sync_run")
+
+    def __repr__(self) -> str:
+        return f"<SyncRun {self.id}: {self.commit_sha}>"
+
+
+class ChangeEvent(db.Model):
+    __tablename__ = "change_event"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    sync_run_id: Mapped[int] = mapped_column(ForeignKey("sync_run.id"), index=True)
+    recipe_type: Mapped[str] = mapped_column(String(50))
+    url: Mapped[str] = mapped_column(String)
+    slug: Mapped[Optional[str]] = mapped_column(String)
+    action: Mapped[str] = mapped_column(String(10))  # 'created', 'updated', 'deleted'
+
+    sync_run: Mapped[SyncRun] = relationship(back_populates="changes")
+
+    def __repr__(self) -> str:
+        return f"<ChangeEvent {self.action} {self.url}>"
+
+
 # Mapper for API endpoints
 MAPPER = {
     "base_layers": BaseLayer,
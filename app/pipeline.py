@@ -0,0 +1,135 @@
+"""Concurrent fetch and parse stages feeding the loader's single writer.
+
+Files are fetched by a thread pool, throttled to a request rate, and
+parsed either in the fetching thread or in a pool of processes. The
+calling thread, which owns the database session, consumes the results.
+At most ``queue_size`` files are in flight at once, so fetching pauses
+whenever the writer falls behind.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Callable, Iterator, Optional, Sequence, Tuple, TypeVar
+
+Job = TypeVar("Job")
+Result = TypeVar("Result")
+
+
+@dataclass(frozen=True)
+class PipelineOptions:
+    fetch_workers: int = 8
+    requests_per_second: float = 10.0
+    parse_workers: int = 0
+    queue_size: int = 64
+    batch_size: int = 100
+
+    @classmethod
+    def from_config(cls, config) -> "PipelineOptions":
+        return cls(
+            fetch_workers=config["SYNC_FETCH_WORKERS"],
+            requests_per_second=config["SYNC_REQUESTS_PER_SECOND"],
+            parse_workers=config["SYNC_PARSE_WORKERS"],
+            queue_size=config["SYNC_QUEUE_SIZE"],
+            batch_size=config["SYNC_BATCH_SIZE"],
+        )
+
+
+class Throttle:
+    """Spaces calls from any number of threads to at most rate per second.
+
+    A rate of zero or less disables throttling.
+    """
+
+    def __init__(self, rate: float):
+        self.interval = 1 / rate if rate > 0 else 0
+        self._next = time.monotonic()
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def run_pipeline(
+    jobs: Sequence[Job],
+    fetch: Callable[[Job], Optional[str]],
+    parse: Callable[[Job, str], Result],
+    options: PipelineOptions,
+    throttle: Optional[Throttle] = None,
+) -> Iterator[Tuple[Job, Optional[Result]]]:
+    """Fetch and parse every job, yielding ``(job, result)`` as each finishes.
+
+    The result is None when fetch returned None. With ``parse_workers``
+    set, parse runs in other processes and must be a picklable top-level
+    function. An exception in either stage is raised in the caller, and
+    the remaining jobs are abandoned.
+    """
+    results: queue.Queue = queue.Queue()
+    slots = threading.Semaphore(max(1, options.queue_size))
+    stop = threading.Event()
+
+    parse_pool = None
+    if options.parse_workers > 0:
+        # Forking while the fetch threads hold locks is unsafe, so spawn
+        parse_pool = ProcessPoolExecutor(
+            options.parse_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    fetch_pool = ThreadPoolExecutor(
+        max(1, options.fetch_workers), thread_name_prefix="sync-fetch"
+    )
+
+    def parsed(job, future):
+        try:
+            results.put((job, future.result(), None))
+        except BaseException as e:
+            results.put((job, None, e))
+
+    def run(job):
+        try:
+            if throttle is not None:
+                throttle.wait()
+            content = fetch(job)
+            if content is None:
+                results.put((job, None, None))
+            elif parse_pool is None:
+                results.put((job, parse(job, content), None))
+            else:
+                future = parse_pool.submit(parse, job, content)
+                future.add_done_callback(partial(parsed, job))
+        except BaseException as e:
+            results.put((job, None, e))
+
+    def feed():
+        for job in jobs:
+            slots.acquire()
+            if stop.is_set():
+                return
+            fetch_pool.submit(run, job)
+
+    feeder = threading.Thread(target=feed, name="sync-feed", daemon=True)
+    feeder.start()
+    try:
+        for _ in range(len(jobs)):
+            job, result, error = results.get()
+            slots.release()
+            if error is not None:
+                raise error
+            yield job, result
+    finally:
+        stop.set()
+        slots.release()
+        feeder.join()
+        fetch_pool.shutdown(cancel_futures=True)
+        if parse_pool is not None:
+            parse_pool.shutdown(cancel_futures=True)
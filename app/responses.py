@@ -0,0 +1,280 @@
+import gzip
+import hashlib
+import json
+from dataclasses import dataclass, field
+from typing import Any, Callable, NamedTuple, Optional
+
+from flask import Response, current_app, request
+
+from .snapshot import Snapshot, get_snapshot
+from .utils import LRUCache
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is an optional speedup
+    brotli = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - binary formats are optional
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:  # pragma: no cover - binary formats are optional
+    cbor2 = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+CBOR_MIMETYPE = "application/cbor"
+
+
+# Bodies smaller than this are not worth compressing on demand
+MIN_COMPRESS_SIZE = 256
+
+
+def gzip_fast(body: bytes) -> bytes:
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+def brotli_fast(body: bytes) -> bytes:
+    return brotli.compress(body, quality=5)
+
+
+# Cheap compressors for payloads that are not precompressed
+FAST_COMPRESSORS = {"gzip": gzip_fast}
+if brotli:
+    FAST_COMPRESSORS["br"] = brotli_fast
+
+
+@dataclass(frozen=True)
+class EncodedPayload:
+    """A response body encoded once, with its compressed variants.
+
+    A ``lazy`` payload holds no precompressed variants; each content coding
+    is compressed at a fast setting the first time it is served.
+    """
+
+    etag: str
+    identity: bytes
+    gzip: Optional[bytes] = None
+    br: Optional[bytes] = None
+    lazy: bool = False
+    headers: dict = field(default_factory=dict, compare=False)
+    _compressed: dict = field(default_factory=dict, compare=False, repr=False)
+
+    def for_encoding(self, encoding: str) -> Optional[bytes]:
+        if encoding == "identity":
+            return self.identity
+        if self.lazy:
+            if encoding not in self._compressed:
+                self._compressed[encoding] = FAST_COMPRESSORS[encoding](self.identity)
+            return self._compressed[encoding]
+        return getattr(self, encoding)
+
+    def etag_for_encoding(self, encoding: str) -> str:
+        # Each content coding is a distinct representation with its own tag
+        return self.etag if encoding == "identity" else f"{self.etag}-{encoding}"
+
+    @property
+    def encodings(self):
+        if self.lazy:
+            if len(self.identity) < MIN_COMPRESS_SIZE:
+                return []
+            return [e for e in ("br", "gzip") if e in FAST_COMPRESSORS]
+        return [e for e in ("br", "gzip") if getattr(self, e) is not None]
+
+
+class WithHeaders(NamedTuple):
+    """Data returned by a ``build`` callable along with response headers.
+
+    The headers are cached with the encoded body, for headers such as a
+    ``Link`` to the next page that are only known once the data is built.
+    """
+
+    data: Any
+    headers: dict
+
+
+def encode_json(data: Any) -> bytes:
+    """Encode data the same way Flask-RESTful's JSON representation does."""
+    settings = dict(current_app.config.get("RESTFUL_JSON", {}))
+    if current_app.debug:
+        settings.setdefault("indent", 4)
+    return (json.dumps(data, **settings) + "\n").encode("utf-8")
+
+
+def encode_msgpack(data: Any) -> bytes:
+    return msgpack.packb(data)
+
+
+def encode_cbor(data: Any) -> bytes:
+    return cbor2.dumps(data)
+
+
+# Serializers by media type, in order of preference for "Accept: */*"
+ENCODERS = {JSON_MIMETYPE: encode_json}
+if msgpack:
+    ENCODERS[MSGPACK_MIMETYPE] = encode_msgpack
+if cbor2:
+    ENCODERS[CBOR_MIMETYPE] = encode_cbor
+
+# Short names used in entity tags for the non-JSON media types
+MEDIA_SUFFIXES = {MSGPACK_MIMETYPE: "msgpack", CBOR_MIMETYPE: "cbor"}
+
+
+def negotiated_response(data: Any, status: int = 200) -> Response:
+    """Encode an uncached response in the media type the client accepts.
+
+    Matches what the Flask-RESTful representations produce, for views
+    routed without Flask-RESTful.
+    """
+    mimetype = negotiate_mimetype()
+    return Response(ENCODERS[mimetype](data), status=status, mimetype=mimetype)
+
+
+def representation(mimetype: str) -> Callable:
+    """Flask-RESTful output function for one of the binary media types."""
+    encode = ENCODERS[mimetype]
+
+    def output(data, code, headers=None):
+        response = Response(encode(data), status=code, mimetype=mimetype)
+        response.headers.extend(headers or {})
+        return response
+
+    return output
+
+
+def make_etag(snapshot: Snapshot, key: str, mimetype: str = JSON_MIMETYPE) -> str:
+    """Strong entity tag for a resource key within a sync generation."""
+    key_digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+    etag = f"{snapshot.generation.token}-{key_digest}"
+    if mimetype in MEDIA_SUFFIXES:
+        etag = f"{etag}-{MEDIA_SUFFIXES[mimetype]}"
+    return etag
+
+
+def compress(body: bytes, etag: str) -> EncodedPayload:
+    """Build the compressed variants of a body, keeping only those that help."""
+    gzipped = gzip.compress(body, compresslevel=9, mtime=0)
+    brotlied = brotli.compress(body, quality=11) if brotli else None
+    return EncodedPayload(
+        etag=etag,
+        identity=body,
+        gzip=gzipped if len(gzipped) < len(body) else None,
+        br=brotlied if brotlied and len(brotlied) < len(body) else None,
+    )
+
+
+class _ResponseState:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.generation = None
+        self.payloads = LRUCache(maxsize)
+
+
+class ResponseStore:
+    """Caches encoded response bodies for the current snapshot generation.
+
+    Bodies are stored per resource key and media type. At most
+    ``RESPONSE_CACHE_SIZE`` are kept; the least recently used ones are
+    dropped first.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("RESPONSE_CACHE_SIZE", 4096)
+        app.extensions["responses"] = _ResponseState(app.config["RESPONSE_CACHE_SIZE"])
+
+    def get(
+        self,
+        key: str,
+        snapshot: Snapshot,
+        build: Callable[[Snapshot], Any],
+        mimetype: str = JSON_MIMETYPE,
+        precompress: bool = True,
+    ) -> EncodedPayload:
+        """Return the payload for key in a media type, encoding it on first use.
+
+        Without ``precompress`` the compressed variants are left to be built
+        on demand, see ``EncodedPayload``. ``build`` may return its data as
+        ``WithHeaders`` to store headers along with the body.
+        """
+        state = current_app.extensions["responses"]
+        if state.generation != snapshot.generation:
+            # A new sync landed; drop everything encoded for the old data
+            state.payloads = LRUCache(state.maxsize)
+            state.generation = snapshot.generation
+
+        payloads = state.payloads
+        payload = payloads.get((key, mimetype))
+        if payload is None:
+            data, headers = build(snapshot), {}
+            if isinstance(data, WithHeaders):
+                data, headers = data
+            body = ENCODERS[mimetype](data)
+            etag = make_etag(snapshot, key, mimetype)
+            if precompress:
+                payload = compress(body, etag)
+            else:
+                payload = EncodedPayload(etag=etag, identity=body, lazy=True)
+            payload.headers.update(headers)
+            payloads.set((key, mimetype), payload)
+        return payload
+
+
+responses = ResponseStore()
+
+
+def negotiate_mimetype() -> str:
+    """Pick the media type to serve from the Accept header, JSON by default."""
+    return request.accept_mimetypes.best_match(list(ENCODERS), default=JSON_MIMETYPE)
+
+
+def negotiate_encoding(payload: EncodedPayload) -> str:
+    """Pick the best content coding the client accepts for this payload."""
+    return request.accept_encodings.best_match(
+        payload.encodings + ["identity"], default="identity"
+    )
+
+
+def cached_response(
+    key: str,
+    build: Callable[[Snapshot], Any],
+    snapshot: Optional[Snapshot] = None,
+    headers: Optional[dict] = None,
+    precompress: bool = True,
+) -> Response:
+    """Serve a pre-encoded response for the current snapshot.
+
+    The body is JSON, MessagePack or CBOR according to the Accept header.
+    ``build`` is only called the first time ``key`` is requested in that
+    media type in a generation; later requests reuse the stored bytes. The
+    response carries an ETag and Last-Modified for the generation and
+    collapses to a ``304 Not Modified`` when the client's copy is still
+    current.
+
+    Bodies are compressed at the highest settings when first built. Pass
+    ``precompress=False`` for keys derived from arbitrary query arguments,
+    such as a page or projection, so they are only compressed cheaply and
+    in the coding a client actually asks for. Headers that depend on the
+    built data are returned from ``build`` with ``WithHeaders``.
+    """
+    snapshot = snapshot or get_snapshot()
+    mimetype = negotiate_mimetype()
+    payload = responses.get(key, snapshot, build, mimetype, precompress)
+    encoding = negotiate_encoding(payload)
+
+    response = Response(payload.for_encoding(encoding), mimetype=mimetype)
+    if encoding != "identity":
+        response.headers["Content-Encoding"] = encoding
+    response.vary.update(["Accept", "Accept-Encoding"])
+    response.headers.extend(payload.headers)
+    response.headers.extend(headers or {})
+    response.set_etag(payload.etag_for_encoding(encoding))
+    if snapshot.generation.last_modified:
+        response.last_modified = snapshot.generation.last_modified
+    return response.make_conditional(request)
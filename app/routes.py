@@ -1,18 +1,66 @@
-from flask import Blueprint, redirect, render_template, url_for
+from typing import Dict, Optional
 
-from .models import BaseLayer, Condiment, Mixin, Seasoning, Shell, db
-from .utils import fetch_random_ingredients
+from flask import Blueprint, current_app, redirect, render_template, url_for
+
+from .models import db
+from .snapshot import Snapshot, get_snapshot, get_snapshot_file
+from .utils import (
+    INGREDIENTS,
+    LRUCache,
+    fetch_recipe_contributors,
+    random_ingredients,
+    render_markdown,
+)
 
 # Create blueprint for template routes
 template_routes = Blueprint("templates", __name__)
 
 
+@template_routes.record_once
+def init_permalink_cache(state):
+    """Give each app its own cache of rendered permalink pages."""
+    size = state.app.config.get("PERMALINK_CACHE_SIZE", 1024)
+    state.app.extensions["permalink_cache"] = LRUCache(size)
+
+
+def render_taco(
+    snapshot: Snapshot, taco: Dict[str, Optional[dict]], render_link: bool
+) -> str:
+    """Render a taco page, loading every ingredient's contributors at once."""
+    urls_by_category = {
+        INGREDIENTS[name]: [item["url"]] for name, item in taco.items() if item
+    }
+    snapshot_file = get_snapshot_file()
+    if snapshot_file:
+        contributors = snapshot_file.recipe_contributors(urls_by_category)
+    else:
+        contributors = fetch_recipe_contributors(db.session, urls_by_category)
+
+    ingredients = {}
+    for name, item in taco.items():
+        if not item:
+            continue
+        # Rows synced before HTML was stored are rendered on the fly
+        html = snapshot.recipes[INGREDIENTS[name]].html_by_url.get(item["url"])
+        ingredients[name] = {
+            **item,
+            "recipe_html": html or render_markdown(item["recipe"] or ""),
+            "contributors": contributors.get(item["url"], []),
+        }
+
+    return render_template(
+        "permalink.html",
+        **{name: ingredients.get(name) for name in INGREDIENTS},
+        render_link=render_link,
+    )
+
+
 @template_routes.route("/")
 def index():
     """Home page with a random taco."""
-    taco = fetch_random_ingredients(db.session)
-    taco["render_link"] = True
-    return render_template("permalink.html", **taco)
+    snapshot = get_snapshot()
+    taco = random_ingredients(snapshot)[0]
+    return render_taco(snapshot, taco, render_link=True)
 
 
 @template_routes.route("/<path:path>/")
@@ -23,12 +71,20 @@ def permalink(path: str):
     except ValueError:
         return redirect(url_for("templates.index"))
 
-    taco = {
-        "base_layer": BaseLayer.query.filter_by(slug=base_layer).first(),
-        "mixin": Mixin.query.filter_by(slug=mixin).first(),
-        "condiment": Condiment.query.filter_by(slug=condiment).first(),
-        "seasoning": Seasoning.query.filter_by(slug=seasoning).first(),
-        "shell": Shell.query.filter_by(slug=shell).first(),
-        "render_link": False,
-    }
-    return render_template("permalink.html", **taco)
+    snapshot = get_snapshot()
+    cache = current_app.extensions["permalink_cache"]
+    key = (snapshot.generation, base_layer, mixin, condiment, seasoning, shell)
+
+    html = cache.get(key)
+    if html is None:
+        recipes = snapshot.recipes
+        taco = {
+            "base_layer": recipes["base_layers"].by_slug.get(base_layer),
+            "mixin": recipes["mixins"].by_slug.get(mixin),
+            "condiment": recipes["condiments"].by_slug.get(condiment),
+            "seasoning": recipes["seasonings"].by_slug.get(seasoning),
+            "shell": recipes["shells"].by_slug.get(shell),
+        }
+        html = render_taco(snapshot, taco, render_link=False)
+        cache.set(key, html)
+    return html
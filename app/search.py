@@ -0,0 +1,139 @@
+"""Full-text recipe search.
+
+Recipes of every type are indexed in a single ``recipe_search`` table: an
+FTS5 virtual table on SQLite, and a table with a generated ``tsvector``
+column and GIN index on PostgreSQL. The loader keeps it up to date as
+recipes are synced.
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+from sqlalchemy import DDL, bindparam, event, select, text
+from sqlalchemy.orm import Session
+
+from .models import db
+from .snapshot import SNAPSHOT_TYPES
+
+SQLITE_CREATE = DDL(
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipe_search USING fts5("
+    "recipe_type UNINDEXED, url UNINDEXED, slug UNINDEXED, name, recipe, "
+    "tokenize = 'porter unicode61')"
+)
+
+POSTGRES_CREATE = DDL(
+    "CREATE TABLE IF NOT EXISTS recipe_search ("
+    "url VARCHAR PRIMARY KEY, recipe_type VARCHAR NOT NULL, slug VARCHAR, "
+    "name VARCHAR, recipe TEXT, "
+    "document tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(recipe, '')), 'B')) STORED); "
+    "CREATE INDEX IF NOT EXISTS ix_recipe_search_document "
+    "ON recipe_search USING GIN (document)"
+)
+
+DROP = DDL("DROP TABLE IF EXISTS recipe_search")
+
+# Keep the index table alongside the models for create_all/drop_all
+event.listen(db.metadata, "after_create", SQLITE_CREATE.execute_if(dialect="sqlite"))
+event.listen(
+    db.metadata, "after_create", POSTGRES_CREATE.execute_if(dialect="postgresql")
+)
+event.listen(db.metadata, "before_drop", DROP)
+
+SQLITE_QUERY = """
+    SELECT recipe_type, url, slug, name,
+           snippet(recipe_search, 4, '<b>', '</b>', '…', 16) AS snippet,
+           -bm25(recipe_search, 0, 0, 0, 10.0, 1.0) AS rank
+    FROM recipe_search
+    WHERE recipe_search MATCH :query {type_filter}
+    ORDER BY rank DESC, url
+    LIMIT :limit OFFSET :offset
+"""
+
+POSTGRES_QUERY = """
+    SELECT recipe_type, url, slug, name,
+           ts_headline('english', coalesce(recipe, ''), q,
+                       'StartSel=<b>, StopSel=</b>, MaxWords=24, MinWords=8')
+               AS snippet,
+           ts_rank(document, q) AS rank
+    FROM recipe_search, websearch_to_tsquery('english', :query) AS q
+    WHERE document @@ q {type_filter}
+    ORDER BY rank DESC, url
+    LIMIT :limit OFFSET :offset
+"""
+
+
+def _dialect(session: Session) -> str:
+    return session.get_bind().dialect.name
+
+
+def _fts5_query(query: str) -> str:
+    """Quote each term so user input can't use FTS5 query syntax."""
+    return " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+
+
+def index_recipes(session: Session, recipe_type: str, recipes: Iterable):
+    """Add or refresh recipes of one type in the search index."""
+    rows = [
+        {
+            "recipe_type": recipe_type,
+            "url": recipe.url,
+            "slug": recipe.slug,
+            "name": recipe.name,
+            "recipe": recipe.recipe,
+        }
+        for recipe in recipes
+    ]
+    if not rows:
+        return
+
+    remove_recipes(session, [row["url"] for row in rows])
+    session.execute(
+        text(
+            "INSERT INTO recipe_search (recipe_type, url, slug, name, recipe) "
+            "VALUES (:recipe_type, :url, :slug, :name, :recipe)"
+        ),
+        rows,
+    )
+
+
+def remove_recipes(session: Session, urls: List[str]):
+    """Drop recipes from the search index."""
+    if urls:
+        stmt = text("DELETE FROM recipe_search WHERE url IN :urls").bindparams(
+            bindparam("urls", expanding=True)
+        )
+        session.execute(stmt, {"urls": urls})
+
+
+def rebuild_index(session: Session):
+    """Re-index every recipe from the recipe tables."""
+    session.execute(text("DELETE FROM recipe_search"))
+    for recipe_type, model in SNAPSHOT_TYPES.items():
+        index_recipes(session, recipe_type, session.scalars(select(model)))
+    session.commit()
+
+
+def search_recipes(
+    session: Session,
+    query: str,
+    recipe_type: Optional[str] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[Dict]:
+    """Return ranked matches for query with a highlighted snippet each."""
+    params = {"limit": limit, "offset": offset}
+    type_filter = ""
+    if recipe_type:
+        type_filter = "AND recipe_type = :recipe_type"
+        params["recipe_type"] = recipe_type
+
+    if _dialect(session) == "postgresql":
+        sql = POSTGRES_QUERY
+        params["query"] = query
+    else:
+        sql = SQLITE_QUERY
+        params["query"] = _fts5_query(query)
+
+    result = session.execute(text(sql.format(type_filter=type_filter)), params)
+    return [dict(row._mapping) for row in result]
@@ -0,0 +1,261 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from .models import MAPPER, Contributor, FullTaco, SyncMetadata, db
+
+logger = logging.getLogger(__name__)
+
+# Every recipe table held in the snapshot, keyed like the API routes
+SNAPSHOT_TYPES = {**MAPPER, "full_tacos": FullTaco}
+
+
+@dataclass(frozen=True)
+class Generation:
+    """Identifies the state of the data as of the last sync."""
+
+    token: str
+    last_modified: Optional[datetime]
+
+
+@dataclass(frozen=True)
+class RecipeTable:
+    """Serialized rows of one recipe table, ordered by url, with lookup indexes."""
+
+    items: Tuple[dict, ...]
+    by_slug: Mapping[str, dict]
+    by_url: Mapping[str, dict]
+    html_by_url: Mapping[str, Optional[str]]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable view of every recipe and contributor for one sync generation.
+
+    The row dicts are shared between requests and must not be mutated. They
+    leave out the rendered recipe HTML, which is kept in ``html_by_url``.
+    Recipes are ordered by url and contributors by username, comparing
+    them as Python strings.
+    """
+
+    generation: Generation
+    recipes: Mapping[str, RecipeTable]
+    contributors: Tuple[dict, ...]
+    contributors_by_username: Mapping[str, dict]
+
+
+def current_generation(session: Session) -> Generation:
+    """Derive the data generation from the recorded sync metadata."""
+    rows = session.execute(
+        select(
+            SyncMetadata.sync_type,
+            SyncMetadata.last_commit_sha,
+            SyncMetadata.last_sync_time,
+        ).order_by(SyncMetadata.sync_type)
+    ).all()
+
+    digest = hashlib.sha1()
+    for sync_type, commit_sha, sync_time in rows:
+        digest.update(f"{sync_type}:{commit_sha}:{sync_time};".encode("utf-8"))
+
+    sync_times = [row.last_sync_time for row in rows if row.last_sync_time]
+    return Generation(
+        token=digest.hexdigest()[:16],
+        last_modified=max(sync_times) if sync_times else None,
+    )
+
+
+def _build_table(session: Session, model) -> RecipeTable:
+    rows = session.scalars(select(model)).all()
+    # Sorted here rather than by the database, whose collation may not match
+    # the Python string order keyset cursors are compared in
+    items = tuple(sorted((row.as_dict() for row in rows), key=itemgetter("url")))
+
+    by_slug: Dict[str, dict] = {}
+    for item in items:
+        if item["slug"] is not None:
+            by_slug.setdefault(item["slug"], item)
+
+    return RecipeTable(
+        items=items,
+        by_slug=MappingProxyType(by_slug),
+        by_url=MappingProxyType({item["url"]: item for item in items}),
+        html_by_url=MappingProxyType({row.url: row.recipe_html for row in rows}),
+    )
+
+
+def build_snapshot(session: Session, generation: Generation) -> Snapshot:
+    """Load every recipe table and contributor into a new snapshot."""
+    recipes = {
+        recipe_type: _build_table(session, model)
+        for recipe_type, model in SNAPSHOT_TYPES.items()
+    }
+    contributors = tuple(
+        sorted(
+            (c.as_dict() for c in session.scalars(select(Contributor))),
+            key=itemgetter("username"),
+        )
+    )
+
+    return Snapshot(
+        generation=generation,
+        recipes=MappingProxyType(recipes),
+        contributors=contributors,
+        contributors_by_username=MappingProxyType(
+            {c["username"]: c for c in contributors}
+        ),
+    )
+
+
+class _SnapshotState:
+    def __init__(self):
+        self.snapshot: Optional[Snapshot] = None
+        self.file = None
+        self.next_check = 0.0
+        self.rebuilding = False
+        self.lock = threading.Lock()
+
+
+class SnapshotStore:
+    """Holds the current snapshot for an app and swaps it after a sync.
+
+    The snapshot is built when the app is created, if the database is ready
+    (``SNAPSHOT_PRELOAD``), and otherwise by the first request. The sync
+    metadata is then consulted at most once every
+    ``SNAPSHOT_CHECK_INTERVAL`` seconds. When the generation has changed a
+    new snapshot is built in a background thread
+    (``SNAPSHOT_BACKGROUND_REBUILD``) while requests keep getting the old
+    one, and the reference is swapped once it is ready.
+
+    When ``SNAPSHOT_FILE`` is set the app runs in snapshot mode instead:
+    the file is memory-mapped at startup and served as the snapshot for
+    the life of the process, without consulting the database.
+    """
+
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("SNAPSHOT_CHECK_INTERVAL", 30)
+        app.config.setdefault("SNAPSHOT_FILE", None)
+        app.config.setdefault("SNAPSHOT_PRELOAD", True)
+        app.config.setdefault("SNAPSHOT_BACKGROUND_REBUILD", True)
+        state = _SnapshotState()
+        app.extensions["snapshot"] = state
+        if app.config["SNAPSHOT_FILE"]:
+            from .snapshot_file import SnapshotFile
+
+            state.file = SnapshotFile(app.config["SNAPSHOT_FILE"])
+            state.snapshot = state.file.snapshot
+            state.next_check = math.inf
+            logger.info(f"Serving snapshot file {app.config['SNAPSHOT_FILE']}")
+        elif app.config["SNAPSHOT_PRELOAD"]:
+            with app.app_context():
+                try:
+                    self.get()
+                except SQLAlchemyError as e:
+                    # e.g. before the first migration; the first request retries
+                    logger.warning(f"Recipe snapshot not built at startup: {e}")
+
+    @staticmethod
+    def _state() -> _SnapshotState:
+        return current_app.extensions["snapshot"]
+
+    def get(self) -> Snapshot:
+        """Return the current snapshot, starting a rebuild if the data changed.
+
+        Only the first build blocks. Later checks are made by one request at
+        a time while the others return the current snapshot.
+        """
+        state = self._state()
+        snapshot = state.snapshot
+        if snapshot is None:
+            return self._build_first(state)
+        if time.monotonic() < state.next_check or state.rebuilding:
+            return snapshot
+        if not state.lock.acquire(blocking=False):
+            return snapshot
+
+        try:
+            generation = current_generation(db.session)
+            interval = current_app.config["SNAPSHOT_CHECK_INTERVAL"]
+            state.next_check = time.monotonic() + interval
+            if generation == snapshot.generation:
+                return snapshot
+
+            state.rebuilding = True
+            if current_app.config["SNAPSHOT_BACKGROUND_REBUILD"]:
+                app = current_app._get_current_object()
+                threading.Thread(
+                    target=self._rebuild_in_context,
+                    args=(app, state, generation),
+                    name="snapshot-rebuild",
+                    daemon=True,
+                ).start()
+                return snapshot
+            self._rebuild(state, generation)
+            return state.snapshot
+        finally:
+            state.lock.release()
+
+    @staticmethod
+    def _build_first(state: _SnapshotState) -> Snapshot:
+        with state.lock:
+            # Another thread may have built it while we waited for the lock
+            if state.snapshot is None:
+                generation = current_generation(db.session)
+                logger.info(f"Building recipe snapshot for generation {generation}")
+                state.snapshot = build_snapshot(db.session, generation)
+                interval = current_app.config["SNAPSHOT_CHECK_INTERVAL"]
+                state.next_check = time.monotonic() + interval
+            return state.snapshot
+
+    @staticmethod
+    def _rebuild(state: _SnapshotState, generation: Generation):
+        try:
+            logger.info(f"Rebuilding recipe snapshot for generation {generation}")
+            state.snapshot = build_snapshot(db.session, generation)
+        except Exception:
+            # Keep serving the old snapshot; the next check tries again
+            logger.exception("Failed to rebuild the recipe snapshot")
+        finally:
+            state.rebuilding = False
+
+    def _rebuild_in_context(self, app, state: _SnapshotState, generation: Generation):
+        with app.app_context():
+            self._rebuild(state, generation)
+
+    def invalidate(self):
+        """Drop the current snapshot so the next request rebuilds it."""
+        state = self._state()
+        if state.file is not None:
+            return
+        with state.lock:
+            state.snapshot = None
+            state.next_check = 0.0
+
+
+snapshots = SnapshotStore()
+
+
+def get_snapshot() -> Snapshot:
+    """Return the snapshot for the current app."""
+    return snapshots.get()
+
+
+def get_snapshot_file():
+    """Return the app's SnapshotFile in snapshot mode, otherwise None."""
+    return current_app.extensions["snapshot"].file
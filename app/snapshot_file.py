@@ -0,0 +1,342 @@
+"""Single-file, read-only snapshot of the dataset for database-free nodes.
+
+The file holds the same records as the NDJSON export, one JSON blob per
+recipe and contributor, followed by a JSON index::
+
+    header  MAGIC, format version, index offset, index length
+    blobs   recipe and contributor records, back to back
+    index   generation, export header, (url, slug, offset, length) per
+            recipe, (username, offset, length) per contributor, and
+            the contribution edges, in export order
+
+The reader memory-maps the file and decodes a record only when it is
+accessed, so workers forked from a preloading master share the pages
+rather than each holding a copy of every recipe.
+"""
+
+import json
+import mmap
+import os
+import re
+import struct
+from collections.abc import Mapping, Sequence
+from datetime import datetime
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Callable, Dict, Iterator, List, Optional
+from typing import Sequence as Seq
+
+from sqlalchemy.orm import Session
+
+from .export import export_records
+from .models import INTERNAL_COLUMNS
+from .snapshot import (
+    SNAPSHOT_TYPES,
+    Generation,
+    RecipeTable,
+    Snapshot,
+    current_generation,
+)
+from .utils import CONTRIBUTION_TABLES, FULL_TACO_COMPONENTS, INGREDIENTS
+
+MAGIC = b"TACOSNAP"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sIQQ")
+
+# Fields of a stored record that are not part of the API rows
+RECORD_FIELDS = {"kind", "recipe_type"}
+
+
+class SnapshotFileError(ValueError):
+    """Raised when a file is not a snapshot this version can read."""
+
+
+def write_snapshot_file(
+    session: Session, path: str, generation: Optional[Generation] = None
+) -> Generation:
+    """Write the current data to a snapshot file at path.
+
+    The file is written next to path and moved into place, so running
+    readers keep their mapping of the old file until they reopen it.
+    """
+    generation = generation or current_generation(session)
+    index = {
+        "generation": {
+            "token": generation.token,
+            "last_modified": (
+                generation.last_modified.isoformat()
+                if generation.last_modified
+                else None
+            ),
+        },
+        "header": None,
+        "recipes": {recipe_type: [] for recipe_type in SNAPSHOT_TYPES},
+        "contributors": [],
+        "contributions": {category: [] for category in CONTRIBUTION_TABLES},
+    }
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, 0, 0))
+        for record in export_records(session, generation, ["recipe_html"]):
+            kind = record["kind"]
+            if kind == "export":
+                index["header"] = record
+                continue
+            if kind == "contribution":
+                edges = index["contributions"][record["category"]]
+                edges.append([record["username"], record["url"]])
+                continue
+
+            blob = json.dumps(record).encode("utf-8")
+            offset = out.tell()
+            out.write(blob)
+            if kind == "recipe":
+                entries = index["recipes"][record["recipe_type"]]
+                entries.append([record["url"], record["slug"], offset, len(blob)])
+            else:
+                entries = index["contributors"]
+                entries.append([record["username"], offset, len(blob)])
+
+        index_blob = json.dumps(index).encode("utf-8")
+        index_offset = out.tell()
+        out.write(index_blob)
+        out.seek(0)
+        out.write(HEADER.pack(MAGIC, FORMAT_VERSION, index_offset, len(index_blob)))
+
+    os.replace(tmp_path, path)
+    return generation
+
+
+class _Rows(Sequence):
+    """Rows decoded from the file on access, in index order."""
+
+    def __init__(self, spans: List[tuple], decode: Callable[[int, int], dict]):
+        self._spans = spans
+        self._decode = decode
+
+    def __len__(self):
+        return len(self._spans)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._decode(*span) for span in self._spans[i]]
+        return self._decode(*self._spans[i])
+
+
+class _RowMap(Mapping):
+    """Lookup of rows by a key, pointing into a ``_Rows`` sequence."""
+
+    def __init__(self, rows, positions: Dict[str, int], value=None):
+        self._rows = rows
+        self._positions = positions
+        self._value = value
+
+    def __getitem__(self, key):
+        row = self._rows[self._positions[key]]
+        return self._value(row) if self._value else row
+
+    def __iter__(self):
+        return iter(self._positions)
+
+    def __len__(self):
+        return len(self._positions)
+
+
+class SnapshotFile:
+    """A memory-mapped snapshot file and the lookups served from it."""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            self._buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._buffer) < HEADER.size:
+            raise SnapshotFileError(f"{path} is not a snapshot file")
+        magic, version, index_offset, index_length = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise SnapshotFileError(f"{path} is not a snapshot file")
+        if version != FORMAT_VERSION:
+            raise SnapshotFileError(
+                f"{path} has snapshot format {version}, expected {FORMAT_VERSION}"
+            )
+
+        index = json.loads(self._buffer[index_offset : index_offset + index_length])
+        last_modified = index["generation"]["last_modified"]
+        self.generation = Generation(
+            token=index["generation"]["token"],
+            last_modified=(
+                datetime.fromisoformat(last_modified) if last_modified else None
+            ),
+        )
+        self.header = index["header"]
+        self._recipe_index = index["recipes"]
+        self._contributor_index = index["contributors"]
+        self._contributions = index["contributions"]
+
+        self._by_username: Dict[str, List[tuple]] = {}
+        self._by_recipe: Dict[tuple, List[str]] = {}
+        for category, edges in self._contributions.items():
+            for username, url in edges:
+                self._by_username.setdefault(username, []).append((category, url))
+                self._by_recipe.setdefault((category, url), []).append(username)
+
+        self.snapshot = self._build_snapshot()
+
+    def _record(self, offset: int, length: int) -> dict:
+        return json.loads(self._buffer[offset : offset + length])
+
+    def _row(self, offset: int, length: int) -> dict:
+        record = self._record(offset, length)
+        return {
+            k: v
+            for k, v in record.items()
+            if k not in RECORD_FIELDS and k not in INTERNAL_COLUMNS
+        }
+
+    def _build_table(self, entries: List[list]) -> RecipeTable:
+        # In Python string order, which keyset cursors compare in, rather
+        # than the order the database exported the rows in
+        entries = sorted(entries, key=itemgetter(0))
+        rows = _Rows([(offset, length) for _, _, offset, length in entries], self._row)
+        by_slug: Dict[str, int] = {}
+        for position, (_, slug, _, _) in enumerate(entries):
+            if slug is not None:
+                by_slug.setdefault(slug, position)
+        by_url = {url: position for position, (url, *_) in enumerate(entries)}
+
+        # The rendered HTML is an internal column, so read it from the record
+        records = _Rows(rows._spans, self._record)
+        return RecipeTable(
+            items=rows,
+            by_slug=_RowMap(rows, by_slug),
+            by_url=_RowMap(rows, by_url),
+            html_by_url=_RowMap(
+                records, by_url, value=lambda record: record.get("recipe_html")
+            ),
+        )
+
+    def _build_snapshot(self) -> Snapshot:
+        recipes = {
+            recipe_type: self._build_table(self._recipe_index.get(recipe_type, []))
+            for recipe_type in SNAPSHOT_TYPES
+        }
+        contributor_index = sorted(self._contributor_index, key=itemgetter(0))
+        contributors = _Rows(
+            [(offset, length) for _, offset, length in contributor_index],
+            self._row,
+        )
+        return Snapshot(
+            generation=self.generation,
+            recipes=MappingProxyType(recipes),
+            contributors=contributors,
+            contributors_by_username=_RowMap(
+                contributors,
+                {username: i for i, (username, *_) in enumerate(contributor_index)},
+            ),
+        )
+
+    def full_taco(self, item: dict) -> dict:
+        """A full taco row with its ingredient rows included."""
+        taco = dict(item)
+        for name in FULL_TACO_COMPONENTS:
+            url = item.get(f"{name}_url")
+            component = self.snapshot.recipes[INGREDIENTS[name]].by_url.get(url)
+            if url and component:
+                taco[name] = component
+        return taco
+
+    def contributions(self, username: str) -> Dict[str, List[str]]:
+        """The names of a contributor's recipes, grouped by category."""
+        contributions: Dict[str, List[str]] = {c: [] for c in CONTRIBUTION_TABLES}
+        for category, url in self._by_username.get(username, []):
+            recipe = self.snapshot.recipes[category].by_url.get(url)
+            if recipe:
+                contributions[category].append(recipe["name"])
+        for names in contributions.values():
+            names.sort(key=lambda name: name or "")
+        return contributions
+
+    def recipe_contributors(
+        self, urls_by_category: Dict[str, Seq[str]]
+    ) -> Dict[str, List[dict]]:
+        """The contributors of each recipe, keyed by recipe url."""
+        by_username = self.snapshot.contributors_by_username
+        contributors = {}
+        for category, urls in urls_by_category.items():
+            for url in urls:
+                usernames = sorted(self._by_recipe.get((category, url), []))
+                if usernames:
+                    contributors[url] = [
+                        by_username[u] for u in usernames if u in by_username
+                    ]
+        return contributors
+
+    def search(
+        self,
+        query: str,
+        recipe_type: Optional[str] = None,
+        limit: int = 20,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """Rank recipes containing every query term, name matches first.
+
+        A plain scan standing in for the database's full-text index: terms
+        match case-insensitively anywhere in the name or recipe, without
+        stemming.
+        """
+        terms = re.findall(r"\w+", query.lower())
+        if not terms:
+            return []
+        highlight = re.compile("|".join(map(re.escape, terms)), re.IGNORECASE)
+
+        results = []
+        recipe_types = [recipe_type] if recipe_type else list(SNAPSHOT_TYPES)
+        for current_type in recipe_types:
+            for row in self.snapshot.recipes[current_type].items:
+                name = (row["name"] or "").lower()
+                text = row["recipe"] or ""
+                lowered = text.lower()
+                if not all(term in name or term in lowered for term in terms):
+                    continue
+                rank = sum(10 * name.count(t) + lowered.count(t) for t in terms)
+                results.append(
+                    {
+                        "recipe_type": current_type,
+                        "url": row["url"],
+                        "slug": row["slug"],
+                        "name": row["name"],
+                        "snippet": _snippet(text, highlight),
+                        "rank": float(rank),
+                    }
+                )
+
+        results.sort(key=lambda r: (-r["rank"], r["url"]))
+        return results[offset : offset + limit]
+
+    def export_lines(self) -> Iterator[str]:
+        """Yield the export the file was written from as NDJSON lines."""
+        yield json.dumps(self.header) + "\n"
+        for recipe_type in SNAPSHOT_TYPES:
+            for _, _, offset, length in self._recipe_index.get(recipe_type, []):
+                record = self._record(offset, length)
+                public = {k: v for k, v in record.items() if k not in INTERNAL_COLUMNS}
+                yield json.dumps(public) + "\n"
+        for _, offset, length in self._contributor_index:
+            yield self._buffer[offset : offset + length].decode("utf-8") + "\n"
+        for category, edges in self._contributions.items():
+            for username, url in edges:
+                record = {
+                    "kind": "contribution",
+                    "category": category,
+                    "username": username,
+                    "url": url,
+                }
+                yield json.dumps(record) + "\n"
+
+
+def _snippet(text: str, highlight: re.Pattern, width: int = 60) -> str:
+    match = highlight.search(text)
+    start = max(0, match.start() - width) if match else 0
+    end = min(len(text), (match.end() if match else 0) + width)
+    excerpt = highlight.sub(lambda m: f"<b>{m.group(0)}</b>", text[start:end])
+    return ("…" if start else "") + excerpt + ("…" if end < len(text) else "")
@@ -0,0 +1,224 @@
+"""Where the recipe loader reads the tacofancy repository from.
+
+Every source lists the repository's files with their git blob SHAs and
+reads a file given its path and SHA, so the loader can skip unchanged
+files whichever source synced them last:
+
+- ``GitHubSource`` lists the tree and fetches blobs through the GitHub API.
+- ``GitHubArchiveSource`` downloads the tarball of the synced commit once.
+- ``ArchiveSource`` and ``CheckoutSource`` read a local tarball, zipball
+  or checkout, so syncs can run offline.
+
+Archives are streamed and only their markdown files are kept, in memory;
+nothing is unpacked to disk.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import tarfile
+import zipfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Dict, Optional, Tuple
+
+import requests
+from github import GithubException
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_SUFFIXES = (".tar.gz", ".tgz", ".tar", ".zip")
+DOWNLOAD_TIMEOUT = 60
+
+
+def git_blob_sha(data: bytes) -> str:
+    """The SHA git and GitHub give a file with this content."""
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+
+def tree_digest(shas: Dict[str, str]) -> str:
+    """A commit-sized SHA for a set of files that has no commit of its own."""
+    listing = "".join(f"{path} {sha}\n" for path, sha in sorted(shas.items()))
+    return hashlib.sha1(listing.encode("utf-8")).hexdigest()
+
+
+def _is_markdown(path: str) -> bool:
+    return path.endswith(".md")
+
+
+def _strip_top_level(files: Dict[str, bytes]) -> Dict[str, bytes]:
+    """Drop the directory GitHub archives wrap the repository in."""
+    tops = {path.split("/", 1)[0] for path in files}
+    if len(tops) == 1 and all("/" in path for path in files):
+        return {path.split("/", 1)[1]: data for path, data in files.items()}
+    return files
+
+
+def read_tarball(fileobj: BinaryIO) -> Tuple[Optional[str], Dict[str, bytes]]:
+    """Read the markdown files and commit SHA from a streamed tarball.
+
+    GitHub records the commit in the archive's pax ``comment`` header.
+    """
+    files = {}
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tar:
+        for member in tar:
+            if member.isfile() and _is_markdown(member.name):
+                files[member.name] = tar.extractfile(member).read()
+        commit = tar.pax_headers.get("comment")
+    return commit, _strip_top_level(files)
+
+
+def read_zipball(fileobj: BinaryIO) -> Tuple[Optional[str], Dict[str, bytes]]:
+    """Read the markdown files and commit SHA from a zipball.
+
+    GitHub records the commit in the archive comment.
+    """
+    with zipfile.ZipFile(fileobj) as archive:
+        files = {
+            info.filename: archive.read(info)
+            for info in archive.infolist()
+            if not info.is_dir() and _is_markdown(info.filename)
+        }
+        commit = archive.comment.decode("ascii", "replace").strip() or None
+    return commit, _strip_top_level(files)
+
+
+class GitHubSource:
+    """Lists the tree and fetches each changed blob through the API."""
+
+    remote = True
+
+    def __init__(self, repo, branch: str, github=None):
+        self.repo = repo
+        self.branch = branch
+        self.github = github
+
+    def remaining_requests(self) -> Optional[int]:
+        """Requests left before the rate limit resets, when known."""
+        return self.github.rate_limiting[0] if self.github else None
+
+    def head_sha(self) -> str:
+        return self.repo.get_branch(self.branch).commit.sha
+
+    def list_files(self, ref: str) -> Dict[str, str]:
+        tree = self.repo.get_git_tree(ref, recursive=True)
+        return {item.path: item.sha for item in tree.tree if item.type == "blob"}
+
+    def read(self, path: str, sha: str) -> Optional[str]:
+        try:
+            blob = self.repo.get_git_blob(sha)
+            return base64.b64decode(blob.content).decode("utf-8")
+        except GithubException as e:
+            logger.warning(f"Could not fetch {path}: {e}")
+            return None
+
+
+class _MemorySource(ABC):
+    """Serves files read into memory by ``_read``."""
+
+    remote = False
+
+    def __init__(self):
+        self._files: Optional[Dict[str, bytes]] = None
+        self._commit: Optional[str] = None
+
+    @abstractmethod
+    def _read(self, ref: Optional[str]) -> Tuple[Optional[str], Dict[str, bytes]]:
+        """Read the files at ref, returning (commit SHA or None, files by path)."""
+
+    def _ensure_read(self, ref: Optional[str] = None):
+        if self._files is None:
+            self._commit, self._files = self._read(ref)
+
+    def head_sha(self) -> str:
+        self._ensure_read()
+        return self._commit or tree_digest(self.list_files(None))
+
+    def remaining_requests(self) -> Optional[int]:
+        return None
+
+    def list_files(self, ref: Optional[str]) -> Dict[str, str]:
+        self._ensure_read(ref)
+        return {path: git_blob_sha(data) for path, data in self._files.items()}
+
+    def read(self, path: str, sha: str) -> Optional[str]:
+        self._ensure_read()
+        data = self._files.get(path)
+        if data is None or git_blob_sha(data) != sha:
+            logger.warning(f"Could not read {path} at {sha}")
+            return None
+        return data.decode("utf-8")
+
+
+class GitHubArchiveSource(_MemorySource):
+    """Downloads the tarball of the synced commit in a single request."""
+
+    def __init__(self, repo, branch: str):
+        super().__init__()
+        self.repo = repo
+        self.branch = branch
+        self._ref: Optional[str] = None
+
+    def head_sha(self) -> str:
+        return self.repo.get_branch(self.branch).commit.sha
+
+    def list_files(self, ref: Optional[str]) -> Dict[str, str]:
+        if ref != self._ref:
+            # A later sync of the same loader needs that commit's archive
+            self._files = None
+            self._ref = ref
+        return super().list_files(ref)
+
+    def _read(self, ref: Optional[str]) -> Tuple[Optional[str], Dict[str, bytes]]:
+        url = self.repo.get_archive_link("tarball", ref or self.branch)
+        with requests.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return read_tarball(response.raw)
+
+
+class ArchiveSource(_MemorySource):
+    """Reads a local tarball or zipball, such as one saved from GitHub."""
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def _read(self, ref: Optional[str]) -> Tuple[Optional[str], Dict[str, bytes]]:
+        with open(self.path, "rb") as f:
+            if self.path.endswith(".zip"):
+                return read_zipball(f)
+            return read_tarball(f)
+
+
+class CheckoutSource(_MemorySource):
+    """Reads a local checkout of the repository.
+
+    A working tree can differ from any commit, so its SHA is a digest of
+    the files rather than the checked-out commit.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self.path = path
+
+    def _read(self, ref: Optional[str]) -> Tuple[Optional[str], Dict[str, bytes]]:
+        files = {}
+        for root, dirs, names in os.walk(self.path):
+            dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+            for name in names:
+                if _is_markdown(name):
+                    full_path = os.path.join(root, name)
+                    path = os.path.relpath(full_path, self.path).replace(os.sep, "/")
+                    with open(full_path, "rb") as f:
+                        files[path] = f.read()
+        return None, files
+
+
+def local_source(path: str):
+    """The source for a local archive or checkout path."""
+    if os.path.isdir(path):
+        return CheckoutSource(path)
+    if path.endswith(ARCHIVE_SUFFIXES):
+        return ArchiveSource(path)
+    raise ValueError(f"{path} is not a directory or a .tar.gz, .tgz, .tar or .zip")
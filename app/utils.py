@@ -1,35 +1,189 @@
 import random
 import re
+import threading
 import unicodedata
-from typing import Dict, Optional, Union
-
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
-
-from .models import BaseLayer, Condiment, Mixin, Seasoning, Shell
-
-
-def fetch_random(model, session: Session):
-    """Fetch a random instance of the given model."""
-    count = session.scalar(select(func.count()).select_from(model))
-    if count:
-        offset = random.randint(0, count - 1)
-        stmt = select(model).offset(offset).limit(1)
-        return session.scalar(stmt)
-    return None
-
-
-def fetch_random_ingredients(
-    session: Session,
-) -> Dict[str, Optional[Union[BaseLayer, Condiment, Mixin, Seasoning, Shell]]]:
-    """Fetch random ingredients for a taco."""
-    return {
-        "seasoning": fetch_random(Seasoning, session),
-        "condiment": fetch_random(Condiment, session),
-        "mixin": fetch_random(Mixin, session),
-        "base_layer": fetch_random(BaseLayer, session),
-        "shell": fetch_random(Shell, session),
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import markdown2 as md
+from sqlalchemy import literal, select, union
+from sqlalchemy.orm import Session, joinedload
+
+from .models import (
+    BaseLayer,
+    Condiment,
+    Contributor,
+    FullTaco,
+    Mixin,
+    Seasoning,
+    Shell,
+    contrib_baselayer,
+    contrib_condiment,
+    contrib_fulltaco,
+    contrib_mixin,
+    contrib_seasoning,
+    contrib_shell,
+)
+from .snapshot import Snapshot
+
+# Ingredient keys in a random taco, mapped to their recipe types
+INGREDIENTS = {
+    "seasoning": "seasonings",
+    "condiment": "condiments",
+    "mixin": "mixins",
+    "base_layer": "base_layers",
+    "shell": "shells",
+}
+
+# Ingredient relationships of a full taco
+FULL_TACO_COMPONENTS = ("base_layer", "condiment", "mixin", "seasoning", "shell")
+
+# Contribution category -> (association table, recipe model, recipe url column)
+CONTRIBUTION_TABLES = {
+    "base_layers": (contrib_baselayer, BaseLayer, contrib_baselayer.c.baselayer_url),
+    "condiments": (contrib_condiment, Condiment, contrib_condiment.c.condiment_url),
+    "mixins": (contrib_mixin, Mixin, contrib_mixin.c.mixin_url),
+    "shells": (contrib_shell, Shell, contrib_shell.c.shell_url),
+    "seasonings": (contrib_seasoning, Seasoning, contrib_seasoning.c.seasoning_url),
+    "full_tacos": (contrib_fulltaco, FullTaco, contrib_fulltaco.c.full_taco_url),
+}
+
+
+def pick_random(items: Sequence, count: int = 1, unique: bool = False) -> List:
+    """Pick count items uniformly at random, optionally without replacement."""
+    if not items:
+        return []
+    if unique:
+        return random.sample(items, count)
+    return random.choices(items, k=count)
+
+
+def random_ingredients(
+    snapshot: Snapshot, count: int = 1, unique: bool = False
+) -> List[Dict[str, dict]]:
+    """Pick count random tacos made of one of each ingredient type.
+
+    Ingredient types with no recipes are left out of the tacos.
+    """
+    picks = {
+        name: pick_random(snapshot.recipes[recipe_type].items, count, unique)
+        for name, recipe_type in INGREDIENTS.items()
     }
+    return [
+        {name: items[i] for name, items in picks.items() if items} for i in range(count)
+    ]
+
+
+def full_taco_query():
+    """Select full tacos with all their ingredients joined in."""
+    return select(FullTaco).options(
+        *(joinedload(getattr(FullTaco, name)) for name in FULL_TACO_COMPONENTS)
+    )
+
+
+def fetch_full_tacos(session: Session, urls: Sequence[str]) -> List[FullTaco]:
+    """Fetch full tacos by url, with their ingredients, in a single query.
+
+    The result follows the order of ``urls``, repeats included; unknown urls
+    are skipped.
+    """
+    stmt = full_taco_query().where(FullTaco.url.in_(set(urls)))
+    tacos = {taco.url: taco for taco in session.scalars(stmt).unique()}
+    return [tacos[url] for url in urls if url in tacos]
+
+
+def contributions_query(username: Optional[str] = None):
+    """Select (category, username, name, slug, url) for every contribution.
+
+    All association tables are combined with a UNION so a contributor's
+    recipes of every category come back from one statement.
+    """
+    selects = []
+    for category, (table, model, url_column) in CONTRIBUTION_TABLES.items():
+        stmt = select(
+            literal(category).label("category"),
+            table.c.contrib_username.label("username"),
+            model.name.label("name"),
+            model.slug.label("slug"),
+            model.url.label("url"),
+        ).join(model, model.url == url_column)
+        if username is not None:
+            stmt = stmt.where(table.c.contrib_username == username)
+        selects.append(stmt)
+    return union(*selects).order_by("category", "name")
+
+
+def fetch_contributions(session: Session, username: str) -> Dict[str, List[str]]:
+    """Fetch the names of a contributor's recipes, grouped by category."""
+    contributions: Dict[str, List[str]] = {c: [] for c in CONTRIBUTION_TABLES}
+    for row in session.execute(contributions_query(username)):
+        contributions[row.category].append(row.name)
+    return contributions
+
+
+def fetch_recipe_contributors(
+    session: Session, urls_by_category: Dict[str, Sequence[str]]
+) -> Dict[str, List[dict]]:
+    """Fetch the contributors of many recipes in one query, keyed by recipe url."""
+    selects = []
+    for category, urls in urls_by_category.items():
+        table, _, url_column = CONTRIBUTION_TABLES[category]
+        if urls:
+            selects.append(
+                select(
+                    url_column.label("url"),
+                    Contributor.username,
+                    Contributor.gravatar,
+                    Contributor.full_name,
+                )
+                .join(Contributor, Contributor.username == table.c.contrib_username)
+                .where(url_column.in_(urls))
+            )
+
+    contributors: Dict[str, List[dict]] = {}
+    if not selects:
+        return contributors
+
+    for row in session.execute(union(*selects).order_by("username")):
+        contributors.setdefault(row.url, []).append(
+            {
+                "username": row.username,
+                "gravatar": row.gravatar,
+                "full_name": row.full_name,
+            }
+        )
+    return contributors
+
+
+class LRUCache:
+    """A small thread-safe least-recently-used cache."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+def render_markdown(text: str) -> str:
+    """Render recipe markdown to HTML, escaping any raw HTML in the source."""
+    return md.markdown(text, safe_mode="escape")
 
 
 def slugify(value: str) -> str:
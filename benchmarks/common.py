@@ -0,0 +1,123 @@
+"""Shared helpers for the benchmark scripts."""
+
+import random
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List
+
+from sqlalchemy import event, insert
+
+from app import create_app
+from app.config import TestingConfig
+from app.models import MAPPER, Contributor, FullTaco, db
+from app.utils import CONTRIBUTION_TABLES
+
+RECIPE_TYPES = {**MAPPER, "full_tacos": FullTaco}
+
+
+def create_bench_app(database_uri: str = "sqlite://", **config):
+    """Create an app against the given database with quiet logging."""
+    overrides = {"SQLALCHEMY_DATABASE_URI": database_uri, **config}
+    bench_config = type("BenchConfig", (TestingConfig,), overrides)
+    return create_app(bench_config)
+
+
+def recipe_url(recipe_type: str, i: int) -> str:
+    return f"https://example.com/{recipe_type}/{i}.md"
+
+
+def seed_dataset(
+    recipes_per_type: int = 100,
+    contributors: int = 50,
+    edges_per_contributor: int = 10,
+    recipe_size: int = 2000,
+    seed: int = 0,
+) -> Dict[str, int]:
+    """Bulk insert a synthetic dataset and return the row counts."""
+    rng = random.Random(seed)
+    body = ("Lorem ipsum dolor sit amet, taco fancy. " * (recipe_size // 40 + 1))[
+        :recipe_size
+    ]
+
+    for recipe_type, model in RECIPE_TYPES.items():
+        db.session.execute(
+            insert(model),
+            [
+                {
+                    "url": recipe_url(recipe_type, i),
+                    "name": f"{recipe_type} {i}",
+                    "slug": f"{recipe_type}_{i}",
+                    "recipe": f"# {recipe_type} {i}\n\n{body}",
+                }
+                for i in range(recipes_per_type)
+            ],
+        )
+
+    usernames = [f"user{i}" for i in range(contributors)]
+    db.session.execute(
+        insert(Contributor),
+        [{"username": u, "full_name": u.title()} for u in usernames],
+    )
+
+    edges = 0
+    categories = list(CONTRIBUTION_TABLES)
+    for username in usernames:
+        rows: Dict[str, List[dict]] = {c: [] for c in categories}
+        picked = set()
+        for _ in range(edges_per_contributor):
+            category = rng.choice(categories)
+            i = rng.randrange(recipes_per_type)
+            if (category, i) in picked:
+                continue
+            picked.add((category, i))
+            url_column = CONTRIBUTION_TABLES[category][2]
+            rows[category].append(
+                {"contrib_username": username, url_column.key: recipe_url(category, i)}
+            )
+        for category, values in rows.items():
+            if values:
+                db.session.execute(insert(CONTRIBUTION_TABLES[category][0]), values)
+                edges += len(values)
+
+    db.session.commit()
+    return {
+        "recipes": recipes_per_type * len(RECIPE_TYPES),
+        "contributors": contributors,
+        "edges": edges,
+    }
+
+
+@contextmanager
+def count_statements():
+    """Collect the SQL statements executed inside the block."""
+    statements: List[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
+
+
+def time_call(fn: Callable, repeat: int = 5) -> float:
+    """Median wall-clock milliseconds of calling fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def print_table(headers: List[str], rows: List[list]):
+    """Print rows as an aligned plain-text table."""
+    cells = [headers] + [[str(c) for c in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(headers))]
+    for n, row in enumerate(cells):
+        print("  ".join(c.ljust(w) for c, w in zip(row, widths)))
+        if n == 0:
+            print("  ".join("-" * w for w in widths))
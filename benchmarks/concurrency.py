@@ -0,0 +1,184 @@
+"""Measure throughput of several gunicorn workers against the bundled tacos.db.
+
+The database is copied to a temporary directory, then each engine profile is
+served by gunicorn and driven by concurrent clients hitting endpoints that
+query the database, while a writer thread records change events the way a
+sync would. The "baseline"
+profile is SQLite's defaults (rollback journal, no mmap, small cache);
+"tuned" is the app's default configuration.
+"""
+
+import argparse
+import os
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .common import print_table
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROFILES = {
+    "baseline": {
+        "SQLITE_JOURNAL_MODE": "DELETE",
+        "SQLITE_SYNCHRONOUS": "FULL",
+        "SQLITE_MMAP_SIZE": "0",
+        "SQLITE_CACHE_SIZE": "-2000",
+    },
+    "tuned": {},
+}
+
+PATHS = [
+    "/search/?q=chicken",
+    "/search/?q=pork&type=base_layers",
+    "/search/?q=lime",
+    "/random/?full-taco=true",
+]
+
+
+def wait_for(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=5)
+            return
+        except requests.RequestException:
+            time.sleep(0.2)
+    raise RuntimeError(f"Server at {url} did not start")
+
+
+def write_changes(path: str, stop: threading.Event, interval: float):
+    """Keep committing small sync-like transactions until stopped."""
+    conn = sqlite3.connect(path, timeout=30)
+    n = 0
+    while not stop.is_set():
+        with conn:
+            run_id = conn.execute(
+                "INSERT INTO sync_run (commit_sha, sync_time) "
+                "VALUES (?, CURRENT_TIMESTAMP)",
+                (f"bench{n}",),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO change_event (sync_run_id, recipe_type, url, action) "
+                "VALUES (?, 'base_layers', ?, 'updated')",
+                [(run_id, f"https://example.com/{n}/{i}") for i in range(20)],
+            )
+        n += 1
+        time.sleep(interval)
+    conn.close()
+
+
+def run_load(base_url: str, clients: int, requests_per_client: int):
+    """Return (latencies in ms, error count, elapsed seconds)."""
+
+    def client(i):
+        session = requests.Session()
+        latencies, errors = [], 0
+        for n in range(requests_per_client):
+            path = PATHS[(i + n) % len(PATHS)]
+            start = time.perf_counter()
+            response = session.get(base_url + path)
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code >= 500
+        return latencies, errors
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(clients) as pool:
+        results = list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - start
+
+    latencies = [ms for result in results for ms in result[0]]
+    return latencies, sum(result[1] for result in results), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="per client")
+    parser.add_argument("--port", type=int, default=5089)
+    parser.add_argument(
+        "--write-interval",
+        type=float,
+        default=0.01,
+        help="seconds between writer transactions; negative disables the writer",
+    )
+    args = parser.parse_args()
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile, overrides in PROFILES.items():
+            path = os.path.join(tmp, f"{profile}.db")
+            shutil.copy(os.path.join(ROOT, "tacos.db"), path)
+
+            env = {
+                **os.environ,
+                **overrides,
+                "DATABASE_URL": f"sqlite:///{path}",
+                "PYTHONPATH": ROOT,
+            }
+            server = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "gunicorn",
+                    "--workers",
+                    str(args.workers),
+                    "--bind",
+                    f"127.0.0.1:{args.port}",
+                    "--log-level",
+                    "warning",
+                    "wsgi:app",
+                ],
+                cwd=ROOT,
+                env=env,
+            )
+            base_url = f"http://127.0.0.1:{args.port}"
+            stop = threading.Event()
+            writer = None
+            try:
+                wait_for(base_url + "/changes/")
+                # Let every worker build its snapshot before measuring
+                run_load(base_url, args.workers * 2, len(PATHS))
+
+                if args.write_interval >= 0:
+                    writer = threading.Thread(
+                        target=write_changes, args=(path, stop, args.write_interval)
+                    )
+                    writer.start()
+                latencies, errors, elapsed = run_load(
+                    base_url, args.clients, args.requests
+                )
+            finally:
+                stop.set()
+                if writer:
+                    writer.join()
+                server.terminate()
+                server.wait()
+
+            latencies.sort()
+            rows.append(
+                [
+                    profile,
+                    f"{len(latencies) / elapsed:.0f}",
+                    f"{statistics.median(latencies):.1f}",
+                    f"{latencies[int(len(latencies) * 0.95)]:.1f}",
+                    f"{latencies[-1]:.1f}",
+                    errors,
+                ]
+            )
+
+    print(f"{args.workers} workers, {args.clients} clients")
+    print_table(["profile", "req/s", "p50 ms", "p95 ms", "max ms", "errors"], rows)
+
+
+if __name__ == "__main__":
+    main()
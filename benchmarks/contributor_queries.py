@@ -0,0 +1,76 @@
+"""Compare query counts for contributor lookups.
+
+The lazy path reads each relationship collection the way
+``ContributorResource`` used to; the union path is ``fetch_contributions``.
+"""
+
+import argparse
+
+from app.models import Contributor, db
+from app.utils import fetch_contributions
+
+from .common import (
+    count_statements,
+    create_bench_app,
+    print_table,
+    seed_dataset,
+    time_call,
+)
+
+
+def lazy_contributions(username):
+    contributor = db.session.get(Contributor, username)
+    return {
+        "base_layers": [b.name for b in contributor.base_layers],
+        "condiments": [c.name for c in contributor.condiments],
+        "mixins": [m.name for m in contributor.mixins],
+        "shells": [s.name for s in contributor.shells],
+        "seasonings": [s.name for s in contributor.seasonings],
+        "full_tacos": [f.name for f in contributor.full_tacos],
+    }
+
+
+def union_contributions(username):
+    return fetch_contributions(db.session, username)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--contributors", type=int, default=200)
+    parser.add_argument("--edges", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        counts = seed_dataset(args.recipes, args.contributors, args.edges)
+        print(f"Dataset: {counts}")
+        usernames = [f"user{i}" for i in range(args.contributors)]
+
+        rows = []
+        for label, lookup in [
+            ("lazy relationships", lazy_contributions),
+            ("union query", union_contributions),
+        ]:
+
+            def run():
+                for username in usernames:
+                    lookup(username)
+                    db.session.expunge_all()
+
+            with count_statements() as statements:
+                run()
+            rows.append(
+                [
+                    label,
+                    f"{len(statements) / len(usernames):.1f}",
+                    f"{time_call(run, repeat=3) / len(usernames):.3f}",
+                ]
+            )
+
+        print_table(["lookup", "queries/contributor", "ms/contributor"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Compare requests per second for the recipe endpoints before and after.
+
+Three variants of the recipe routes are served side by side:
+
+- ``/baseline``: the per-type Flask-RESTful Resources as the project
+  started, querying the database on every request and returning dicts for
+  Flask-RESTful to encode.
+- ``/restful``: Flask-RESTful Resources wrapping today's view functions,
+  which isolates the cost of Flask-RESTful's dispatch alone.
+- the app's own registry-driven routes.
+
+Requests run one at a time in-process, as a single worker would handle
+them.
+"""
+
+import argparse
+import time
+
+from flask import Blueprint
+from flask_restful import Api, Resource
+
+from app.api import get_recipe, get_recipe_list
+from app.models import MAPPER, db
+
+from .common import create_bench_app, print_table, seed_dataset
+
+
+class BaselineListResource(Resource):
+    """The original recipe list resource."""
+
+    def __init__(self, recipe_type):
+        self.recipe_type = recipe_type
+        self.model = MAPPER[recipe_type]
+
+    def get(self):
+        items = self.model.query.all()
+        return [item.as_dict() for item in items]
+
+
+class BaselineResource(Resource):
+    """The original recipe detail resource."""
+
+    def __init__(self, recipe_type):
+        self.recipe_type = recipe_type
+        self.model = MAPPER[recipe_type]
+
+    def get(self, slug):
+        item = self.model.query.filter_by(slug=slug).first()
+        if not item:
+            return {
+                "status": "error",
+                "message": f'{self.recipe_type} with the slug "{slug}" not found',
+            }, 404
+        return item.as_dict()
+
+
+class RestfulListResource(Resource):
+    def __init__(self, recipe_type):
+        self.recipe_type = recipe_type
+        self.model = MAPPER[recipe_type]
+
+    def get(self):
+        return get_recipe_list(self.recipe_type)
+
+
+class RestfulResource(Resource):
+    def __init__(self, recipe_type):
+        self.recipe_type = recipe_type
+        self.model = MAPPER[recipe_type]
+
+    def get(self, slug):
+        return get_recipe(self.recipe_type, slug)
+
+
+def mount_resources(app, name, list_resource, detail_resource):
+    """Register Flask-RESTful variants of the recipe routes under /name."""
+    blueprint = Blueprint(name, __name__, url_prefix=f"/{name}")
+    api = Api(blueprint)
+    for recipe_type in MAPPER:
+        api.add_resource(
+            list_resource,
+            f"/{recipe_type}/",
+            endpoint=f"{recipe_type}_list",
+            resource_class_args=(recipe_type,),
+        )
+        api.add_resource(
+            detail_resource,
+            f"/{recipe_type}/<slug>/",
+            endpoint=f"{recipe_type}_detail",
+            resource_class_args=(recipe_type,),
+        )
+    app.register_blueprint(blueprint)
+
+
+def requests_per_second(client, url: str, requests: int) -> float:
+    headers = {"Accept-Encoding": "gzip"}
+    for _ in range(50):
+        client.get(url, headers=headers)
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.get(url, headers=headers)
+    return requests / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    # Keep snapshot checks out of the measurement, as in production
+    app = create_bench_app(SNAPSHOT_CHECK_INTERVAL=3600)
+    mount_resources(app, "baseline", BaselineListResource, BaselineResource)
+    mount_resources(app, "restful", RestfulListResource, RestfulResource)
+    with app.app_context():
+        db.create_all()
+        print(f"Dataset: {seed_dataset(args.recipes, contributors=1)}")
+
+    client = app.test_client()
+    rows = []
+    for label, path in [
+        ("detail", "/base_layers/base_layers_0/"),
+        ("full list", "/base_layers/"),
+        ("not found", "/base_layers/missing/"),
+    ]:
+        baseline = requests_per_second(client, "/baseline" + path, args.requests)
+        restful = requests_per_second(client, "/restful" + path, args.requests)
+        direct = requests_per_second(client, path, args.requests)
+        rows.append(
+            [
+                label,
+                f"{baseline:.0f}",
+                f"{restful:.0f}",
+                f"{direct:.0f}",
+                f"{direct / baseline:.2f}x",
+                f"{direct / restful:.2f}x",
+            ]
+        )
+
+    print_table(
+        [
+            "request",
+            "baseline rps",
+            "flask-restful rps",
+            "direct rps",
+            "vs baseline",
+            "vs flask-restful",
+        ],
+        rows,
+    )
+
+
+if __name__ == "__main__":
+    main()
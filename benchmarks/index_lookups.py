@@ -0,0 +1,116 @@
+"""Measure slug and association lookups with and without indexes.
+
+Seeds a file-backed SQLite database (about 100k recipe rows by default),
+times the lookups with the indexes declared on the models dropped, then
+recreates the indexes and times them again.
+"""
+
+import argparse
+import os
+import random
+import tempfile
+
+from sqlalchemy import select
+
+from app.models import db
+from app.utils import CONTRIBUTION_TABLES, contributions_query
+
+from .common import (
+    RECIPE_TYPES,
+    create_bench_app,
+    print_table,
+    recipe_url,
+    seed_dataset,
+    time_call,
+)
+
+INDEXED_TABLES = [model.__table__ for model in RECIPE_TYPES.values()] + [
+    table for table, _, _ in CONTRIBUTION_TABLES.values()
+]
+
+
+def lookups(recipes_per_type, contributors, samples=200):
+    rng = random.Random(1)
+    slugs = [
+        (model, f"{recipe_type}_{rng.randrange(recipes_per_type)}")
+        for recipe_type, model in RECIPE_TYPES.items()
+        for _ in range(samples // len(RECIPE_TYPES))
+    ]
+    urls = [
+        (category, recipe_url(category, rng.randrange(recipes_per_type)))
+        for category in CONTRIBUTION_TABLES
+        for _ in range(samples // len(CONTRIBUTION_TABLES))
+    ]
+    usernames = [f"user{rng.randrange(contributors)}" for _ in range(samples)]
+
+    def slug_lookup():
+        for model, slug in slugs:
+            db.session.scalars(select(model).filter_by(slug=slug)).first()
+
+    def recipe_contributors():
+        for category, url in urls:
+            table, _, url_column = CONTRIBUTION_TABLES[category]
+            db.session.execute(
+                select(table.c.contrib_username).where(url_column == url)
+            ).all()
+
+    def user_contributions():
+        for username in usernames:
+            db.session.execute(contributions_query(username)).all()
+
+    return {
+        "slug lookup": (slug_lookup, len(slugs)),
+        "recipe -> contributors": (recipe_contributors, len(urls)),
+        "contributor -> recipes": (user_contributions, len(usernames)),
+    }
+
+
+def measure(cases):
+    return {
+        label: time_call(fn, repeat=3) / n * 1000 for label, (fn, n) in cases.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=17000, help="rows per type")
+    parser.add_argument("--contributors", type=int, default=2000)
+    parser.add_argument("--edges", type=int, default=25)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_bench_app(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        with app.app_context():
+            db.create_all()
+            for table in INDEXED_TABLES:
+                for index in table.indexes:
+                    index.drop(db.engine)
+
+            counts = seed_dataset(
+                args.recipes, args.contributors, args.edges, recipe_size=200
+            )
+            print(f"Dataset: {counts}")
+            cases = lookups(args.recipes, args.contributors)
+
+            before = measure(cases)
+            for table in INDEXED_TABLES:
+                for index in table.indexes:
+                    index.create(db.engine)
+            after = measure(cases)
+
+            print_table(
+                ["lookup", "no index (us)", "indexed (us)", "speedup"],
+                [
+                    [
+                        label,
+                        f"{before[label]:.1f}",
+                        f"{after[label]:.1f}",
+                        f"{before[label] / after[label]:.0f}x",
+                    ]
+                    for label in cases
+                ],
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Compare JSON, MessagePack and CBOR encode time and size per endpoint.
+
+Each endpoint is requested once as JSON to get its payload, which is then
+re-encoded with every available serializer. Sizes are shown uncompressed
+and gzipped, as served to clients that accept gzip.
+"""
+
+import argparse
+import gzip
+import json
+
+from app import search
+from app.models import db
+from app.responses import ENCODERS, MEDIA_SUFFIXES
+
+from .common import create_bench_app, print_table, seed_dataset, time_call
+
+
+def endpoints(recipes: int):
+    """A sample URL for every GET endpoint."""
+    items = ",".join(f"base_layers:base_layers_{i}" for i in range(min(recipes, 50)))
+    return [
+        "/random/?count=10",
+        "/base_layers/",
+        "/base_layers/?limit=100",
+        "/base_layers/base_layers_0/",
+        "/base_layers/?format=html&limit=20",
+        "/bulk/?items=" + items,
+        "/search/?q=taco&limit=100",
+        "/changes/",
+        "/contributions/",
+        "/contributions/user0/",
+        "/contributors/base_layers/",
+        "/contributors/base_layers/base_layers_0/",
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=500)
+    parser.add_argument("--contributors", type=int, default=200)
+    parser.add_argument("--edges", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_bench_app()
+    with app.app_context():
+        db.create_all()
+        counts = seed_dataset(args.recipes, args.contributors, args.edges)
+        search.rebuild_index(db.session)
+        print(f"Dataset: {counts}")
+        print(f"Formats: {', '.join(ENCODERS)}")
+
+        client = app.test_client()
+        rows = []
+        for url in endpoints(args.recipes):
+            response = client.get(url, headers={"Accept-Encoding": ""})
+            data = json.loads(response.data)
+            for mimetype, encode in ENCODERS.items():
+                with app.test_request_context():
+                    body = encode(data)
+                    encode_ms = time_call(lambda: encode(data), repeat=args.repeat)
+                rows.append(
+                    [
+                        url[:48],
+                        MEDIA_SUFFIXES.get(mimetype, "json"),
+                        f"{encode_ms:.3f}",
+                        len(body),
+                        len(gzip.compress(body, mtime=0)),
+                    ]
+                )
+
+        print_table(["endpoint", "format", "encode ms", "bytes", "gzip bytes"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Time a full recipe sync against a local fake of the GitHub API.
+
+The fake serves the repository, branch, tree and blob endpoints the loader
+uses for a synthetic repository, adding a fixed latency to every response
+to stand in for the network. Each profile runs a full sync into an empty
+in-memory database: "sequential" fetches one file at a time, as the loader
+used to; the others fetch concurrently, optionally parsing in worker
+processes. Request throttling is off so the pipeline itself is measured.
+"""
+
+import argparse
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+from app.github_loader import BRANCH, REPO_NAME, REPO_OWNER, TacoFancyLoader
+from app.models import db
+from app.pipeline import PipelineOptions
+from app.sources import git_blob_sha
+
+from .common import create_bench_app, print_table
+
+CATEGORIES = [
+    "base_layers",
+    "condiments",
+    "mixins",
+    "seasonings",
+    "shells",
+    "full_tacos",
+]
+HEAD_SHA = "f" * 40
+
+PROFILES = {
+    "sequential": PipelineOptions(fetch_workers=1, requests_per_second=0),
+    "4 fetchers": PipelineOptions(fetch_workers=4, requests_per_second=0),
+    "8 fetchers": PipelineOptions(fetch_workers=8, requests_per_second=0),
+    "8 fetchers, 2 parsers": PipelineOptions(
+        fetch_workers=8, parse_workers=2, requests_per_second=0
+    ),
+}
+
+
+def build_repository(recipes_per_category: int):
+    """Markdown files by path, shaped like tacofancy recipes."""
+    files = {}
+    for category in CATEGORIES:
+        for i in range(recipes_per_category):
+            steps = "\n".join(f"* Step {n} for recipe {i}" for n in range(20))
+            files[f"{category}/recipe_{i}.md"] = (
+                f"Recipe {i}\n{'=' * 10}\n\n__Ingredients__\n\n{steps}\n"
+            ).encode("utf-8")
+    return files
+
+
+def make_handler(files, latency: float):
+    blobs = {git_blob_sha(data): data for data in files.values()}
+    tree = [
+        {"path": path, "mode": "100644", "type": "blob", "sha": git_blob_sha(data)}
+        for path, data in files.items()
+    ]
+    repo_path = f"/repos/{REPO_OWNER}/{REPO_NAME}"
+
+    class FakeGitHub(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body are written separately; don't wait on delayed ACKs
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            time.sleep(latency)
+            base = f"http://{self.headers['Host']}{repo_path}"
+            path = urlparse(self.path).path
+            if path == repo_path:
+                body = {"name": REPO_NAME, "full_name": f"{REPO_OWNER}/{REPO_NAME}"}
+                body["url"] = base
+            elif path == f"{repo_path}/branches/{BRANCH}":
+                body = {"name": BRANCH, "commit": {"sha": HEAD_SHA}}
+            elif path == f"{repo_path}/git/trees/{HEAD_SHA}":
+                body = {"sha": HEAD_SHA, "tree": tree, "truncated": False}
+            elif path.startswith(f"{repo_path}/git/blobs/"):
+                sha = path.rsplit("/", 1)[1]
+                content = base64.b64encode(blobs[sha]).decode("ascii")
+                body = {"sha": sha, "content": content, "encoding": "base64"}
+            else:
+                self.send_error(404)
+                return
+
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.send_header("X-RateLimit-Limit", "5000")
+            self.send_header("X-RateLimit-Remaining", "5000")
+            self.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+            self.end_headers()
+            self.wfile.write(payload)
+
+    return FakeGitHub
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipes", type=int, default=100, help="per category")
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="seconds added per request"
+    )
+    args = parser.parse_args()
+
+    files = build_repository(args.recipes)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(files, args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    rows = []
+    try:
+        for profile, options in PROFILES.items():
+            app = create_bench_app()
+            with app.app_context():
+                db.create_all()
+                loader = TacoFancyLoader(options=options, api_url=api_url)
+                start = time.perf_counter()
+                loader.load_all_recipes()
+                elapsed = time.perf_counter() - start
+                rows.append([profile, f"{elapsed:.2f}", f"{len(files) / elapsed:.0f}"])
+    finally:
+        server.shutdown()
+
+    print(f"{len(files)} files, {args.latency * 1000:.0f} ms per request")
+    print_table(["profile", "full sync s", "files/s"], rows)
+
+
+if __name__ == "__main__":
+    main()
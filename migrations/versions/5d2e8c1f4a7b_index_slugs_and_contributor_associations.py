@@ -0,0 +1,74 @@
+"""Index slugs and make contributor associations unique
+
+Revision ID: 5d2e8c1f4a7b
+Revises: bebbb2c0f0e7
+Create Date: 2026-10-17 21:10:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "5d2e8c1f4a7b"
+down_revision = "bebbb2c0f0e7"
+branch_labels = None
+depends_on = None
+
+RECIPE_TABLES = ["base_layer", "condiment", "mixin", "seasoning", "shell", "full_taco"]
+
+# (association table, short name, recipe url column)
+ASSOCIATION_TABLES = [
+    ("contrib_fulltaco", "fulltaco", "full_taco_url"),
+    ("contrib_shell", "shell", "shell_url"),
+    ("contrib_seasoning", "seasoning", "seasoning_url"),
+    ("contrib_mixin", "mixin", "mixin_url"),
+    ("contrib_condiment", "condiment", "condiment_url"),
+    ("contrib_baselayer", "baselayer", "baselayer_url"),
+]
+
+
+def _deduplicate(table_name, url_column):
+    """Collapse repeated (contributor, recipe) rows so they can be unique."""
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column("contrib_username"), sa.column(url_column))
+    rows = bind.execute(
+        sa.select(table.c.contrib_username, table.c[url_column]).distinct()
+    ).all()
+    bind.execute(table.delete())
+    if rows:
+        bind.execute(
+            table.insert(),
+            [{"contrib_username": u, url_column: url} for u, url in rows],
+        )
+
+
+def upgrade():
+    for table_name in RECIPE_TABLES:
+        op.create_index(
+            op.f(f"ix_{table_name}_slug"), table_name, ["slug"], unique=False
+        )
+
+    for table_name, short_name, url_column in ASSOCIATION_TABLES:
+        _deduplicate(table_name, url_column)
+        op.create_index(
+            f"uq_contrib_{short_name}",
+            table_name,
+            ["contrib_username", url_column],
+            unique=True,
+        )
+        op.create_index(
+            f"ix_contrib_{short_name}_{url_column}",
+            table_name,
+            [url_column],
+            unique=False,
+        )
+
+
+def downgrade():
+    for table_name, short_name, url_column in ASSOCIATION_TABLES:
+        op.drop_index(f"ix_contrib_{short_name}_{url_column}", table_name=table_name)
+        op.drop_index(f"uq_contrib_{short_name}", table_name=table_name)
+
+    for table_name in RECIPE_TABLES:
+        op.drop_index(op.f(f"ix_{table_name}_slug"), table_name=table_name)
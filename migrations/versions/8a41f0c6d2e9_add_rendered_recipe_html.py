@@ -0,0 +1,48 @@
+"""Add rendered recipe HTML to recipe tables
+
+Revision ID: 8a41f0c6d2e9
+Revises: 5d2e8c1f4a7b
+Create Date: 2026-10-17 21:40:00.000000
+
+"""
+
+import markdown2
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8a41f0c6d2e9"
+down_revision = "5d2e8c1f4a7b"
+branch_labels = None
+depends_on = None
+
+RECIPE_TABLES = ["base_layer", "condiment", "mixin", "seasoning", "shell", "full_taco"]
+
+
+def upgrade():
+    bind = op.get_bind()
+    for table_name in RECIPE_TABLES:
+        op.add_column(table_name, sa.Column("recipe_html", sa.Text(), nullable=True))
+
+        # Render existing recipes so pages don't wait for the next sync
+        table = sa.table(
+            table_name,
+            sa.column("url"),
+            sa.column("recipe"),
+            sa.column("recipe_html"),
+        )
+        rows = bind.execute(
+            sa.select(table.c.url, table.c.recipe).where(table.c.recipe.isnot(None))
+        ).all()
+        for url, recipe in rows:
+            bind.execute(
+                table.update()
+                .where(table.c.url == url)
+                .values(recipe_html=markdown2.markdown(recipe, safe_mode="escape"))
+            )
+
+
+def downgrade():
+    for table_name in RECIPE_TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("recipe_html")
@@ -0,0 +1,57 @@
+"""Add full-text recipe search index
+
+Revision ID: c37b9e5a1d04
+Revises: 8a41f0c6d2e9
+Create Date: 2026-10-17 22:05:00.000000
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c37b9e5a1d04"
+down_revision = "8a41f0c6d2e9"
+branch_labels = None
+depends_on = None
+
+# recipe type -> recipe table
+RECIPE_TABLES = {
+    "base_layers": "base_layer",
+    "condiments": "condiment",
+    "mixins": "mixin",
+    "seasonings": "seasoning",
+    "shells": "shell",
+    "full_tacos": "full_taco",
+}
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            "CREATE TABLE recipe_search ("
+            "url VARCHAR PRIMARY KEY, recipe_type VARCHAR NOT NULL, slug VARCHAR, "
+            "name VARCHAR, recipe TEXT, "
+            "document tsvector GENERATED ALWAYS AS ("
+            "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+            "setweight(to_tsvector('english', coalesce(recipe, '')), 'B')) STORED)"
+        )
+        op.execute(
+            "CREATE INDEX ix_recipe_search_document "
+            "ON recipe_search USING GIN (document)"
+        )
+    else:
+        op.execute(
+            "CREATE VIRTUAL TABLE recipe_search USING fts5("
+            "recipe_type UNINDEXED, url UNINDEXED, slug UNINDEXED, name, recipe, "
+            "tokenize = 'porter unicode61')"
+        )
+
+    for recipe_type, table_name in RECIPE_TABLES.items():
+        op.execute(
+            "INSERT INTO recipe_search (recipe_type, url, slug, name, recipe) "
+            f"SELECT '{recipe_type}', url, slug, name, recipe FROM {table_name}"
+        )
+
+
+def downgrade():
+    op.execute("DROP TABLE recipe_search")
@@ -0,0 +1,59 @@
+"""Add recipe content hashes and the change feed tables
+
+Revision ID: e1f7a93b2c56
+Revises: c37b9e5a1d04
+Create Date: 2026-10-17 23:10:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e1f7a93b2c56"
+down_revision = "c37b9e5a1d04"
+branch_labels = None
+depends_on = None
+
+RECIPE_TABLES = ["base_layer", "condiment", "mixin", "seasoning", "shell", "full_taco"]
+
+
+def upgrade():
+    # Existing rows get no hash, so the next sync rewrites them once
+    for table_name in RECIPE_TABLES:
+        op.add_column(
+            table_name, sa.Column("content_hash", sa.String(length=64), nullable=True)
+        )
+
+    op.create_table(
+        "sync_run",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("commit_sha", sa.String(length=40), nullable=False),
+        sa.Column("sync_time", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_sync_run_commit_sha", "sync_run", ["commit_sha"])
+
+    op.create_table(
+        "change_event",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("sync_run_id", sa.Integer(), nullable=False),
+        sa.Column("recipe_type", sa.String(length=50), nullable=False),
+        sa.Column("url", sa.String(), nullable=False),
+        sa.Column("slug", sa.String(), nullable=True),
+        sa.Column("action", sa.String(length=10), nullable=False),
+        sa.ForeignKeyConstraint(["sync_run_id"], ["sync_run.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_change_event_sync_run_id", "change_event", ["sync_run_id"])
+
+
+def downgrade():
+    op.drop_index("ix_change_event_sync_run_id", table_name="change_event")
+    op.drop_table("change_event")
+    op.drop_index("ix_sync_run_commit_sha", table_name="sync_run")
+    op.drop_table("sync_run")
+
+    for table_name in RECIPE_TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("content_hash")
@@ -0,0 +1,32 @@
+"""Add the upstream blob SHA to recipe tables
+
+Revision ID: f4b8d2a6c913
+Revises: e1f7a93b2c56
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f4b8d2a6c913"
+down_revision = "e1f7a93b2c56"
+branch_labels = None
+depends_on = None
+
+RECIPE_TABLES = ["base_layer", "condiment", "mixin", "seasoning", "shell", "full_taco"]
+
+
+def upgrade():
+    # Existing rows get no SHA, so the next sync fetches each file once
+    for table_name in RECIPE_TABLES:
+        op.add_column(
+            table_name, sa.Column("blob_sha", sa.String(length=40), nullable=True)
+        )
+
+
+def downgrade():
+    for table_name in RECIPE_TABLES:
+        with op.batch_alter_table(table_name) as batch_op:
+            batch_op.drop_column("blob_sha")
@@ -1,4 +1,5 @@
 import pytest
+from sqlalchemy import event
 
 from app import create_app
 from app.config import TestingConfig
@@ -33,3 +34,16 @@ def setup_db(app):
         transaction.rollback()
         connection.close()
         db.session.remove()
+
+
+@pytest.fixture
+def query_counter(app):
+    """Collect the SQL statements executed while the fixture is active."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", before_cursor_execute)
+    yield statements
+    event.remove(db.engine, "before_cursor_execute", before_cursor_execute)
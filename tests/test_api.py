@@ -1,8 +1,19 @@
 import json
 
 import pytest
+from flask import url_for
 
-from app.models import BaseLayer, Condiment, Mixin, Seasoning, Shell, db
+from app.models import (
+    BaseLayer,
+    Condiment,
+    Contributor,
+    FullTaco,
+    Mixin,
+    Seasoning,
+    Shell,
+    db,
+)
+from app.snapshot import snapshots
 
 
 @pytest.fixture
@@ -98,6 +109,19 @@ class TestAPI:
         assert data["status"] == "error"
         assert "not found" in data["message"]
 
+    def test_recipe_routes(self, app, client, sample_base_layer):
+        """Test recipe URLs keep their endpoints and only answer GET."""
+        with app.test_request_context():
+            assert url_for("baselayerslistresource") == "/base_layers/"
+            assert url_for("shellsresource", slug="corn") == "/shells/corn/"
+
+        assert client.post("/base_layers/").status_code == 405
+        assert client.get("/base_layers/carnitas").status_code == 308
+
+        response = client.get("/base_layers/?format=pdf")
+        assert response.status_code == 400
+        assert response.data == b'{"error": "Invalid format: pdf"}\n'
+
     def test_base_layers_list(self, client, sample_base_layer):
         """Test getting list of base layers."""
         response = client.get("/base_layers/")
@@ -106,6 +130,24 @@ class TestAPI:
         assert len(data) == 1
         assert data[0]["name"] == "Carnitas"
 
+    def test_recipe_html_format(self, client, sample_base_layer):
+        """Test rendered HTML is only included with ?format=html."""
+        sample_base_layer.recipe_html = "<p>Slow-cooked pork shoulder</p>"
+        db.session.flush()
+
+        data = json.loads(client.get("/base_layers/carnitas/").data)
+        assert "recipe_html" not in data
+
+        data = json.loads(client.get("/base_layers/carnitas/?format=html").data)
+        assert data["recipe_html"] == "<p>Slow-cooked pork shoulder</p>"
+        assert data["recipe"] == "Slow-cooked pork shoulder with spices"
+
+        data = json.loads(client.get("/base_layers/?format=html").data)
+        assert data[0]["recipe_html"] == "<p>Slow-cooked pork shoulder</p>"
+
+        response = client.get("/base_layers/?format=pdf")
+        assert response.status_code == 400
+
     def test_condiments_endpoint(self, client, sample_condiment):
         """Test condiments endpoints work."""
         # Test list
@@ -143,6 +185,102 @@ class TestAPI:
             assert key in data
             assert data[key]["name"] is not None
 
+    def test_random_batch(self, client, taco_ingredients):
+        """Test random endpoint returns a list of tacos with count."""
+        response = client.get("/random/?count=3")
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) == 3
+        assert all(taco["shell"]["slug"] == "corn_tortillas" for taco in data)
+
+    def test_random_batch_unique(self, client, taco_ingredients):
+        """Test unique sampling cannot exceed the available recipes."""
+        response = client.get("/random/?count=1&unique=true")
+        assert response.status_code == 200
+        assert len(json.loads(response.data)) == 1
+
+        response = client.get("/random/?count=2&unique=true")
+        assert response.status_code == 400
+
+        for value in ("false", "0", "no", ""):
+            response = client.get(f"/random/?count=2&unique={value}")
+            assert response.status_code == 200
+            assert len(json.loads(response.data)) == 2
+
+    def test_random_batch_unique_missing_type(self, client, sample_base_layer):
+        """Test empty ingredient types do not limit unique sampling."""
+        response = client.get("/random/?count=1&unique=true")
+        assert response.status_code == 200
+        assert json.loads(response.data) == [
+            {"base_layer": client.get("/base_layers/carnitas/").get_json()}
+        ]
+        assert client.get("/random/?count=2&unique=true").status_code == 400
+
+    def test_random_invalid_count(self, client, taco_ingredients):
+        """Test invalid counts are rejected."""
+        for count in ["zero", "0", "1000"]:
+            response = client.get(f"/random/?count={count}")
+            assert response.status_code == 400
+            assert "error" in json.loads(response.data)
+
+    def test_random_full_taco(self, client, taco_ingredients):
+        """Test random full taco includes its linked ingredients."""
+        response = client.get("/random/?full-taco=true")
+        assert response.status_code == 404
+
+        db.session.add(
+            FullTaco(
+                url="https://example.com/classic",
+                name="Classic",
+                slug="classic",
+                recipe="The classic taco",
+                base_layer_url="https://example.com/carnitas",
+                shell_url="https://example.com/corn_tortillas",
+            )
+        )
+        db.session.flush()
+        snapshots.invalidate()
+
+        response = client.get("/random/?full-taco=true&count=2")
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert len(data) == 2
+        assert data[0]["base_layer"]["name"] == "Carnitas"
+        assert data[0]["shell"]["name"] == "Corn Tortillas"
+        assert "condiment" not in data[0]
+
+    def test_random_full_taco_single_query(
+        self, app, client, taco_ingredients, query_counter
+    ):
+        """Test a random full taco and its ingredients load in one query."""
+        db.session.add(
+            FullTaco(
+                url="https://example.com/classic",
+                name="Classic",
+                slug="classic",
+                recipe="The classic taco",
+                base_layer_url="https://example.com/carnitas",
+                condiment_url="https://example.com/salsa_verde",
+                mixin_url="https://example.com/onions",
+                seasoning_url="https://example.com/cumin",
+                shell_url="https://example.com/corn_tortillas",
+            )
+        )
+        db.session.flush()
+        db.session.expire_all()
+
+        # Warm the snapshot so only the taco lookup is counted
+        app.config["SNAPSHOT_CHECK_INTERVAL"] = 3600
+        client.get("/random/")
+
+        query_counter.clear()
+
+        response = client.get("/random/?full-taco=true")
+        data = json.loads(response.data)
+        assert len(query_counter) == 1
+        assert data["mixin"]["name"] == "Diced Onions"
+        assert data["seasoning"]["name"] == "Cumin"
+
     def test_contributor_not_found(self, client):
         """Test getting non-existent contributor returns 404."""
         response = client.get("/contributions/nonexistent/")
@@ -150,6 +288,48 @@ class TestAPI:
         data = json.loads(response.data)
         assert "error" in data
 
+    def test_contributor_contributions(self, client, sample_base_layer):
+        """Test a contributor's contributions are listed by category."""
+        contributor = Contributor(username="sinker", full_name="Dan Sinker")
+        contributor.base_layers.append(sample_base_layer)
+        db.session.add(contributor)
+        db.session.flush()
+
+        response = client.get("/contributions/sinker/")
+        assert response.status_code == 200
+        assert "ETag" in response.headers
+        data = json.loads(response.data)
+        assert data["username"] == "sinker"
+        assert data["base_layers"] == ["Carnitas"]
+
+        response = client.get("/contributors/base_layers/carnitas/")
+        assert response.status_code == 200
+        assert json.loads(response.data)[0]["username"] == "sinker"
+
+    def test_contributor_contributions_single_query(
+        self, app, client, taco_ingredients, query_counter
+    ):
+        """Test every category, full tacos included, comes from one query."""
+        contributor = Contributor(username="sinker", full_name="Dan Sinker")
+        contributor.shells.append(taco_ingredients["shell"])
+        contributor.mixins.append(taco_ingredients["mixin"])
+        contributor.full_tacos.append(
+            FullTaco(url="https://example.com/classic", name="Classic", slug="classic")
+        )
+        db.session.add(contributor)
+        db.session.flush()
+
+        app.config["SNAPSHOT_CHECK_INTERVAL"] = 3600
+        client.get("/contributions/")
+        query_counter.clear()
+
+        data = json.loads(client.get("/contributions/sinker/").data)
+        assert len(query_counter) == 1
+        assert data["shells"] == ["Corn Tortillas"]
+        assert data["mixins"] == ["Diced Onions"]
+        assert data["full_tacos"] == ["Classic"]
+        assert data["condiments"] == []
+
     def test_invalid_recipe_type(self, client):
         """Test invalid recipe types return 404."""
         response = client.get("/contributors/invalid_type/")
@@ -169,7 +349,175 @@ class TestAPI:
         )
         assert response.status_code == 200
 
+    def test_permalink_batched_and_cached(
+        self, app, client, taco_ingredients, query_counter
+    ):
+        """Test permalink contributors load in one query and pages are cached."""
+        contributor = Contributor(
+            username="sinker", full_name="Dan Sinker", gravatar="https://g.com/x"
+        )
+        contributor.base_layers.append(taco_ingredients["base_layer"])
+        contributor.shells.append(taco_ingredients["shell"])
+        db.session.add(contributor)
+        db.session.flush()
+
+        app.config["SNAPSHOT_CHECK_INTERVAL"] = 3600
+        client.get("/base_layers/")
+        query_counter.clear()
+
+        path = "/carnitas/diced_onions/salsa_verde/cumin/corn_tortillas/"
+        response = client.get(path)
+        assert response.status_code == 200
+        assert len(query_counter) == 1
+        assert response.data.count(b"Dan Sinker") == 2
+        assert b"<p>Slow-cooked pork shoulder</p>" in response.data
+
+        assert client.get(path).data == response.data
+        assert len(query_counter) == 1
+        assert len(app.extensions["permalink_cache"]) == 1
+
     def test_permalink_invalid_path(self, client):
         """Test permalink route with invalid path redirects to index."""
         response = client.get("/invalid/path/")
         assert response.status_code == 302
+
+
+class TestListQueries:
+    """Test keyset pagination and field projection on list endpoints."""
+
+    @pytest.fixture
+    def shells(self):
+        for name in ["Flour", "Corn", "Lettuce", "Hard"]:
+            db.session.add(
+                Shell(
+                    url=f"https://example.com/{name.lower()}",
+                    name=name,
+                    slug=name.lower(),
+                    recipe=f"{name} shell recipe",
+                )
+            )
+        db.session.flush()
+
+    def test_keyset_pages(self, client, shells):
+        """Test following next links walks every row once, in url order."""
+        seen = []
+        url = "/shells/?limit=3&fields=slug"
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(row["slug"] for row in json.loads(response.data))
+            link = response.headers.get("Link")
+            url = link[1 : link.index(">")] if link else None
+
+        assert seen == ["corn", "flour", "hard", "lettuce"]
+
+    def test_projection(self, client, shells):
+        """Test only the requested fields are returned."""
+        data = json.loads(client.get("/shells/?fields=name,slug").data)
+        assert data[0] == {"name": "Corn", "slug": "corn"}
+
+        data = json.loads(
+            client.get("/shells/?fields=slug,recipe_html&format=html").data
+        )
+        assert set(data[0]) == {"slug", "recipe_html"}
+
+    def test_blank_fields(self, client, shells):
+        """Test a fields list with no names in it returns every field."""
+        full = client.get("/shells/").get_json()
+        assert client.get("/shells/?fields=,,").get_json() == full
+        assert client.get("/shells/?fields=%20").get_json() == full
+
+    def test_slug_and_contributor_listings(self, client, shells):
+        """Test the slug and contributor listings page the same way."""
+        response = client.get("/contributors/shells/?limit=2")
+        assert json.loads(response.data) == [
+            {"name": "Corn", "slug": "corn"},
+            {"name": "Flour", "slug": "flour"},
+        ]
+        assert 'rel="next"' in response.headers["Link"]
+
+        db.session.add_all([Contributor(username="b"), Contributor(username="a")])
+        db.session.flush()
+        snapshots.invalidate()
+        data = json.loads(client.get("/contributions/?limit=1&fields=username").data)
+        assert data == [{"username": "a"}]
+
+    def test_invalid_arguments(self, client, shells):
+        """Test bad limits, cursors and fields are rejected."""
+        assert client.get("/shells/?limit=0").status_code == 400
+        assert client.get("/shells/?after=%%%").status_code == 400
+        assert client.get("/shells/?fields=name,calories").status_code == 400
+        assert client.get("/shells/?fields=recipe_html").status_code == 400
+
+
+class TestBulkLookup:
+    """Test resolving many recipes in one request."""
+
+    def test_bulk_get(self, client, taco_ingredients):
+        """Test query-string pairs resolve with not-found markers."""
+        response = client.get(
+            "/bulk/?items=base_layers:carnitas,shells:corn_tortillas,shells:nope"
+        )
+        assert response.status_code == 200
+        data = json.loads(response.data)
+        assert data["base_layers"]["carnitas"]["name"] == "Carnitas"
+        assert data["shells"]["corn_tortillas"]["name"] == "Corn Tortillas"
+        assert data["shells"]["nope"] is None
+
+    def test_bulk_post(self, client, taco_ingredients):
+        """Test JSON body pairs resolve the same way."""
+        response = client.post(
+            "/bulk/",
+            json={
+                "items": [
+                    {"type": "mixins", "slug": "diced_onions"},
+                    {"type": "seasonings", "slug": "cumin"},
+                ]
+            },
+        )
+        data = json.loads(response.data)
+        assert data["mixins"]["diced_onions"]["slug"] == "diced_onions"
+        assert data["seasonings"]["cumin"]["name"] == "Cumin"
+
+    def test_bulk_not_modified(self, client, taco_ingredients):
+        """Test bulk lookups carry an ETag shared by GET and POST."""
+        response = client.get("/bulk/?items=shells:corn_tortillas")
+        etag = response.headers["ETag"]
+        response = client.get(
+            "/bulk/?items=shells:corn_tortillas", headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        response = client.post(
+            "/bulk/", json={"items": [{"type": "shells", "slug": "corn_tortillas"}]}
+        )
+        assert response.status_code == 200
+        assert response.headers["ETag"] == etag
+
+    def test_bulk_invalid(self, client):
+        """Test malformed requests are rejected."""
+        assert client.get("/bulk/").status_code == 400
+        assert client.get("/bulk/?items=desserts:flan").status_code == 400
+        assert client.post("/bulk/", json=["shells"]).status_code == 400
+        items = ",".join(f"shells:s{i}" for i in range(101))
+        assert client.get(f"/bulk/?items={items}").status_code == 400
+
+    @pytest.mark.parametrize(
+        "item",
+        [
+            {"type": ["shells"], "slug": "corn_tortillas"},
+            {"type": "shells", "slug": {"name": "corn_tortillas"}},
+            {"type": 3, "slug": "corn_tortillas"},
+            {"type": "shells", "slug": 3},
+            {"type": "shells"},
+            {"slug": "corn_tortillas"},
+        ],
+    )
+    def test_bulk_post_invalid_item(self, client, item):
+        """Test items without a string type and slug are rejected by index."""
+        response = client.post(
+            "/bulk/",
+            json={"items": [{"type": "shells", "slug": "corn_tortillas"}, item]},
+        )
+        assert response.status_code == 400
+        assert json.loads(response.data)["index"] == 1
@@ -0,0 +1,86 @@
+from app.bulk import BulkWriter, conflict_columns, copy_text
+from app.models import BaseLayer, Contributor, contrib_baselayer, db
+
+
+def contributor(username, **fields):
+    return {"username": username, "full_name": username.title(), **fields}
+
+
+class TestBulkWriter:
+    """Test batched INSERT ... ON CONFLICT writes."""
+
+    def test_upsert_updates_existing(self):
+        """Test upserts insert new rows and overwrite queued columns of old ones."""
+        db.session.add(Contributor(username="ana", full_name="Ana", gravatar="a.png"))
+        db.session.flush()
+
+        writer = BulkWriter(db.session)
+        writer.upsert(Contributor.__table__, {"username": "ana", "full_name": "Ana R"})
+        writer.upsert(Contributor.__table__, contributor("ben"))
+        writer.flush()
+        db.session.expire_all()
+
+        ana = db.session.get(Contributor, "ana")
+        assert (ana.full_name, ana.gravatar) == ("Ana R", "a.png")
+        assert db.session.get(Contributor, "ben").full_name == "Ben"
+
+    def test_insert_keeps_existing(self):
+        """Test plain inserts skip rows that already exist."""
+        db.session.add(Contributor(username="ana", full_name="Ana"))
+        db.session.flush()
+
+        writer = BulkWriter(db.session)
+        writer.insert(Contributor.__table__, contributor("ana", full_name="Other"))
+        writer.flush()
+        db.session.expire_all()
+        assert db.session.get(Contributor, "ana").full_name == "Ana"
+
+    def test_duplicates_collapse(self):
+        """Test a row queued twice in a batch is written once, merged."""
+        writer = BulkWriter(db.session)
+        writer.upsert(Contributor.__table__, {"username": "ana", "full_name": "Ana"})
+        writer.upsert(Contributor.__table__, {"username": "ana", "gravatar": "a.png"})
+        writer.flush()
+
+        ana = db.session.get(Contributor, "ana")
+        assert (ana.full_name, ana.gravatar) == ("Ana", "a.png")
+
+    def test_batches(self, query_counter):
+        """Test rows are written one statement per full batch."""
+        writer = BulkWriter(db.session, batch_size=2)
+        for i in range(5):
+            writer.upsert(Contributor.__table__, contributor(f"user{i}"))
+        assert len(query_counter) == 2
+
+        writer.flush()
+        assert len(query_counter) == 3
+        assert "ON CONFLICT" in query_counter[0]
+        assert db.session.scalar(db.select(db.func.count(Contributor.username))) == 5
+
+    def test_referenced_rows_first(self):
+        """Test a full batch of edges also writes the rows they reference."""
+        writer = BulkWriter(db.session, batch_size=2)
+        writer.upsert(BaseLayer.__table__, {"url": "u1", "name": "One"})
+        writer.upsert(Contributor.__table__, contributor("ana"))
+        for url in ("u1", "u1", "u2"):
+            row = {"contrib_username": "ana", "baselayer_url": url}
+            writer.insert(contrib_baselayer, row)
+        writer.flush()
+
+        edges = db.session.execute(db.select(contrib_baselayer)).all()
+        assert sorted(edges) == [("ana", "u1"), ("ana", "u2")]
+        assert db.session.get(BaseLayer, "u1").name == "One"
+
+    def test_conflict_columns(self):
+        """Test association tables are keyed by their unique index."""
+        assert conflict_columns(Contributor.__table__) == ("username",)
+        assert conflict_columns(contrib_baselayer) == (
+            "contrib_username",
+            "baselayer_url",
+        )
+
+    def test_copy_text(self):
+        """Test COPY rows escape separators and mark NULLs."""
+        rows = [{"url": "a\tb", "name": None, "recipe": "line\nback\\slash"}]
+        text = copy_text(rows, ["url", "name", "recipe"]).read()
+        assert text == "a\\tb\t\\N\tline\\nback\\\\slash\n"
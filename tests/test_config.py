@@ -0,0 +1,165 @@
+import os
+import shutil
+
+import pytest
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.config import Config, TestingConfig, engine_options
+from app.models import BaseLayer, db
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def config_for(uri, **overrides):
+    config = {k: getattr(Config, k) for k in dir(Config) if k.isupper()}
+    return {**config, "SQLALCHEMY_DATABASE_URI": uri, **overrides}
+
+
+def file_app(path, **overrides):
+    config = type(
+        "FileConfig",
+        (TestingConfig,),
+        {"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}", **overrides},
+    )
+    return create_app(config)
+
+
+class TestEngineConfig:
+    """Test per-backend engine tuning."""
+
+    def test_postgres_options(self):
+        """Test pooling and the statement timeout for PostgreSQL."""
+        options = engine_options(
+            config_for(
+                "postgresql://tacos@db/tacos", DB_POOL_SIZE=12, DB_STATEMENT_TIMEOUT=500
+            )
+        )
+        assert options["pool_size"] == 12
+        assert options["pool_pre_ping"] is True
+        assert options["connect_args"] == {"options": "-c statement_timeout=500"}
+
+        options = engine_options(
+            config_for("postgresql+psycopg2://db/tacos", DB_STATEMENT_TIMEOUT=0)
+        )
+        assert "connect_args" not in options
+
+    def test_sqlite_options(self):
+        """Test SQLite is left to the pragmas."""
+        assert engine_options(config_for("sqlite:///tacos.db")) == {}
+
+    def test_sqlite_pragmas(self, tmp_path):
+        """Test every SQLite connection is tuned."""
+        app = file_app(tmp_path / "tacos.db", SQLITE_CACHE_SIZE=-1234)
+        with app.app_context():
+            with db.engine.connect() as conn:
+                assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+                assert conn.execute(text("PRAGMA cache_size")).scalar() == -1234
+                assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            db.engine.dispose()
+
+    def test_sqlite_read_only(self, tmp_path):
+        """Test read-only connections can read but not write."""
+        path = tmp_path / "tacos.db"
+        writer = file_app(path)
+        with writer.app_context():
+            db.create_all()
+            db.session.add(BaseLayer(url="https://example.com/a", slug="a"))
+            db.session.commit()
+            db.session.remove()
+            db.engine.dispose()
+
+        reader = file_app(path, SQLITE_READ_ONLY=True)
+        with reader.app_context():
+            assert reader.test_client().get("/base_layers/a/").status_code == 200
+            db.session.add(BaseLayer(url="https://example.com/b", slug="b"))
+            with pytest.raises(OperationalError, match="readonly"):
+                db.session.commit()
+            db.session.rollback()
+            db.engine.dispose()
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    """An app whose replica holds different rows from its primary."""
+    primary, replica = tmp_path / "primary.db", tmp_path / "replica.db"
+    for path, slug in [(primary, "primary_layer"), (replica, "replica_layer")]:
+        engine = create_engine(f"sqlite:///{path}")
+        db.metadata.create_all(engine)
+        with engine.begin() as conn:
+            conn.execute(
+                insert(BaseLayer), {"url": f"https://example.com/{slug}", "slug": slug}
+            )
+        engine.dispose()
+
+    app = file_app(primary, SQLALCHEMY_REPLICA_URI=f"sqlite:///{replica}")
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+    # The bind's metadata is registered on the shared db; other apps lack the bind
+    db.metadatas.pop("replica", None)
+
+
+class TestReadReplica:
+    """Test GET requests read from the replica and everything else the primary."""
+
+    def test_get_reads_replica(self, replica_app):
+        """Test GET handlers are served from the replica."""
+        client = replica_app.test_client()
+        slugs = [row["slug"] for row in client.get("/base_layers/").get_json()]
+        assert slugs == ["replica_layer"]
+
+    def test_post_reads_primary(self, replica_app):
+        """Test other methods stay on the primary."""
+        response = replica_app.test_client().post(
+            "/bulk/",
+            json={"items": [{"type": "base_layers", "slug": "primary_layer"}]},
+        )
+        assert response.get_json()["base_layers"]["primary_layer"] is not None
+
+    def test_writes_go_to_primary(self, replica_app):
+        """Test loader-style writes outside a request land on the primary."""
+        with replica_app.app_context():
+            db.session.add(BaseLayer(url="https://example.com/new", slug="new"))
+            db.session.commit()
+            assert db.session.get(BaseLayer, "https://example.com/new")
+            with db.engines["replica"].connect() as conn:
+                assert conn.execute(text("SELECT slug FROM base_layer")).all() == [
+                    ("replica_layer",)
+                ]
+
+    def test_replica_read_only(self, replica_app):
+        """Test a SQLite replica refuses writes."""
+        with replica_app.app_context():
+            with db.engines["replica"].connect() as conn:
+                with pytest.raises(OperationalError, match="readonly"):
+                    conn.execute(text("DELETE FROM base_layer"))
+
+
+class TestBundledDatabase:
+    """Test the tacos.db shipped for local development."""
+
+    @pytest.fixture
+    def bundled(self, tmp_path):
+        path = tmp_path / "tacos.db"
+        shutil.copy(os.path.join(ROOT, "tacos.db"), path)
+        return path
+
+    def test_at_migration_head(self, bundled):
+        """Test the file is stamped with the latest migration."""
+        script = ScriptDirectory(os.path.join(ROOT, "migrations"))
+        engine = create_engine(f"sqlite:///{bundled}")
+        with engine.connect() as conn:
+            version = conn.execute(text("SELECT version_num FROM alembic_version"))
+            assert version.scalar_one() == script.get_current_head()
+        engine.dispose()
+
+    def test_serves_snapshot_endpoints(self, bundled):
+        """Test snapshot-backed endpoints work against the file as shipped."""
+        client = file_app(bundled, SNAPSHOT_PRELOAD=True).test_client()
+        assert client.get("/random/").status_code == 200
+        assert client.get("/base_layers/").status_code == 200
+        assert client.get("/contributions/").status_code == 200
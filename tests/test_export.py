@@ -0,0 +1,53 @@
+import json
+
+from app.models import INTERNAL_COLUMNS, BaseLayer, Contributor, SyncMetadata, db
+
+
+class TestExport:
+    """Test the NDJSON dataset export."""
+
+    def test_export_stream(self, client):
+        """Test the export contains a header, recipes, contributors and edges."""
+        base_layer = BaseLayer(
+            url="https://example.com/carnitas", name="Carnitas", slug="carnitas"
+        )
+        contributor = Contributor(username="sinker", full_name="Dan Sinker")
+        contributor.base_layers.append(base_layer)
+        db.session.add_all(
+            [
+                contributor,
+                SyncMetadata(sync_type="recipes", last_commit_sha="abc123"),
+            ]
+        )
+        db.session.flush()
+
+        response = client.get("/export/")
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        records = [json.loads(line) for line in response.data.splitlines()]
+
+        header = records[0]
+        assert header["kind"] == "export"
+        assert header["syncs"]["recipes"]["commit_sha"] == "abc123"
+        assert response.headers["ETag"] == f'"export-{header["generation"]}"'
+
+        kinds = [r["kind"] for r in records[1:]]
+        assert kinds == ["recipe", "contributor", "contribution"]
+        assert records[1]["recipe_type"] == "base_layers"
+        assert records[1]["slug"] == "carnitas"
+        # The same fields the API returns, without internal columns
+        api_fields = set(client.get("/base_layers/carnitas/").get_json())
+        assert set(records[1]) - {"kind", "recipe_type"} == api_fields
+        assert not INTERNAL_COLUMNS & set(records[1])
+        assert records[3] == {
+            "kind": "contribution",
+            "category": "base_layers",
+            "username": "sinker",
+            "url": "https://example.com/carnitas",
+        }
+
+    def test_export_not_modified(self, client):
+        """Test mirrors holding the current generation get a 304."""
+        etag = client.get("/export/").headers["ETag"]
+        response = client.get("/export/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
@@ -0,0 +1,377 @@
+import base64
+import hashlib
+from types import SimpleNamespace
+
+import pytest
+from github import GithubException
+
+from app.changes import changes_since
+from app.github_loader import BRANCH, TacoFancyLoader, recipe_url
+from app.models import (
+    BaseLayer,
+    ChangeEvent,
+    Contributor,
+    FullTaco,
+    SyncRun,
+    contrib_baselayer,
+    contrib_fulltaco,
+    db,
+)
+from app.pipeline import PipelineOptions
+from app.sources import GitHubSource
+
+
+class FakeRepo:
+    """In-memory stand-in for the PyGithub repository the loader reads."""
+
+    def __init__(self, files, head_sha="sha1"):
+        self.files = dict(files)
+        self.head_sha = head_sha
+        self.calls = []
+        self.fetched = []
+        self.commits = []
+        self.failing = set()
+
+    @staticmethod
+    def blob_sha(content):
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+    def get_git_tree(self, ref, recursive=False):
+        self.calls.append("get_git_tree")
+        items = [
+            SimpleNamespace(type="blob", path=path, sha=self.blob_sha(content))
+            for path, content in self.files.items()
+        ]
+        return SimpleNamespace(tree=items)
+
+    def get_git_blob(self, sha):
+        self.calls.append("get_git_blob")
+        if sha in self.failing:
+            raise GithubException(502, {"message": "Bad Gateway"}, None)
+        for path, content in self.files.items():
+            if self.blob_sha(content) == sha:
+                self.fetched.append(path)
+                encoded = base64.b64encode(content.encode("utf-8")).decode("ascii")
+                return SimpleNamespace(content=encoded, encoding="base64")
+        raise KeyError(sha)
+
+    def get_commits(self):
+        self.calls.append("get_commits")
+        return list(self.commits)
+
+    def get_branch(self, branch):
+        self.calls.append("get_branch")
+        return SimpleNamespace(commit=SimpleNamespace(sha=self.head_sha))
+
+
+@pytest.fixture
+def repo():
+    return FakeRepo(
+        {
+            "base_layers/carnitas.md": "# Carnitas\n\nSlow-cooked pork.",
+            "base_layers/tofu.md": "# Tofu\n\nCrispy tofu.",
+        }
+    )
+
+
+@pytest.fixture
+def loader(repo):
+    loader = TacoFancyLoader.__new__(TacoFancyLoader)
+    loader.repo = repo
+    loader.source = GitHubSource(repo, BRANCH)
+    loader.options = PipelineOptions(requests_per_second=0)
+    loader.sync_run = None
+    loader.tree = None
+    return loader
+
+
+def sync(loader, head_sha):
+    """Run a base layer sync of the given upstream commit."""
+    loader.repo.head_sha = head_sha
+    loader.start_sync_run()
+    loader.load_recipes_for_category("base_layers", BaseLayer)
+
+
+def commit(sha, login, *paths, avatar=None):
+    """A fake commit by a GitHub user touching the given files."""
+    return SimpleNamespace(
+        sha=sha,
+        author=SimpleNamespace(login=login, avatar_url=avatar or f"{login}.png"),
+        commit=SimpleNamespace(author=SimpleNamespace(name=login.title())),
+        files=[SimpleNamespace(filename=path) for path in paths],
+    )
+
+
+def actions(sync_sha):
+    run = db.session.scalars(db.select(SyncRun).filter_by(commit_sha=sync_sha)).one()
+    return sorted((event.action, event.slug) for event in run.changes)
+
+
+class TestRecipeSync:
+    """Test content hashing and change recording in the recipe loader."""
+
+    def test_initial_sync_creates(self, loader):
+        """Test new files are stored with a content hash and a created event."""
+        sync(loader, "sha1")
+
+        carnitas = db.session.get(BaseLayer, recipe_url("base_layers/carnitas.md"))
+        assert carnitas.name == "Carnitas"
+        assert len(carnitas.content_hash) == 64
+        assert actions("sha1") == [("created", "carnitas"), ("created", "tofu")]
+
+    def test_unchanged_files_skipped(self, loader, monkeypatch):
+        """Test a re-sync of identical content neither parses nor records."""
+        sync(loader, "sha1")
+
+        def fail(*args):
+            raise AssertionError("unchanged recipe was re-parsed")
+
+        monkeypatch.setattr(loader, "extract_recipe_data", fail)
+        sync(loader, "sha2")
+        assert actions("sha2") == []
+
+    def test_changed_and_removed_files(self, loader, repo):
+        """Test edits record updates and vanished files are deleted."""
+        sync(loader, "sha1")
+        repo.files["base_layers/carnitas.md"] = "# Carnitas\n\nNow with oranges."
+        del repo.files["base_layers/tofu.md"]
+        sync(loader, "sha2")
+
+        assert actions("sha2") == [("deleted", "tofu"), ("updated", "carnitas")]
+        assert db.session.get(BaseLayer, recipe_url("base_layers/tofu.md")) is None
+        carnitas = db.session.get(BaseLayer, recipe_url("base_layers/carnitas.md"))
+        assert "oranges" in carnitas.recipe
+
+    def test_removed_ingredient_unlinked(self, loader, repo):
+        """Test full tacos stop referencing a deleted ingredient."""
+        sync(loader, "sha1")
+        tofu_url = recipe_url("base_layers/tofu.md")
+        db.session.add(FullTaco(url="https://example.com/t", base_layer_url=tofu_url))
+        db.session.flush()
+
+        del repo.files["base_layers/tofu.md"]
+        sync(loader, "sha2")
+        assert db.session.get(FullTaco, "https://example.com/t").base_layer_url is None
+
+    def test_only_changed_blobs_fetched(self, loader, repo):
+        """Test a sync downloads only files whose blob SHA changed."""
+        sync(loader, "sha1")
+        assert sorted(repo.fetched) == [
+            "base_layers/carnitas.md",
+            "base_layers/tofu.md",
+        ]
+
+        repo.fetched.clear()
+        repo.files["base_layers/tofu.md"] = "# Tofu\n\nExtra crispy tofu."
+        sync(loader, "sha2")
+        assert repo.fetched == ["base_layers/tofu.md"]
+        assert actions("sha2") == [("updated", "tofu")]
+
+    def test_tree_fetched_once_per_run(self, loader, repo):
+        """Test every category of a run reads the same tree listing."""
+        loader.load_all_recipes()
+        assert repo.calls.count("get_git_tree") == 1
+
+    def test_unchanged_head_costs_one_call(self, loader, repo):
+        """Test a sync of an already synced head stops after the branch lookup."""
+        loader.load_all_recipes()
+        repo.calls.clear()
+
+        loader.load_all_recipes()
+        assert repo.calls == ["get_branch"]
+
+    def test_failed_fetch_retried(self, loader, repo):
+        """Test files that failed to download are fetched again at the same head."""
+        repo.failing.add(repo.blob_sha(repo.files["base_layers/tofu.md"]))
+        loader.load_all_recipes()
+        assert db.session.get(BaseLayer, recipe_url("base_layers/tofu.md")) is None
+
+        repo.failing.clear()
+        repo.fetched.clear()
+        loader.load_all_recipes()
+        assert repo.fetched == ["base_layers/tofu.md"]
+        assert db.session.get(BaseLayer, recipe_url("base_layers/tofu.md"))
+
+        repo.calls.clear()
+        loader.load_all_recipes()
+        assert repo.calls == ["get_branch"]
+
+    def test_emptied_file_updated(self, loader, repo):
+        """Test a file emptied upstream is stored empty, not skipped."""
+        sync(loader, "sha1")
+        repo.files["base_layers/tofu.md"] = ""
+        sync(loader, "sha2")
+
+        assert actions("sha2") == [("updated", "tofu")]
+        tofu = db.session.get(BaseLayer, recipe_url("base_layers/tofu.md"))
+        assert tofu.recipe == ""
+        assert tofu.blob_sha == repo.blob_sha("")
+
+        repo.fetched.clear()
+        sync(loader, "sha3")
+        assert repo.fetched == []
+
+    def test_full_load_refetches(self, loader, repo):
+        """Test a full load downloads every file without recording changes."""
+        loader.load_all_recipes()
+        repo.fetched.clear()
+
+        loader.load_all_recipes(incremental=False)
+        assert len(repo.fetched) == 2
+        assert loader.sync_run.changes == []
+
+    def test_empty_listing_keeps_recipes(self, loader, repo):
+        """Test an empty tree listing does not delete every recipe."""
+        sync(loader, "sha1")
+        repo.files.clear()
+        sync(loader, "sha2")
+        assert db.session.scalar(db.select(db.func.count()).select_from(BaseLayer)) == 2
+
+
+class TestContributorSync:
+    """Test bulk-written contributors and contribution edges."""
+
+    def edges(self):
+        return sorted(db.session.execute(db.select(contrib_baselayer)).all())
+
+    def test_contributors_linked(self, loader, repo):
+        """Test commit authors are linked to the recipes they touched."""
+        sync(loader, "sha1")
+        repo.commits = [
+            commit("c2", "ana", "base_layers/carnitas.md", "README.md"),
+            commit("c1", "ben", "base_layers/tofu.md", "base_layers/gone.md"),
+        ]
+        loader.load_contributors(incremental=False)
+
+        assert self.edges() == [
+            ("ana", recipe_url("base_layers/carnitas.md")),
+            ("ben", recipe_url("base_layers/tofu.md")),
+        ]
+        assert db.session.get(Contributor, "ana").full_name == "Ana"
+
+    def test_full_taco_contributors(self, client, loader, repo):
+        """Test commits touching full tacos link their authors too."""
+        repo.files["full_tacos/x.md"] = "# Taco X\n\nA whole taco."
+        loader.load_all_recipes()
+        repo.commits = [commit("c1", "ana", "full_tacos/x.md")]
+        loader.load_contributors(incremental=False)
+
+        edges = db.session.execute(db.select(contrib_fulltaco)).all()
+        assert [tuple(edge) for edge in edges] == [
+            ("ana", recipe_url("full_tacos/x.md"))
+        ]
+        data = client.get("/contributions/ana/").get_json()
+        assert data["full_tacos"] == ["Taco X"]
+
+    def test_full_resync_upserts(self, loader, repo):
+        """Test a full re-sync refreshes contributors without duplicating edges."""
+        sync(loader, "sha1")
+        repo.commits = [commit("c1", "ana", "base_layers/carnitas.md")]
+        loader.load_contributors(incremental=False)
+
+        repo.commits = [
+            commit("c2", "ana", "base_layers/carnitas.md", avatar="new.png"),
+            commit("c1", "ana", "base_layers/carnitas.md"),
+        ]
+        loader.load_contributors(incremental=False)
+
+        assert self.edges() == [("ana", recipe_url("base_layers/carnitas.md"))]
+        assert db.session.get(Contributor, "ana").gravatar == "new.png"
+
+    def test_queries_independent_of_history(self, loader, repo, query_counter):
+        """Test a long history is processed without per-commit queries."""
+        sync(loader, "sha1")
+        files = ["base_layers/carnitas.md", "base_layers/tofu.md"]
+        repo.commits = [
+            commit(f"c{i}", f"user{i % 4}", files[i % 2]) for i in range(200)
+        ]
+        query_counter.clear()
+        loader.load_contributors(incremental=False)
+
+        assert len(self.edges()) == 4
+        assert len(query_counter) < 25
+        assert not any("WHERE base_layer.url" in s for s in query_counter)
+
+
+class TestChangeFeed:
+    """Test the /changes/ endpoint."""
+
+    def test_changes_since(self, client, loader, repo):
+        """Test clients get the net changes after their last sync."""
+        sync(loader, "sha1")
+        repo.files["base_layers/carnitas.md"] = "# Carnitas\n\nNow with oranges."
+        repo.files["base_layers/al_pastor.md"] = "# Al Pastor\n\nPork and pineapple."
+        sync(loader, "sha2")
+        del repo.files["base_layers/tofu.md"]
+        repo.files["base_layers/al_pastor.md"] = "# Al Pastor\n\nMore pineapple."
+        sync(loader, "sha3")
+
+        data = client.get("/changes/?since=sha1").get_json()
+        assert data["latest"] == "sha3"
+        changes = {c["slug"]: c for c in data["changes"]}
+        assert changes["carnitas"]["action"] == "updated"
+        assert changes["carnitas"]["commit_sha"] == "sha2"
+        assert "oranges" in changes["carnitas"]["recipe"]["recipe"]
+        # Created then updated is still new to this client
+        assert changes["al_pastor"]["action"] == "created"
+        assert "More pineapple" in changes["al_pastor"]["recipe"]["recipe"]
+        assert changes["tofu"]["action"] == "deleted"
+        assert changes["tofu"]["recipe"] is None
+
+        assert client.get("/changes/?since=sha3").get_json()["changes"] == []
+
+    def test_created_and_deleted_dropped(self, client, loader, repo):
+        """Test recipes that came and went within the window are omitted."""
+        sync(loader, "sha1")
+        repo.files["base_layers/fish.md"] = "# Fish\n\nBattered."
+        sync(loader, "sha2")
+        del repo.files["base_layers/fish.md"]
+        sync(loader, "sha3")
+
+        data = client.get("/changes/?since=sha1").get_json()
+        assert data["changes"] == []
+        assert len(client.get("/changes/").get_json()["changes"]) == 2
+
+    def test_unknown_since(self, client, loader):
+        """Test an unrecorded commit is a 404."""
+        sync(loader, "sha1")
+        response = client.get("/changes/?since=nope")
+        assert response.status_code == 404
+        assert db.session.scalar(db.select(db.func.count(ChangeEvent.id))) == 2
+
+    def test_changes_paged(self, client, loader, repo):
+        """Test the feed pages with limit and after, and answers 304."""
+        repo.files["base_layers/al_pastor.md"] = "# Al Pastor\n\nPork."
+        sync(loader, "sha1")
+
+        seen = []
+        url = "/changes/?limit=2"
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            seen.extend(c["slug"] for c in response.get_json()["changes"])
+            link = response.headers.get("Link")
+            url = link[1 : link.index(">")] if link else None
+        assert sorted(seen) == ["al_pastor", "carnitas", "tofu"]
+
+        response = client.get("/changes/?limit=2")
+        etag = response.headers["ETag"]
+        response = client.get("/changes/?limit=2", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert client.get("/changes/?after=abc").status_code == 400
+
+    def test_cached_page_skips_feed_query(self, client, loader, repo, monkeypatch):
+        """Test a repeated page is served from cache with its Link header."""
+        repo.files["base_layers/al_pastor.md"] = "# Al Pastor\n\nPork."
+        sync(loader, "sha1")
+        calls = []
+        monkeypatch.setattr(
+            "app.api.changes_since",
+            lambda *args: calls.append(args) or changes_since(*args),
+        )
+
+        first = client.get("/changes/?limit=2")
+        second = client.get("/changes/?limit=2")
+        assert len(calls) == 1
+        assert second.get_data() == first.get_data()
+        assert second.headers["Link"] == first.headers["Link"]
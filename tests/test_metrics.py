@@ -0,0 +1,105 @@
+import pytest
+
+from app import create_app
+from app.config import Config, TestingConfig
+from app.models import BaseLayer, Contributor, db
+
+
+@pytest.fixture
+def contributor():
+    base_layer = BaseLayer(
+        url="https://example.com/carnitas", name="Carnitas", slug="carnitas"
+    )
+    contributor = Contributor(username="sinker", full_name="Dan Sinker")
+    contributor.base_layers.append(base_layer)
+    db.session.add(contributor)
+    db.session.flush()
+
+
+def metric_lines(client, prefix):
+    body = client.get("/metrics").get_data(as_text=True)
+    return [line for line in body.splitlines() if line.startswith(prefix)]
+
+
+class TestMetrics:
+    """Test per-request metrics and the /metrics endpoint."""
+
+    def test_prometheus_format(self, client, contributor):
+        """Test requests are counted and timed per URL rule."""
+        client.get("/base_layers/carnitas/")
+        client.get("/base_layers/carnitas/")
+        client.get("/base_layers/missing/")
+
+        response = client.get("/metrics")
+        assert response.content_type.startswith("text/plain; version=0.0.4")
+        body = response.get_data(as_text=True)
+        assert "# TYPE tacofancy_request_duration_seconds histogram" in body
+        assert (
+            'tacofancy_requests_total{endpoint="/base_layers/<slug>/",'
+            'method="GET",status="200"} 2'
+        ) in body
+        assert (
+            'tacofancy_requests_total{endpoint="/base_layers/<slug>/",'
+            'method="GET",status="404"} 1'
+        ) in body
+        assert (
+            'tacofancy_request_duration_seconds_bucket{endpoint="/base_layers/<slug>/",'
+            'method="GET",le="+Inf"} 3'
+        ) in body
+
+    def test_sql_statements_counted(self, app, client, contributor, query_counter):
+        """Test each request's statements are attributed to its endpoint."""
+        app.config["SNAPSHOT_CHECK_INTERVAL"] = 3600
+        client.get("/contributions/")
+        query_counter.clear()
+
+        client.get("/contributions/sinker/")
+        [line] = metric_lines(
+            client,
+            "tacofancy_request_sql_statements_sum"
+            '{endpoint="/contributions/<username>/"',
+        )
+        assert line.endswith(f" {len(query_counter)}")
+
+    def test_response_size(self, client, contributor):
+        """Test body sizes are recorded for responses with a known length."""
+        size = len(client.get("/base_layers/carnitas/").data)
+        [line] = metric_lines(
+            client,
+            'tacofancy_response_size_bytes_sum{endpoint="/base_layers/<slug>/"',
+        )
+        assert line.endswith(f" {size}")
+
+    def test_server_timing(self, app, client, contributor):
+        """Test the optional Server-Timing header."""
+        assert "Server-Timing" not in client.get("/base_layers/").headers
+
+        app.config["SERVER_TIMING"] = True
+        header = client.get("/base_layers/").headers["Server-Timing"]
+        assert header.startswith("db;dur=")
+        assert "queries" in header and "app;dur=" in header
+
+    def test_disabled(self):
+        """Test metrics can be turned off."""
+        config = type("NoMetrics", (TestingConfig,), {"METRICS_ENABLED": False})
+        app = create_app(config)
+        assert "metrics" not in app.extensions
+        assert "metrics" not in app.view_functions
+
+    def test_off_by_default(self, monkeypatch):
+        """Test /metrics is not served unless enabled."""
+        monkeypatch.delattr(TestingConfig, "METRICS_ENABLED")
+        monkeypatch.delattr(Config, "METRICS_ENABLED")
+        app = create_app(TestingConfig)
+        assert "metrics" not in app.view_functions
+
+    def test_token_required(self, app, client):
+        """Test a configured token must be sent as a bearer token."""
+        app.config["METRICS_TOKEN"] = "s3cret"
+        assert client.get("/metrics").status_code == 401
+        response = client.get("/metrics", headers={"Authorization": "Bearer nope"})
+        assert response.status_code == 401
+
+        response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+        assert response.status_code == 200
+        assert "tacofancy_requests_total" in response.get_data(as_text=True)
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from app.github_loader import RecipeFile, parse_recipe_file
+from app.pipeline import PipelineOptions, Throttle, run_pipeline
+
+
+def upper(job, content):
+    return content.upper()
+
+
+class TestPipeline:
+    """Test the concurrent fetch and parse stages of the recipe sync."""
+
+    def test_every_job_yielded(self):
+        """Test each job is yielded once, with None where fetch found nothing."""
+        jobs = list(range(20))
+        results = dict(
+            run_pipeline(
+                jobs,
+                lambda job: None if job % 5 == 0 else f"file {job}",
+                upper,
+                PipelineOptions(fetch_workers=4),
+            )
+        )
+        assert sorted(results) == jobs
+        assert results[0] is None
+        assert results[3] == "FILE 3"
+
+    def test_in_flight_bounded(self):
+        """Test fetching pauses while the writer has a full queue to drain."""
+        started = []
+        lock = threading.Lock()
+
+        def fetch(job):
+            with lock:
+                started.append(job)
+            return "content"
+
+        options = PipelineOptions(fetch_workers=4, queue_size=3)
+        consumed = 0
+        for _ in run_pipeline(list(range(12)), fetch, upper, options):
+            time.sleep(0.01)
+            consumed += 1
+            with lock:
+                assert len(started) - consumed <= options.queue_size
+
+    def test_errors_raised(self):
+        """Test an exception while fetching stops the sync."""
+
+        def fetch(job):
+            if job == 3:
+                raise RuntimeError("connection reset")
+            return "content"
+
+        with pytest.raises(RuntimeError):
+            list(run_pipeline(list(range(10)), fetch, upper, PipelineOptions()))
+
+    def test_parse_processes(self):
+        """Test recipes parse the same in worker processes."""
+        job = RecipeFile("shells", "shells/corn_tortillas.md", "abc", None)
+        options = PipelineOptions(parse_workers=1)
+        [(_, parsed)] = run_pipeline(
+            [job], lambda job: "# Corn Tortillas\n\nMasa.", parse_recipe_file, options
+        )
+        assert parsed == parse_recipe_file(job, "# Corn Tortillas\n\nMasa.")
+        assert parsed["slug"] == "corn_tortillas"
+
+    def test_unchanged_content_not_parsed(self):
+        """Test files matching the stored hash are only hashed."""
+        content = "# Tofu\n\nCrispy tofu."
+        first = parse_recipe_file(RecipeFile("base_layers", "t.md", "a", None), content)
+        job = RecipeFile("base_layers", "t.md", "b", first["content_hash"])
+        assert parse_recipe_file(job, content) == {
+            "content_hash": first["content_hash"],
+            "blob_sha": "b",
+        }
+
+
+class TestThrottle:
+    """Test request throttling across fetch threads."""
+
+    def test_spaces_calls(self):
+        """Test calls from several threads are spread over the rate."""
+        throttle = Throttle(rate=100)
+        start = time.monotonic()
+        threads = [threading.Thread(target=throttle.wait) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert time.monotonic() - start >= 0.05
+
+    def test_disabled(self):
+        """Test a zero rate never waits."""
+        throttle = Throttle(rate=0)
+        start = time.monotonic()
+        for _ in range(100):
+            throttle.wait()
+        assert time.monotonic() - start < 0.05
+
+
+class TestCommands:
+    """Test the sync CLI commands honour the pipeline settings."""
+
+    def test_load_contributors_options(self, app, monkeypatch):
+        """Test load-contributors builds its loader from the SYNC_* config."""
+        created = []
+
+        class FakeLoader:
+            def __init__(self, github_token=None, **kwargs):
+                created.append(kwargs)
+
+            def load_contributors(self, incremental=True):
+                pass
+
+        monkeypatch.setattr("app.github_loader.TacoFancyLoader", FakeLoader)
+        monkeypatch.setitem(app.config, "SYNC_BATCH_SIZE", 7)
+        result = app.test_cli_runner().invoke(args=["load-contributors"])
+        assert result.exit_code == 0, result.output
+        assert created[0]["options"] == PipelineOptions.from_config(app.config)
+        assert created[0]["options"].batch_size == 7
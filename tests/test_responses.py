@@ -0,0 +1,201 @@
+import gzip
+import json
+from datetime import datetime
+
+import brotli
+import cbor2
+import msgpack
+import pytest
+
+from app.models import BaseLayer, SyncMetadata, db
+
+
+@pytest.fixture
+def base_layers():
+    """Create enough base layers for compression to pay off."""
+    for i in range(20):
+        db.session.add(
+            BaseLayer(
+                url=f"https://example.com/layer_{i}",
+                name=f"Layer {i}",
+                slug=f"layer_{i}",
+                recipe="Slow-cooked pork shoulder with spices. " * 10,
+            )
+        )
+    db.session.flush()
+
+
+class TestResponses:
+    """Test pre-encoded response bodies."""
+
+    def test_identity_response(self, client, base_layers):
+        """Test clients that do not accept compression get plain JSON."""
+        response = client.get("/base_layers/", headers={"Accept-Encoding": ""})
+        assert response.status_code == 200
+        assert "Content-Encoding" not in response.headers
+        assert "Accept-Encoding" in response.headers["Vary"]
+        assert len(json.loads(response.data)) == 20
+
+    def test_gzip_response(self, client, base_layers):
+        """Test gzip is served when requested."""
+        response = client.get("/base_layers/", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert len(json.loads(gzip.decompress(response.data))) == 20
+
+    def test_brotli_preferred(self, client, base_layers):
+        """Test brotli wins when the client accepts both."""
+        response = client.get(
+            "/base_layers/", headers={"Accept-Encoding": "gzip, deflate, br"}
+        )
+        assert response.headers["Content-Encoding"] == "br"
+        assert len(json.loads(brotli.decompress(response.data))) == 20
+
+    def test_payload_encoded_once(self, app, client, base_layers):
+        """Test repeated requests reuse the stored bytes."""
+        client.get("/base_layers/layer_1/")
+        payloads = app.extensions["responses"].payloads
+        stored = payloads.get(("base_layers/layer_1", "application/json"))
+
+        response = client.get("/base_layers/layer_1/", headers={"Accept-Encoding": ""})
+        assert payloads.get(("base_layers/layer_1", "application/json")) is stored
+        assert response.data == stored.identity
+
+    def test_query_pages_compressed_on_demand(self, app, client, base_layers):
+        """Test pages and projections are only compressed in the coding asked for."""
+        response = client.get(
+            "/base_layers/?limit=10&fields=slug,name,slug",
+            headers={"Accept-Encoding": "br"},
+        )
+        assert response.headers["Content-Encoding"] == "br"
+        assert len(json.loads(brotli.decompress(response.data))) == 10
+
+        payloads = app.extensions["responses"].payloads
+        key = "base_layers?limit=10&after=None&fields=name,slug"
+        payload = payloads.get((key, "application/json"))
+        assert payload.lazy and payload.br is None and payload.gzip is None
+
+        same = client.get(
+            "/base_layers/?limit=10&fields=name,slug",
+            headers={"Accept-Encoding": "br"},
+        )
+        assert same.headers["ETag"] == response.headers["ETag"]
+
+        full = payloads.get(("base_layers", "application/json"))
+        assert full is None
+        client.get("/base_layers/")
+        full = payloads.get(("base_layers", "application/json"))
+        assert not full.lazy and full.br is not None and full.gzip is not None
+
+    def test_etag_not_modified(self, client, base_layers):
+        """Test a matching If-None-Match short-circuits to 304."""
+        response = client.get("/base_layers/layer_1/")
+        etag = response.headers["ETag"]
+        assert not response.headers["ETag"].startswith("W/")
+
+        response = client.get("/base_layers/layer_1/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+
+    def test_etag_per_resource_and_encoding(self, client, base_layers):
+        """Test tags differ between resources and content codings."""
+        plain = client.get("/base_layers/", headers={"Accept-Encoding": ""})
+        gzipped = client.get("/base_layers/", headers={"Accept-Encoding": "gzip"})
+        detail = client.get("/base_layers/layer_1/", headers={"Accept-Encoding": ""})
+        tags = {r.headers["ETag"] for r in (plain, gzipped, detail)}
+        assert len(tags) == 3
+
+    def test_last_modified_from_sync(self, client, base_layers):
+        """Test Last-Modified follows the last sync time."""
+        assert "Last-Modified" not in client.get("/base_layers/").headers
+
+        synced_at = datetime(2024, 5, 1, 12, 0, 0)
+        db.session.add(
+            SyncMetadata(
+                sync_type="recipes", last_commit_sha="abc123", last_sync_time=synced_at
+            )
+        )
+        db.session.flush()
+
+        response = client.get("/base_layers/")
+        assert response.headers["Last-Modified"] == "Wed, 01 May 2024 12:00:00 GMT"
+
+        response = client.get(
+            "/base_layers/",
+            headers={"If-Modified-Since": "Wed, 01 May 2024 12:00:00 GMT"},
+        )
+        assert response.status_code == 304
+
+    def test_etag_changes_after_sync(self, client, base_layers):
+        """Test a new sync generation invalidates old tags."""
+        etag = client.get("/base_layers/").headers["ETag"]
+
+        db.session.add(SyncMetadata(sync_type="recipes", last_commit_sha="abc123"))
+        db.session.flush()
+
+        response = client.get("/base_layers/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+
+class TestMediaTypes:
+    """Test MessagePack and CBOR content negotiation."""
+
+    def test_msgpack_response(self, client, base_layers):
+        """Test MessagePack is served from the cache when accepted."""
+        response = client.get(
+            "/base_layers/",
+            headers={"Accept": "application/msgpack", "Accept-Encoding": ""},
+        )
+        assert response.mimetype == "application/msgpack"
+        assert "Accept" in response.headers["Vary"]
+        assert msgpack.unpackb(response.data) == json.loads(
+            client.get("/base_layers/", headers={"Accept-Encoding": ""}).data
+        )
+
+    def test_cbor_response(self, client, base_layers):
+        """Test CBOR is served when accepted, compressed like JSON."""
+        response = client.get(
+            "/base_layers/layer_1/",
+            headers={"Accept": "application/cbor", "Accept-Encoding": "gzip"},
+        )
+        assert response.mimetype == "application/cbor"
+        assert cbor2.loads(gzip.decompress(response.data))["slug"] == "layer_1"
+
+    def test_json_by_default(self, client, base_layers):
+        """Test browsers and wildcard clients still get JSON."""
+        for accept in ("*/*", "text/html,application/xhtml+xml,*/*;q=0.8"):
+            response = client.get("/base_layers/", headers={"Accept": accept})
+            assert response.mimetype == "application/json"
+
+    def test_etag_per_media_type(self, client, base_layers):
+        """Test each media type has its own tag and conditional requests."""
+        plain = client.get("/base_layers/", headers={"Accept-Encoding": ""})
+        packed = client.get(
+            "/base_layers/",
+            headers={"Accept": "application/msgpack", "Accept-Encoding": ""},
+        )
+        assert packed.headers["ETag"] != plain.headers["ETag"]
+
+        response = client.get(
+            "/base_layers/",
+            headers={
+                "Accept": "application/msgpack",
+                "Accept-Encoding": "",
+                "If-None-Match": packed.headers["ETag"],
+            },
+        )
+        assert response.status_code == 304
+
+    def test_uncached_resources(self, client, base_layers):
+        """Test errors and uncached endpoints use the representations too."""
+        response = client.get(
+            "/base_layers/missing/", headers={"Accept": "application/msgpack"}
+        )
+        assert response.status_code == 404
+        assert response.mimetype == "application/msgpack"
+        assert msgpack.unpackb(response.data)["status"] == "error"
+
+        response = client.get(
+            "/bulk/?items=base_layers:layer_1", headers={"Accept": "application/cbor"}
+        )
+        assert cbor2.loads(response.data)["base_layers"]["layer_1"]["slug"] == "layer_1"
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+
+from app import search
+from app.models import BaseLayer, Condiment, db
+
+
+@pytest.fixture
+def indexed_recipes():
+    """Create and index recipes of two types."""
+    base_layers = [
+        BaseLayer(
+            url="https://example.com/carnitas",
+            name="Carnitas",
+            slug="carnitas",
+            recipe="Slow-cooked pork shoulder with spices",
+        ),
+        BaseLayer(
+            url="https://example.com/al_pastor",
+            name="Al Pastor",
+            slug="al_pastor",
+            recipe="Marinated pork with pineapple",
+        ),
+    ]
+    condiments = [
+        Condiment(
+            url="https://example.com/pineapple_salsa",
+            name="Pineapple Salsa",
+            slug="pineapple_salsa",
+            recipe="Diced pineapple, onion and cilantro",
+        )
+    ]
+    db.session.add_all(base_layers + condiments)
+    search.index_recipes(db.session, "base_layers", base_layers)
+    search.index_recipes(db.session, "condiments", condiments)
+    db.session.flush()
+
+
+class TestSearch:
+    """Test the full-text search endpoint."""
+
+    def test_ranked_results(self, client, indexed_recipes):
+        """Test name matches outrank body matches and snippets highlight terms."""
+        data = json.loads(client.get("/search/?q=pineapple").data)
+        slugs = [r["slug"] for r in data["results"]]
+        assert slugs == ["pineapple_salsa", "al_pastor"]
+        assert "<b>pineapple</b>" in data["results"][1]["snippet"]
+        assert data["next_offset"] is None
+
+    def test_stemming_and_type_filter(self, client, indexed_recipes):
+        """Test stemmed matching restricted to a single recipe type."""
+        data = json.loads(client.get("/search/?q=spice&type=base_layers").data)
+        assert [r["slug"] for r in data["results"]] == ["carnitas"]
+        assert data["results"][0]["recipe_type"] == "base_layers"
+
+    def test_not_modified(self, client, indexed_recipes):
+        """Test repeated searches carry an ETag and collapse to 304."""
+        response = client.get("/search/?q=pineapple")
+        etag = response.headers["ETag"]
+        response = client.get("/search/?q=pineapple", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert client.get("/search/?q=pork").headers["ETag"] != etag
+
+    def test_pagination(self, client, indexed_recipes):
+        """Test limit and offset page through ranked results."""
+        data = json.loads(client.get("/search/?q=pineapple&limit=1").data)
+        assert len(data["results"]) == 1
+        assert data["next_offset"] == 1
+
+        data = json.loads(client.get("/search/?q=pineapple&limit=1&offset=1").data)
+        assert data["results"][0]["slug"] == "al_pastor"
+        assert data["next_offset"] is None
+
+    def test_reindex_replaces_rows(self, client, indexed_recipes):
+        """Test re-indexing a recipe replaces its previous entry."""
+        carnitas = db.session.get(BaseLayer, "https://example.com/carnitas")
+        carnitas.recipe = "Braised in lard"
+        search.index_recipes(db.session, "base_layers", [carnitas])
+
+        assert json.loads(client.get("/search/?q=shoulder").data)["results"] == []
+        data = json.loads(client.get("/search/?q=lard").data)
+        assert len(data["results"]) == 1
+
+    def test_query_syntax_is_literal(self, client, indexed_recipes):
+        """Test FTS operators in user input don't cause errors."""
+        response = client.get('/search/?q=pork" OR (NEAR')
+        assert response.status_code == 200
+
+    def test_invalid_requests(self, client):
+        """Test missing queries and bad parameters are rejected."""
+        assert client.get("/search/").status_code == 400
+        assert client.get("/search/?q=taco&type=desserts").status_code == 400
+        assert client.get("/search/?q=taco&limit=0").status_code == 400
@@ -0,0 +1,111 @@
+import dataclasses
+import json
+import threading
+import time
+
+from sqlalchemy import create_engine, insert
+
+from app import create_app, snapshot
+from app.config import TestingConfig
+from app.models import BaseLayer, SyncMetadata, db
+from app.snapshot import get_snapshot
+
+
+def add_base_layer(slug):
+    base_layer = BaseLayer(
+        url=f"https://example.com/{slug}",
+        name=slug.title(),
+        slug=slug,
+        recipe="Slow-cooked pork shoulder",
+    )
+    db.session.add(base_layer)
+    db.session.flush()
+    return base_layer
+
+
+class TestSnapshot:
+    """Test the in-memory recipe snapshot."""
+
+    def test_snapshot_indexes(self, app):
+        """Test rows are indexed by slug and url."""
+        add_base_layer("carnitas")
+
+        table = get_snapshot().recipes["base_layers"]
+        assert len(table.items) == 1
+        assert table.by_slug["carnitas"]["name"] == "Carnitas"
+        assert table.by_url["https://example.com/carnitas"]["slug"] == "carnitas"
+        assert get_snapshot().recipes["full_tacos"].items == ()
+
+    def test_snapshot_reused_until_sync(self, app):
+        """Test the snapshot is only rebuilt when the sync generation changes."""
+        add_base_layer("carnitas")
+        first = get_snapshot()
+
+        add_base_layer("barbacoa")
+        assert get_snapshot() is first
+
+        db.session.add(SyncMetadata(sync_type="recipes", last_commit_sha="abc123"))
+        db.session.flush()
+
+        second = get_snapshot()
+        assert second is not first
+        assert second.generation != first.generation
+        assert "barbacoa" in second.recipes["base_layers"].by_slug
+
+    def test_endpoints_served_from_snapshot(self, client):
+        """Test list endpoints reflect the snapshot, not the live tables."""
+        add_base_layer("carnitas")
+        assert len(json.loads(client.get("/base_layers/").data)) == 1
+
+        add_base_layer("barbacoa")
+        assert len(json.loads(client.get("/base_layers/").data)) == 1
+        assert client.get("/base_layers/barbacoa/").status_code == 404
+
+    def test_built_at_startup(self, tmp_path):
+        """Test the snapshot is ready before the first request."""
+        uri = f"sqlite:///{tmp_path}/tacos.db"
+        engine = create_engine(uri)
+        db.metadata.create_all(engine)
+        with engine.begin() as connection:
+            connection.execute(
+                insert(BaseLayer), {"url": "https://example.com/c", "slug": "carnitas"}
+            )
+        engine.dispose()
+
+        overrides = {"SQLALCHEMY_DATABASE_URI": uri, "SNAPSHOT_PRELOAD": True}
+        preloaded = create_app(type("PreloadConfig", (TestingConfig,), overrides))
+        state = preloaded.extensions["snapshot"]
+        assert "carnitas" in state.snapshot.recipes["base_layers"].by_slug
+
+    def test_startup_before_migrations(self, tmp_path):
+        """Test an app over an empty database still starts, building later."""
+        overrides = {
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/empty.db",
+            "SNAPSHOT_PRELOAD": True,
+        }
+        app = create_app(type("PreloadConfig", (TestingConfig,), overrides))
+        assert app.extensions["snapshot"].snapshot is None
+
+    def test_rebuilt_in_background(self, app, monkeypatch):
+        """Test requests get the old snapshot until the rebuild swaps it in."""
+        app.config["SNAPSHOT_BACKGROUND_REBUILD"] = True
+        first = get_snapshot()
+        release = threading.Event()
+
+        def slow_build(session, generation):
+            release.wait(5)
+            return dataclasses.replace(first, generation=generation)
+
+        monkeypatch.setattr(snapshot, "build_snapshot", slow_build)
+        db.session.add(SyncMetadata(sync_type="recipes", last_commit_sha="abc123"))
+        db.session.flush()
+
+        assert get_snapshot() is first
+        assert get_snapshot() is first
+
+        release.set()
+        state = app.extensions["snapshot"]
+        deadline = time.monotonic() + 5
+        while state.rebuilding and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert get_snapshot().generation != first.generation
@@ -0,0 +1,189 @@
+import json
+
+import pytest
+
+from app import create_app, snapshot_file
+from app.config import TestingConfig
+from app.models import BaseLayer, Contributor, FullTaco, Shell, SyncMetadata, db
+from app.snapshot_file import SnapshotFile, SnapshotFileError, write_snapshot_file
+
+
+@pytest.fixture
+def dataset():
+    """Create recipes, a full taco and contributors in the database."""
+    carnitas = BaseLayer(
+        url="https://example.com/carnitas",
+        name="Carnitas",
+        slug="carnitas",
+        recipe="# Carnitas\n\nSlow-cooked pork shoulder.",
+        recipe_html="<h1>Carnitas</h1>",
+    )
+    tofu = BaseLayer(
+        url="https://example.com/tofu",
+        name="Tofu",
+        slug="tofu",
+        recipe="# Tofu\n\nCrispy tofu with pork-free spices.",
+    )
+    corn = Shell(
+        url="https://example.com/corn", name="Corn Tortillas", slug="corn_tortillas"
+    )
+    classic = FullTaco(
+        url="https://example.com/classic",
+        name="Classic",
+        slug="classic",
+        base_layer=carnitas,
+        shell=corn,
+    )
+    sinker = Contributor(username="sinker", full_name="Dan Sinker")
+    sinker.base_layers.extend([tofu, carnitas])
+    sinker.full_tacos.append(classic)
+    cook = Contributor(username="cook", full_name="A Cook")
+    cook.base_layers.append(carnitas)
+    db.session.add_all(
+        [sinker, cook, SyncMetadata(sync_type="recipes", last_commit_sha="abc123")]
+    )
+    db.session.flush()
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, dataset):
+    path = tmp_path / "tacos.snapshot"
+    write_snapshot_file(db.session, str(path))
+    return path
+
+
+@pytest.fixture
+def file_client(snapshot_path, tmp_path):
+    """A client for an app in snapshot mode with no usable database."""
+    config = type(
+        "SnapshotConfig",
+        (TestingConfig,),
+        {
+            "SNAPSHOT_FILE": str(snapshot_path),
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path}/missing/tacos.db",
+        },
+    )
+    return create_app(config).test_client()
+
+
+class TestSnapshotFile:
+    """Test writing and serving the single-file snapshot."""
+
+    @pytest.mark.parametrize(
+        "url",
+        [
+            "/base_layers/",
+            "/base_layers/?limit=1",
+            "/base_layers/?fields=name,slug",
+            "/base_layers/carnitas/",
+            "/base_layers/carnitas/?format=html",
+            "/base_layers/missing/",
+            "/shells/",
+            "/random/?full-taco=true",
+            "/bulk/?items=base_layers:tofu,shells:corn_tortillas,shells:nope",
+            "/contributions/",
+            "/contributions/sinker/",
+            "/contributors/base_layers/",
+            "/contributors/base_layers/carnitas/",
+        ],
+    )
+    def test_same_responses(self, client, file_client, url):
+        """Test snapshot mode serves what the database-backed app does."""
+        expected = client.get(url)
+        response = file_client.get(url)
+        assert response.status_code == expected.status_code
+        assert response.get_json() == expected.get_json()
+        assert response.headers.get("ETag") == expected.headers.get("ETag")
+
+    def test_same_export(self, client, file_client):
+        """Test the export is reproduced from the file."""
+        expected = client.get("/export/")
+        response = file_client.get("/export/")
+        assert response.headers["ETag"] == expected.headers["ETag"]
+        assert response.data.splitlines() == expected.data.splitlines()
+
+    def test_same_permalink(self, client, file_client):
+        """Test pages render with contributors from the file."""
+        url = "/carnitas/none/none/none/corn_tortillas/"
+        response = file_client.get(url)
+        assert b"A Cook" in response.data
+        assert response.data == client.get(url).data
+        assert file_client.get("/").status_code == 200
+
+    def test_search(self, file_client):
+        """Test search scans the file, preferring name matches."""
+        data = file_client.get("/search/?q=pork").get_json()
+        assert [r["slug"] for r in data["results"]] == ["carnitas", "tofu"]
+        assert "<b>pork</b>" in data["results"][0]["snippet"]
+
+        data = file_client.get("/search/?q=tofu&type=shells").get_json()
+        assert data["results"] == []
+
+    def test_change_feed_unavailable(self, file_client):
+        """Test the change feed, which needs the database, is a 404."""
+        assert file_client.get("/changes/").status_code == 404
+
+    def test_lazy_rows(self, snapshot_path):
+        """Test lookups decode records from the mapping on access."""
+        snapshot = SnapshotFile(str(snapshot_path)).snapshot
+        table = snapshot.recipes["base_layers"]
+        assert len(table.items) == 2
+        assert [row["slug"] for row in table.items[0:2]] == ["carnitas", "tofu"]
+        assert table.by_slug["tofu"]["url"] == "https://example.com/tofu"
+        assert "content_hash" not in table.by_slug["tofu"]
+        assert table.html_by_url["https://example.com/carnitas"] == (
+            "<h1>Carnitas</h1>"
+        )
+        assert list(snapshot.contributors_by_username) == ["cook", "sinker"]
+
+    def test_keyset_pages_follow_python_order(self, tmp_path, dataset, monkeypatch):
+        """Test cursors page correctly through rows exported in collation order."""
+        db.session.add_all([Contributor(username="Zed"), Contributor(username="_bot")])
+        db.session.flush()
+
+        export_records = snapshot_file.export_records
+
+        def locale_ordered(*args):
+            # Like en_US.UTF-8: case and punctuation are ignored when sorting
+            records = list(export_records(*args))
+            return sorted(
+                records,
+                key=lambda r: (
+                    r["kind"] == "contributor",
+                    r.get("username", "").lower().lstrip("_"),
+                ),
+            )
+
+        monkeypatch.setattr(snapshot_file, "export_records", locale_ordered)
+        path = tmp_path / "locale.snapshot"
+        write_snapshot_file(db.session, str(path))
+        config = type("SnapshotConfig", (TestingConfig,), {"SNAPSHOT_FILE": str(path)})
+        client = create_app(config).test_client()
+
+        seen = []
+        url = "/contributions/?limit=1&fields=username"
+        while url:
+            response = client.get(url)
+            seen.extend(row["username"] for row in response.get_json())
+            link = response.headers.get("Link")
+            url = link[1 : link.index(">")] if link else None
+        assert seen == ["Zed", "_bot", "cook", "sinker"]
+
+    def test_invalid_file(self, tmp_path, snapshot_path):
+        """Test files that are not snapshots, or of another version, are refused."""
+        bogus = tmp_path / "bogus"
+        bogus.write_bytes(b"not a snapshot file at all, just some text")
+        with pytest.raises(SnapshotFileError):
+            SnapshotFile(str(bogus))
+
+        data = bytearray(snapshot_path.read_bytes())
+        data[8] = 99
+        bogus.write_bytes(bytes(data))
+        with pytest.raises(SnapshotFileError, match="format 99"):
+            SnapshotFile(str(bogus))
+
+    def test_file_header(self, snapshot_path):
+        """Test the stored export header names the synced commit."""
+        header = SnapshotFile(str(snapshot_path)).header
+        assert header["syncs"]["recipes"]["commit_sha"] == "abc123"
+        assert json.dumps(header)
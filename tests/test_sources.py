@@ -0,0 +1,145 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from app.github_loader import TacoFancyLoader, recipe_url
+from app.models import BaseLayer, ChangeEvent, Contributor, FullTaco, db
+from app.sources import (
+    ArchiveSource,
+    CheckoutSource,
+    _MemorySource,
+    git_blob_sha,
+    local_source,
+    read_tarball,
+)
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "tacofancy")
+COMMIT = "3f2a9c0d1e4b5a6978877665544332211ffeedd0"
+TOP_LEVEL = "dansinker-tacofancy-3f2a9c0"
+
+
+@pytest.fixture
+def tarball(tmp_path):
+    """The fixture repository packed the way GitHub serves tarballs."""
+    path = str(tmp_path / "tacofancy.tar.gz")
+    with tarfile.open(
+        path, "w:gz", format=tarfile.PAX_FORMAT, pax_headers={"comment": COMMIT}
+    ) as tar:
+        tar.add(FIXTURE, arcname=TOP_LEVEL)
+    return path
+
+
+@pytest.fixture
+def zipball(tmp_path):
+    """The fixture repository packed the way GitHub serves zipballs."""
+    path = str(tmp_path / "tacofancy.zip")
+    with zipfile.ZipFile(path, "w") as archive:
+        for root, _, names in os.walk(FIXTURE):
+            for name in names:
+                full_path = os.path.join(root, name)
+                arcname = os.path.relpath(full_path, FIXTURE)
+                archive.write(full_path, f"{TOP_LEVEL}/{arcname}")
+        archive.comment = COMMIT.encode("ascii")
+    return path
+
+
+class TestSources:
+    """Test reading the repository from local archives and checkouts."""
+
+    def test_blob_sha_matches_git(self):
+        """Test blob SHAs match what git and the GitHub tree API report."""
+        assert git_blob_sha(b"hello\n") == "ce013625030ba8dba906f756967f9e9ca394464a"
+
+    def test_checkout_lists_markdown(self):
+        """Test a checkout lists its markdown files by repository path."""
+        files = CheckoutSource(FIXTURE).list_files(None)
+        assert "base_layers/carnitas.md" in files
+        assert "README.md" in files
+        assert len(files) == 8
+
+    def test_checkout_sha_follows_content(self, tmp_path):
+        """Test a checkout's SHA changes when its files do."""
+        (tmp_path / "shells").mkdir()
+        (tmp_path / "shells" / "flour.md").write_text("# Flour\n")
+        before = CheckoutSource(str(tmp_path)).head_sha()
+        (tmp_path / "shells" / "flour.md").write_text("# Flour Tortillas\n")
+        assert CheckoutSource(str(tmp_path)).head_sha() != before
+
+    @pytest.mark.parametrize("archive", ["tarball", "zipball"])
+    def test_archive_matches_checkout(self, request, archive):
+        """Test GitHub archives unwrap to the same files and report the commit."""
+        source = ArchiveSource(request.getfixturevalue(archive))
+        assert source.head_sha() == COMMIT
+        assert source.list_files(COMMIT) == CheckoutSource(FIXTURE).list_files(None)
+
+    def test_tarball_streamed(self, tarball):
+        """Test tarballs are read from non-seekable streams."""
+
+        class Stream(io.RawIOBase):
+            def __init__(self, f):
+                self.f = f
+
+            def readable(self):
+                return True
+
+            def readinto(self, buffer):
+                data = self.f.read(len(buffer))
+                buffer[: len(data)] = data
+                return len(data)
+
+        with open(tarball, "rb") as f:
+            commit, files = read_tarball(Stream(f))
+        assert commit == COMMIT
+        assert b"pork shoulder" in files["base_layers/carnitas.md"]
+
+    def test_read_checks_sha(self):
+        """Test a file is only served for the blob SHA it was listed with."""
+        source = CheckoutSource(FIXTURE)
+        sha = source.list_files(None)["shells/corn_tortillas.md"]
+        assert "comal" in source.read("shells/corn_tortillas.md", sha)
+        assert source.read("shells/corn_tortillas.md", "0" * 40) is None
+
+    def test_incomplete_source_refused(self):
+        """Test in-memory sources must implement _read to be created."""
+
+        class NoReader(_MemorySource):
+            pass
+
+        with pytest.raises(TypeError):
+            NoReader()
+
+    def test_unknown_path(self, tmp_path):
+        """Test paths that are neither archives nor directories are rejected."""
+        with pytest.raises(ValueError):
+            local_source(str(tmp_path / "tacofancy.rar"))
+
+
+class TestOfflineSync:
+    """Test syncing recipes from local sources without GitHub."""
+
+    def test_checkout_sync(self):
+        """Test a checkout loads every category and skips contributors."""
+        loader = TacoFancyLoader(source=FIXTURE)
+        assert loader.repo is None
+        loader.load_all_data()
+
+        carnitas = db.session.get(BaseLayer, recipe_url("base_layers/carnitas.md"))
+        assert carnitas.name == "Carnitas"
+        with open(os.path.join(FIXTURE, "base_layers", "carnitas.md"), "rb") as f:
+            assert carnitas.blob_sha == git_blob_sha(f.read())
+        assert db.session.scalar(db.select(db.func.count()).select_from(FullTaco)) == 1
+        assert db.session.scalar(db.select(db.func.count(Contributor.username))) == 0
+
+    def test_switching_sources_keeps_rows(self, tarball):
+        """Test an archive of the same files changes nothing a checkout synced."""
+        TacoFancyLoader(source=FIXTURE).load_all_recipes()
+        events = db.session.scalar(db.select(db.func.count(ChangeEvent.id)))
+
+        loader = TacoFancyLoader(source=tarball)
+        loader.load_all_recipes()
+        assert loader.sync_run.commit_sha == COMMIT
+        assert loader.sync_run.changes == []
+        assert db.session.scalar(db.select(db.func.count(ChangeEvent.id))) == events
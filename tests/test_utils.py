@@ -0,0 +1,18 @@
+from app.utils import LRUCache
+
+
+class TestLRUCache:
+    """Test the least-recently-used cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test reading a key protects it from eviction."""
+        cache = LRUCache(2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        assert cache.get("a") == 1
+
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2